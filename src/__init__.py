@@ -25,6 +25,16 @@ def create_app(testing=False):  # Add 'testing' parameter
         app.config["TESTING"] = True
         app.config["WTF_CSRF_ENABLED"] = False  # Disable CSRF in tests
 
+    # Keep session data server-side; the cookie only holds the session ID
+    from .sessions import init_sessions
+
+    init_sessions(app)
+
+    # Record request latencies and serve them on /metrics
+    from .metrics import init_metrics
+
+    init_metrics(app)
+
     # Import blueprints
     from .auth import auth_bp
     from .search import search_bp
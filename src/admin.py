@@ -3,17 +3,46 @@ Admin Blueprint for managing users.
 
 This module provides routes for:
 - Viewing the admin dashboard
-- Fetching user data
+- Listing users page by page, with search and sort
 - Resetting user passwords
 - Updating usernames
 - Deleting users
+- Deleting, resetting or renaming many users in one request
+- Reporting upstream connection pool usage and cache statistics
+- Reporting user and watchlist statistics
+- Rebuilding the search category index
 """
 
+import base64
+import json
 import logging
-from flask import Blueprint, render_template, jsonify, request, session, flash
-import bcrypt
-from .database import supabase
+import os
+from flask import Blueprint, render_template, jsonify, request, session
+from postgrest.types import ReturnMethod
+from .admin_stats import (
+    admin_stats,
+    track_user_deleted,
+    track_user_renamed,
+)
+from .database import (
+    supabase,
+    invalidate_categories,
+    movie_detail_cache,
+    results_cache,
+    prefetch_cache,
+)
 from .decorators import admin_required
+from .passwords import PasswordHashingBusy, password_hasher
+from .recommendations import recommendation_cache
+from .sessions import revoke_user_sessions
+from .upstream import upstream
+from .usernames import (
+    is_unique_violation,
+    track_username_removed,
+    track_username_renamed,
+    username_exists,
+)
+from .watchlist import notify_watchlist_change
 
 # Set up logging
 logging.basicConfig(level=logging.ERROR)
@@ -22,6 +51,33 @@ logger = logging.getLogger(__name__)
 # Fix the Blueprint creation syntax
 admin_bp = Blueprint("admin", __name__)
 
+# Columns returned for users; never the password hash
+USER_COLUMNS = "id, username, is_admin"
+
+# Users per page of /api/users, and the most a client may ask for
+ADMIN_PAGE_SIZE = int(os.environ.get("ADMIN_PAGE_SIZE", 50))
+ADMIN_MAX_PAGE_SIZE = 200
+
+# Most operations accepted by one /api/users/bulk request, and the number
+# of values put in one ``in`` filter (which travels in the URL)
+ADMIN_BULK_LIMIT = int(os.environ.get("ADMIN_BULK_LIMIT", 1000))
+IN_FILTER_CHUNK = 200
+
+# Message recorded for every user of a bulk write that failed
+BULK_FAILURES = {
+    "delete": "Failed to delete user",
+    "reset_password": "Failed to reset password",
+    "rename": "Failed to update username",
+}
+
+# Sort orders for /api/users as (column, descending) pairs. Each ends with
+# the unique username so that it can be resumed from the last row shown.
+USER_SORTS = {
+    "username": [("username", False)],
+    "-username": [("username", True)],
+    "role": [("is_admin", True), ("username", False)],
+}
+
 
 def get_user(user_id):
     """
@@ -35,7 +91,10 @@ def get_user(user_id):
     """
     try:
         response = (
-            supabase.table("profiles").select("*").eq("id", user_id).execute()
+            supabase.table("profiles")
+            .select(USER_COLUMNS)
+            .eq("id", user_id)
+            .execute()
         )
         return response.data[0] if response.data else None
     except Exception as e:
@@ -58,13 +117,7 @@ def validate_new_username(username):
 
     # Check if username already exists
     try:
-        existing = (
-            supabase.table("profiles")
-            .select("*")
-            .eq("username", username)
-            .execute()
-        )
-        if existing.data:
+        if username_exists(username):
             return False, "Username already exists"
     except Exception as e:
         logger.error(f"Error checking username existence: {e}")
@@ -73,37 +126,157 @@ def validate_new_username(username):
     return True, None
 
 
-@admin_bp.route("/admin")
-@admin_required
-def dashboard():
-    """Render the admin dashboard with user data."""
+def encode_cursor(values):
+    """Turn the sort values of the last row on a page into a cursor."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Inverse of ``encode_cursor``; raises ValueError for a bad cursor."""
     try:
-        users = supabase.table("profiles").select("*").execute().data
-        return render_template(
-            "admin.html",
-            username=session.get("username"),
-            users=users,
-            is_admin=session.get("is_admin", False),
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _postgrest_value(value):
+    """Quote a value for use inside a PostgREST ``or`` filter."""
+    if isinstance(value, bool):
+        return str(value).lower()
+    escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def keyset_filter(columns, values):
+    """
+    Build the PostgREST ``or`` filter matching rows that come after
+    ``values`` in the order given by ``columns`` ((column, desc) pairs).
+    """
+    conditions = []
+    for i, (column, descending) in enumerate(columns):
+        terms = [
+            f"{earlier}.eq.{_postgrest_value(value)}"
+            for (earlier, _), value in zip(columns[:i], values)
+        ]
+        operator = "lt" if descending else "gt"
+        terms.append(f"{column}.{operator}.{_postgrest_value(values[i])}")
+        conditions.append(
+            terms[0] if len(terms) == 1 else f"and({','.join(terms)})"
         )
-    except Exception as e:
-        logger.error(f"Admin page error: {e}")
-        flash("Error loading admin dashboard", "error")
-        return (
-            render_template("admin.html", error="Failed to load user data"),
-            500,
+    return ",".join(conditions)
+
+
+def _users_query(search):
+    """Select the listed columns of users whose name starts with ``search``."""
+    query = supabase.table("profiles").select(USER_COLUMNS)
+    if search:
+        pattern = (
+            search.replace("\\", "\\\\")
+            .replace("%", "\\%")
+            .replace("_", "\\_")
         )
+        query = query.ilike("username", f"{pattern}%")
+    return query
+
+
+def _list_users_by_role(search, after, count):
+    """
+    Return up to ``count`` users, admins first, each group by username.
+    Users whose ``is_admin`` is NULL are listed with the other users, which
+    an ``is_admin`` sort would put before the admins.
+    """
+    users = []
+    for is_admin, operator in ((True, "is"), (False, "not.is")):
+        if after is not None and is_admin and not after[0]:
+            continue  # the cursor is already past the admins
+        query = _users_query(search).filter("is_admin", operator, "true")
+        if after is not None and bool(after[0]) == is_admin:
+            query = query.gt("username", after[1])
+        users.extend(
+            query.order("username").limit(count - len(users)).execute().data
+        )
+        if len(users) >= count:
+            break
+    return users
+
+
+def list_users(search="", sort="username", after=None, limit=ADMIN_PAGE_SIZE):
+    """
+    Return one page of users and the cursor of the next page (or None).
+
+    Users whose name starts with ``search`` are returned in ``sort`` order,
+    starting after the ``after`` cursor. Pages are read by keyset rather
+    than offset, so every page costs the same however deep it is.
+    """
+    columns = USER_SORTS[sort]
+    values = None
+    if after:
+        values = decode_cursor(after)
+        if len(values) != len(columns):
+            raise ValueError("Invalid cursor")
+    # One extra row tells us whether there is another page
+    if sort == "role":
+        users = _list_users_by_role(search, values, limit + 1)
+    else:
+        query = _users_query(search)
+        if values is not None:
+            query = query.or_(keyset_filter(columns, values))
+        for column, descending in columns:
+            query = query.order(column, desc=descending)
+        users = query.limit(limit + 1).execute().data
+    if len(users) <= limit:
+        return users, None
+    users = users[:limit]
+    last = users[-1]
+    return users, encode_cursor(
+        [
+            bool(last[column]) if column == "is_admin" else last[column]
+            for column, _ in columns
+        ]
+    )
+
+
+@admin_bp.route("/admin")
+@admin_required
+def dashboard():
+    """Render the admin dashboard; admin.js loads the users page by page."""
+    return render_template(
+        "admin.html",
+        username=session.get("username"),
+        is_admin=session.get("is_admin", False),
+        page_size=ADMIN_PAGE_SIZE,
+    )
 
 
 @admin_bp.route("/api/users")
 @admin_required
 def get_users():
-    """Fetch all users from the database."""
+    """
+    Return a page of users as ``{"users": [...], "next": cursor}``.
+
+    Query parameters: ``q`` (username prefix), ``sort`` (one of
+    ``USER_SORTS``), ``limit`` and ``after`` (the previous page's ``next``).
+    """
+    sort = request.args.get("sort", "username")
+    if sort not in USER_SORTS:
+        return jsonify({"error": f"Unknown sort: {sort}"}), 400
+    limit = min(
+        max(request.args.get("limit", ADMIN_PAGE_SIZE, type=int), 1),
+        ADMIN_MAX_PAGE_SIZE,
+    )
     try:
-        users = supabase.table("profiles").select("*").execute().data
-        # Remove sensitive information
-        for user in users:
-            user.pop("password", None)
-        return jsonify(users)
+        users, next_cursor = list_users(
+            search=request.args.get("q", "").strip(),
+            sort=sort,
+            after=request.args.get("after"),
+            limit=limit,
+        )
+        return jsonify({"users": users, "next": next_cursor})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.error(f"Error fetching users: {e}")
         return jsonify({"error": "Failed to fetch users"}), 500
@@ -129,15 +302,20 @@ def reset_password(user_id):
             return jsonify({"error": "User not found"}), 404
 
         # Hash and update password
-        hashed_password = bcrypt.hashpw(
-            new_password.encode("utf-8"), bcrypt.gensalt()
-        ).decode("utf-8")
+        hashed_password = password_hasher.hash(new_password)
 
         supabase.table("profiles").update({"password": hashed_password}).eq(
             "id", user_id
         ).execute()
+        revoke_user_sessions(user_id)
 
         return jsonify({"message": "Password updated successfully"}), 200
+    except PasswordHashingBusy as e:
+        return (
+            jsonify({"error": "Password hashing is busy, try again shortly"}),
+            503,
+            {"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
         logger.error(f"Error resetting password: {e}")
         return jsonify({"error": "Failed to reset password"}), 500
@@ -169,9 +347,14 @@ def update_username(user_id):
         supabase.table("watchlist").update({"username": new_username}).eq(
             "username", user["username"]
         ).execute()
+        revoke_user_sessions(user_id)
+        track_user_renamed(user["username"], new_username)
+        track_username_renamed(user["username"], new_username)
 
         return jsonify({"message": "Username updated successfully"}), 200
     except Exception as e:
+        if is_unique_violation(e):
+            return jsonify({"error": "Username already exists"}), 400
         logger.error(f"Error updating username: {e}")
         return jsonify({"error": "Failed to update username"}), 500
 
@@ -198,14 +381,328 @@ def delete_user(user_id):
             return jsonify({"error": "Cannot delete another admin user"}), 403
 
         # Delete user's watchlist entries first
+        entries = watchlist_entries_of([user["username"]])
         supabase.table("watchlist").delete().eq(
             "username", user["username"]
         ).execute()
 
         # Then delete the user
         supabase.table("profiles").delete().eq("id", user_id).execute()
+        revoke_user_sessions(user_id)
+        forget_deleted_users([user["username"]], entries)
 
         return jsonify({"message": "User deleted successfully"}), 200
     except Exception as e:
         logger.error(f"Error deleting user: {e}")
         return jsonify({"error": "Failed to delete user"}), 500
+
+
+def watchlist_entries_of(usernames):
+    """Return the ``username``/``showId`` watchlist rows of ``usernames``."""
+    return (
+        supabase.table("watchlist")
+        .select("username, showId")
+        .in_("username", list(usernames))
+        .execute()
+        .data
+    )
+
+
+def forget_deleted_users(usernames, entries):
+    """
+    Pass the removal of deleted users' watchlist ``entries`` to the change
+    listeners, then drop the users from the in-memory indexes.
+    """
+    for entry in entries:
+        notify_watchlist_change(entry["username"], entry["showId"], "remove")
+    for username in usernames:
+        track_user_deleted(username)
+        track_username_removed(username)
+
+
+def _chunks(items, size=IN_FILTER_CHUNK):
+    """Split ``items`` into lists of at most ``size``."""
+    items = list(items)
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def fetch_users_by(column, values):
+    """Fetch the users whose ``column`` is in ``values``, in few queries."""
+    users = []
+    for chunk in _chunks(values):
+        users.extend(
+            supabase.table("profiles")
+            .select(USER_COLUMNS)
+            .in_(column, chunk)
+            .execute()
+            .data
+        )
+    return users
+
+
+def check_bulk_operation(operation, user, current_username, taken):
+    """Return why ``operation`` on ``user`` cannot run, or None."""
+    if user is None:
+        return "User not found"
+    new_username = operation["newUsername"]
+    rules = {
+        "delete": [
+            (
+                user["username"] == current_username,
+                "You cannot delete yourself!",
+            ),
+            (user.get("is_admin"), "Cannot delete another admin user"),
+        ],
+        "reset_password": [
+            (
+                len(operation["newPassword"]) < 8,
+                "Password must be at least 8 characters long",
+            )
+        ],
+        "rename": [
+            (
+                len(new_username) < 3,
+                "Username must be at least 3 characters long",
+            ),
+            (new_username in taken, "Username already exists"),
+        ],
+    }
+    return next(
+        (error for failed, error in rules[operation["action"]] if failed),
+        None,
+    )
+
+
+def _bulk_delete(entries):
+    """Delete users and their watchlists, three queries per chunk."""
+    users = [user for _, user in entries]
+    usernames = [user["username"] for user in users]
+    watchlist = watchlist_entries_of(usernames)
+    supabase.table("watchlist").delete(returning=ReturnMethod.minimal).in_(
+        "username", usernames
+    ).execute()
+    supabase.table("profiles").delete(returning=ReturnMethod.minimal).in_(
+        "id", [user["id"] for user in users]
+    ).execute()
+    forget_deleted_users(usernames, watchlist)
+    return {}
+
+
+def _bulk_reset_password(entries):
+    """Store the new password hashes, one write per user."""
+    failed = {}
+    for operation, user in entries:
+        try:
+            supabase.table("profiles").update(
+                {"password": operation["hashedPassword"]},
+                returning=ReturnMethod.minimal,
+            ).eq("id", user["id"]).execute()
+        except Exception as e:
+            logger.error(f"Password reset failed for {user['username']}: {e}")
+            failed[operation["id"]] = BULK_FAILURES["reset_password"]
+    return failed
+
+
+def _rename_user(user, new_username):
+    """
+    Rename ``user`` in ``profiles``, then move its watchlist rows. If the
+    second write fails the first is undone, so no rows are orphaned.
+    """
+    supabase.table("profiles").update(
+        {"username": new_username}, returning=ReturnMethod.minimal
+    ).eq("id", user["id"]).execute()
+    try:
+        supabase.table("watchlist").update(
+            {"username": new_username}, returning=ReturnMethod.minimal
+        ).eq("username", user["username"]).execute()
+    except Exception:
+        supabase.table("profiles").update(
+            {"username": user["username"]}, returning=ReturnMethod.minimal
+        ).eq("id", user["id"]).execute()
+        raise
+
+
+def _bulk_rename(entries):
+    """Rename users one at a time, reporting failures per user."""
+    failed = {}
+    for operation, user in entries:
+        new_username = operation["newUsername"]
+        try:
+            _rename_user(user, new_username)
+        except Exception as e:
+            logger.error(f"Rename failed for {user['username']}: {e}")
+            failed[operation["id"]] = BULK_FAILURES["rename"]
+            continue
+        track_user_renamed(user["username"], new_username)
+        track_username_renamed(user["username"], new_username)
+    return failed
+
+
+BULK_WRITERS = {
+    "delete": _bulk_delete,
+    "reset_password": _bulk_reset_password,
+    "rename": _bulk_rename,
+}
+
+
+def run_bulk_operations(operations, current_username):
+    """
+    Validate and run ``operations`` (dicts with ``action`` and ``id``);
+    return ``{user_id: {"ok": bool, "error": message}}``.
+
+    The whole batch is validated with a couple of ``in`` queries, then
+    the new passwords are hashed, each with its own salt. Only then do
+    the writes for each action run together, chunk by chunk. Deletes
+    succeed or fail per chunk; resets and renames are reported per user.
+    Raises ``PasswordHashingBusy``, before writing anything, if the
+    password hasher is saturated.
+    """
+    results = {}
+    groups = {action: [] for action in BULK_WRITERS}
+    user_ids = [operation["id"] for operation in operations]
+    users = {str(user["id"]): user for user in fetch_users_by("id", user_ids)}
+
+    # New usernames must be free and used once in the batch
+    new_usernames = [
+        operation["newUsername"]
+        for operation in operations
+        if operation["action"] == "rename"
+    ]
+    taken = {
+        user["username"] for user in fetch_users_by("username", new_usernames)
+    }
+    taken.update(
+        name for name in new_usernames if new_usernames.count(name) > 1
+    )
+
+    for operation in operations:
+        user = users.get(operation["id"])
+        error = check_bulk_operation(operation, user, current_username, taken)
+        if error:
+            results[operation["id"]] = {"ok": False, "error": error}
+        else:
+            groups[operation["action"]].append((operation, user))
+
+    resets = groups["reset_password"]
+    hashes = password_hasher.hash_many(
+        operation["newPassword"] for operation, _ in resets
+    )
+    for (operation, _), hashed in zip(resets, hashes):
+        operation["hashedPassword"] = hashed
+
+    for action, entries in groups.items():
+        for chunk in _chunks(entries):
+            try:
+                failed = BULK_WRITERS[action](chunk)
+            except Exception as e:
+                logger.error(f"Bulk {action} failed: {e}")
+                failed = {
+                    operation["id"]: BULK_FAILURES[action]
+                    for operation, _ in chunk
+                }
+            for operation, user in chunk:
+                if operation["id"] in failed:
+                    results[operation["id"]] = {
+                        "ok": False,
+                        "error": failed[operation["id"]],
+                    }
+                else:
+                    results[operation["id"]] = {"ok": True}
+                    revoke_user_sessions(user["id"])
+    return results
+
+
+def parse_bulk_operations(payload):
+    """Normalise a bulk request body; raises ValueError if it is invalid."""
+    operations = (payload or {}).get("operations")
+    if not isinstance(operations, list) or not operations:
+        raise ValueError("Provide a non-empty list of operations")
+    if len(operations) > ADMIN_BULK_LIMIT:
+        raise ValueError(f"At most {ADMIN_BULK_LIMIT} operations per request")
+    parsed = []
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise ValueError("Every operation must be an object")
+        if operation.get("id") in (None, ""):
+            raise ValueError("Every operation needs a user id")
+        if operation.get("action") not in BULK_WRITERS:
+            raise ValueError(f"Unknown action: {operation.get('action')}")
+        parsed.append(
+            {
+                **operation,
+                "id": str(operation["id"]),
+                "newPassword": str(operation.get("newPassword") or ""),
+                "newUsername": str(operation.get("newUsername") or "").strip(),
+            }
+        )
+    user_ids = [operation["id"] for operation in parsed]
+    if len(set(user_ids)) != len(user_ids):
+        raise ValueError("Only one operation per user is allowed")
+    return parsed
+
+
+@admin_bp.route("/api/users/bulk", methods=["POST"])
+@admin_required
+def bulk_update_users():
+    """
+    Delete, reset or rename many users at once. The body is
+    ``{"operations": [{"action": "delete", "id": ...},
+    {"action": "reset_password", "id": ..., "newPassword": ...},
+    {"action": "rename", "id": ..., "newUsername": ...}]}`` and the reply
+    maps each user id to ``{"ok": true}`` or ``{"ok": false, "error": ...}``.
+    """
+    try:
+        operations = parse_bulk_operations(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        results = run_bulk_operations(operations, session.get("username"))
+        return jsonify({"results": results}), 200
+    except PasswordHashingBusy as e:
+        return (
+            jsonify({"error": "Password hashing is busy, try again shortly"}),
+            503,
+            {"Retry-After": str(e.retry_after)},
+        )
+    except Exception as e:
+        logger.error(f"Error running bulk user operations: {e}")
+        return jsonify({"error": "Failed to run bulk operations"}), 500
+
+
+@admin_bp.route("/api/upstream-stats")
+@admin_required
+def upstream_stats():
+    """Report request counts and connection pool usage for this worker."""
+    return jsonify(upstream.stats())
+
+
+@admin_bp.route("/api/cache-stats")
+@admin_required
+def cache_stats():
+    """Report hit/miss/eviction counters for this worker's caches."""
+    return jsonify(
+        {
+            "movie_details": movie_detail_cache.stats(),
+            "search_results": results_cache.stats(),
+            "prefetched_pages": prefetch_cache.stats(),
+            "recommendations": recommendation_cache.stats(),
+        }
+    )
+
+
+@admin_bp.route("/api/stats")
+@admin_required
+def user_stats():
+    """Report user and watchlist statistics, kept up to date in memory."""
+    stats = admin_stats.peek()
+    if stats is None:
+        return jsonify({"error": "Statistics are still being built"}), 503
+    return jsonify(stats.summary())
+
+
+@admin_bp.route("/api/categories/refresh", methods=["POST"])
+@admin_required
+def refresh_categories():
+    """Rebuild the search page category index in the background."""
+    invalidate_categories()
+    return jsonify({"message": "Category index refresh started"}), 202
@@ -0,0 +1,287 @@
+"""Aggregate statistics for the admin dashboard.
+
+The counts are built in one pass over the ``profiles`` and ``watchlist``
+tables and then kept current by the app's own write paths: registration,
+watchlist changes and admin renames and deletions. The dashboard reads
+them from memory, so showing them never scans a table. A periodic rebuild
+picks up changes made by other workers.
+
+Each worker keeps its own copy, so with several workers two requests can
+see slightly different counts until the next rebuild.
+
+Sign-up days come from ``profiles.created_at``. If that column is
+missing, the rest of the statistics are still built and
+``signups_per_day`` is reported as None.
+"""
+
+import datetime
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from postgrest.exceptions import APIError
+
+from .cache import RefreshingValue
+from .database import get_catalog_snapshot, scan_table
+from .watchlist import on_watchlist_change
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Seconds between full rebuilds, and days of sign-ups to report
+ADMIN_STATS_SYNC_INTERVAL = float(
+    os.environ.get("ADMIN_STATS_SYNC_INTERVAL", 3600)
+)
+ADMIN_STATS_DAYS = int(os.environ.get("ADMIN_STATS_DAYS", 30))
+
+# Watchlist size buckets as (largest size, label)
+SIZE_BUCKETS = ((5, "1-5"), (20, "6-20"), (50, "21-50"), (None, "51+"))
+
+
+def _signup_day(created_at):
+    """Return the ``YYYY-MM-DD`` day of a timestamp string, or None."""
+    return str(created_at)[:10] if created_at else None
+
+
+class AdminStats:  # pylint: disable=too-many-instance-attributes
+    """User and watchlist counts that can be updated in place.
+
+    Besides the entries of every watchlist, it keeps running totals (users
+    per watchlist size, saves per title, watched entries) so that a
+    summary costs nothing like a scan.
+    """
+
+    def __init__(self, profiles=(), entries=(), with_signups=True):
+        self._lock = threading.Lock()
+        self.users = {}
+        self.signups = Counter()
+        self.with_signups = with_signups
+        self.watchlists = {}
+        self.sizes = Counter()
+        self.saves = Counter()
+        self.watched = 0
+        self.built_at = time.time()
+        for profile in profiles:
+            self.users[profile["username"]] = bool(
+                profile.get("is_admin", False)
+            )
+            # Users without a sign-up day are counted but not charted
+            day = _signup_day(profile.get("created_at"))
+            if day:
+                self.signups[day] += 1
+        for entry in entries:
+            self.add_entry(
+                entry["username"], entry["showId"], entry.get("watched")
+            )
+
+    def add_user(self, username, is_admin=False, day=None):
+        """Record a new user, signed up on ``day`` (default today)."""
+        with self._lock:
+            if username in self.users:
+                return
+            self.users[username] = bool(is_admin)
+            self.signups[day or datetime.date.today().isoformat()] += 1
+
+    def remove_user(self, username):
+        """Forget a deleted user and their watchlist."""
+        with self._lock:
+            if self.users.pop(username, None) is None:
+                return
+            entries = self.watchlists.pop(username, {})
+            self._resize(len(entries), 0)
+            for show_id, watched in entries.items():
+                self._unsave(show_id, watched)
+
+    def rename_user(self, old_username, new_username):
+        """Move a renamed user's records to the new name."""
+        with self._lock:
+            if old_username in self.users:
+                self.users[new_username] = self.users.pop(old_username)
+            if old_username in self.watchlists:
+                self.watchlists[new_username] = self.watchlists.pop(
+                    old_username
+                )
+
+    def add_entry(self, username, show_id, watched=False):
+        """Record that ``username`` saved ``show_id``."""
+        show_id = str(show_id)
+        with self._lock:
+            entries = self.watchlists.setdefault(username, {})
+            if show_id in entries:
+                return
+            entries[show_id] = bool(watched)
+            self._resize(len(entries) - 1, len(entries))
+            self.saves[show_id] += 1
+            self.watched += bool(watched)
+
+    def remove_entry(self, username, show_id):
+        """Record that ``username`` removed ``show_id``."""
+        show_id = str(show_id)
+        with self._lock:
+            entries = self.watchlists.get(username, {})
+            if show_id not in entries:
+                return
+            self._unsave(show_id, entries.pop(show_id))
+            self._resize(len(entries) + 1, len(entries))
+            if not entries:
+                del self.watchlists[username]
+
+    def set_watched(self, username, show_id, watched):
+        """Record a change to an entry's watched status."""
+        show_id = str(show_id)
+        with self._lock:
+            entries = self.watchlists.get(username, {})
+            if show_id in entries and entries[show_id] != bool(watched):
+                entries[show_id] = bool(watched)
+                self.watched += 1 if watched else -1
+
+    def _resize(self, old_size, new_size):
+        """Move a user between watchlist sizes (lock held)."""
+        if old_size:
+            self.sizes[old_size] -= 1
+            if self.sizes[old_size] <= 0:
+                del self.sizes[old_size]
+        if new_size:
+            self.sizes[new_size] += 1
+
+    def _unsave(self, show_id, watched):
+        """Take one save of ``show_id`` off the totals (lock held)."""
+        self.saves[show_id] -= 1
+        if self.saves[show_id] <= 0:
+            del self.saves[show_id]
+        self.watched -= bool(watched)
+
+    def _size_distribution(self):
+        """Number of users per watchlist size bucket (lock held)."""
+        without = max(0, len(self.users) - sum(self.sizes.values()))
+        buckets = Counter({"0": without})
+        for size, users in self.sizes.items():
+            label = next(
+                label
+                for largest, label in SIZE_BUCKETS
+                if largest is None or size <= largest
+            )
+            buckets[label] += users
+        return dict(buckets)
+
+    def summary(self, days=ADMIN_STATS_DAYS, top=10):
+        """Return the dashboard statistics as a JSON-ready dict."""
+        today = datetime.date.today()
+        snapshot = get_catalog_snapshot()
+        titles = snapshot.get if snapshot is not None else lambda _: None
+        with self._lock:
+            entries = sum(self.saves.values())
+            most_saved = self.saves.most_common(top)
+            summary = {
+                "users": {
+                    "total": len(self.users),
+                    "admins": sum(self.users.values()),
+                    "with_watchlist": len(self.watchlists),
+                },
+                "signups_per_day": (
+                    {
+                        day: self.signups.get(day, 0)
+                        for day in (
+                            (today - datetime.timedelta(days=n)).isoformat()
+                            for n in range(days - 1, -1, -1)
+                        )
+                    }
+                    if self.with_signups
+                    else None
+                ),
+                "watchlists": {
+                    "entries": entries,
+                    "average_size": (
+                        round(entries / len(self.watchlists), 2)
+                        if self.watchlists
+                        else 0
+                    ),
+                    "size_distribution": self._size_distribution(),
+                },
+                "watched_ratio": (
+                    round(self.watched / entries, 3) if entries else 0
+                ),
+                "built_at": self.built_at,
+            }
+        summary["most_saved"] = [
+            {
+                "showId": show_id,
+                "title": (titles(show_id) or {}).get("title"),
+                "saves": saves,
+            }
+            for show_id, saves in most_saved
+        ]
+        return summary
+
+
+def _build_admin_stats():
+    """Build the statistics in one pass over profiles and watchlists."""
+    try:
+        profiles = list(
+            scan_table("profiles", "username, is_admin, created_at", ("id",))
+        )
+        with_signups = True
+    except APIError as e:
+        logger.warning(f"Building admin statistics without sign-ups: {e}")
+        profiles = scan_table("profiles", "username, is_admin", ("id",))
+        with_signups = False
+    stats = AdminStats(
+        profiles,
+        (
+            row
+            for row in scan_table(
+                "watchlist",
+                "username, showId, watched",
+                ("username", "showId"),
+            )
+            if row.get("username") and row.get("showId") is not None
+        ),
+        with_signups,
+    )
+    logger.info(
+        f"Admin statistics built: {len(stats.users)} users, "
+        f"{sum(stats.saves.values())} watchlist entries"
+    )
+    return stats
+
+
+admin_stats = RefreshingValue(
+    _build_admin_stats,
+    ttl=ADMIN_STATS_SYNC_INTERVAL,
+    name="admin statistics",
+)
+
+
+def _update(method, *args):
+    """Apply a change to the statistics if they have been built."""
+    stats = admin_stats.peek()
+    if stats is not None:
+        getattr(stats, method)(*args)
+
+
+def track_signup(username, is_admin=False):
+    """Count a user who just registered."""
+    _update("add_user", username, is_admin)
+
+
+def track_user_deleted(username):
+    """Drop a deleted user and their watchlist from the counts."""
+    _update("remove_user", username)
+
+
+def track_user_renamed(old_username, new_username):
+    """Follow a username change."""
+    _update("rename_user", old_username, new_username)
+
+
+@on_watchlist_change
+def _track_watchlist_change(username, show_id, action):
+    """Apply a watchlist change to the statistics."""
+    if action == "add":
+        _update("add_entry", username, show_id)
+    elif action == "remove":
+        _update("remove_entry", username, show_id)
+    else:
+        _update("set_watched", username, show_id, action == "watched")
@@ -0,0 +1,218 @@
+"""Asynchronous client for the watchlist backend.
+
+``AsyncWatchlistService`` has the same methods as ``WatchlistService`` but
+awaits a shared ``httpx.AsyncClient`` instead of blocking a worker thread
+per call. It runs on an event loop in a background thread, and
+``SyncWatchlistService`` wraps it so the Flask views can keep calling it
+synchronously. Each view makes one watchlist call at a time, so what the
+async client changes is the transport: one pooled client on one loop
+instead of a blocking request per call.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+
+import httpx
+
+from .metrics import server_error, upstream_call
+from .upstream import (
+    UPSTREAM_CONNECT_TIMEOUT,
+    UPSTREAM_POOL_MAXSIZE,
+    UPSTREAM_READ_TIMEOUT,
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Get configuration from environment
+WATCHLIST_BACKEND_URL = os.environ.get("WATCHLIST_BACKEND_URL")
+
+
+class BackgroundEventLoop:
+    """An asyncio event loop running in a daemon thread.
+
+    The loop is started lazily and re-created after a fork, like the
+    shared ``upstream`` session.
+    """
+
+    def __init__(self, name="async-loop"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop = None
+        self._pid = None
+
+    def loop(self):
+        """Return the running loop for this process, starting it if needed."""
+        pid = os.getpid()
+        if self._loop is None or self._pid != pid:
+            with self._lock:
+                if self._loop is None or self._pid != pid:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(
+                        target=loop.run_forever, name=self.name, daemon=True
+                    ).start()
+                    self._loop = loop
+                    self._pid = pid
+        return self._loop
+
+    def run(self, coro, timeout=None):
+        """Run ``coro`` on the loop and wait for its result."""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop())
+        return future.result(timeout)
+
+
+class AsyncWatchlistService:
+    """Watchlist backend client built on a shared ``httpx.AsyncClient``.
+
+    Errors are logged and turned into the same fallback values that
+    ``WatchlistService`` returns. The client must only be used from one
+    event loop, which ``SyncWatchlistService`` guarantees.
+    """
+
+    def __init__(self, base_url=None, transport=None):
+        self.base_url = base_url or WATCHLIST_BACKEND_URL
+        self.transport = transport
+        self._client = None
+        self._pid = None
+
+    def _get_client(self):
+        """Return the async client for this process, creating it if needed."""
+        if self._client is None or self._pid != os.getpid():
+            self._client = httpx.AsyncClient(
+                transport=self.transport,
+                timeout=httpx.Timeout(
+                    UPSTREAM_READ_TIMEOUT, connect=UPSTREAM_CONNECT_TIMEOUT
+                ),
+                limits=httpx.Limits(
+                    max_connections=UPSTREAM_POOL_MAXSIZE,
+                    max_keepalive_connections=UPSTREAM_POOL_MAXSIZE,
+                ),
+            )
+            self._pid = os.getpid()
+        return self._client
+
+    async def _request(self, method, path, **kwargs):
+        """Send a request to the watchlist backend and return its JSON."""
+        with upstream_call("watchlist_api") as fail:
+            response = await self._get_client().request(
+                method, f"{self.base_url}{path}", **kwargs
+            )
+            error = server_error(response.status_code)
+            if error:
+                fail(error)
+        response.raise_for_status()
+        return response.json() if response.content else None
+
+    async def get_watchlist(self, username):
+        """Get all entries in a user's watchlist."""
+        try:
+            data = await self._request("GET", f"/watchlist/{username}")
+        except Exception as e:
+            logger.error(f"Error fetching watchlist for {username}: {e}")
+            return []
+        if not isinstance(data, dict) or "entries" not in data:
+            logger.error("Unexpected response structure", extra={"data": data})
+            return []
+        return data["entries"]
+
+    async def _mutate(self, method, path, payload, action):
+        """Send a watchlist write; returns False (and logs) on failure."""
+        try:
+            await self._request(method, path, json=payload)
+        except Exception as e:
+            logger.error(f"Error {action}: {e}")
+            return False
+        return True
+
+    async def add_to_watchlist(self, username, show_id):
+        """Add a movie to the user's watchlist."""
+        return await self._mutate(
+            "POST",
+            "/watchlist",
+            {"username": username, "showId": str(show_id)},
+            "adding to watchlist",
+        )
+
+    async def remove_from_watchlist(self, username, show_id):
+        """Remove a movie from the user's watchlist."""
+        return await self._mutate(
+            "DELETE",
+            "/watchlist",
+            {"username": username, "showId": str(show_id)},
+            "removing from watchlist",
+        )
+
+    async def update_watched_status(self, username, show_id, watched):
+        """Update the watched status of a movie in the watchlist."""
+        return await self._mutate(
+            "PUT",
+            "/watchlist/status",
+            {"username": username, "showId": str(show_id), "watched": watched},
+            "updating watched status",
+        )
+
+    async def check_watchlist_status(self, username, show_id):
+        """Check if a movie is in the user's watchlist and its status."""
+        try:
+            return await self._request(
+                "GET", f"/watchlist/status/{username}/{show_id}"
+            )
+        except Exception as e:
+            logger.error(f"Error checking watchlist status: {e}")
+            return {"in_watchlist": False}
+
+    async def batch_check_watchlist_status(self, username, show_ids):
+        """Check watchlist status for multiple movies at once."""
+        try:
+            return await self._request(
+                "POST",
+                "/watchlist/batch",
+                json={
+                    "username": username,
+                    "showIds": [str(show_id) for show_id in show_ids],
+                },
+            )
+        except Exception as e:
+            logger.error(f"Error checking batch watchlist status: {e}")
+            unknown = {"in_watchlist": False, "watched": False}
+            return {show_id: dict(unknown) for show_id in show_ids}
+
+
+class SyncWatchlistService:
+    """Blocking facade over ``AsyncWatchlistService``.
+
+    Each method runs the async call on the background loop and waits for
+    it, so it can replace ``WatchlistService`` unchanged.
+    """
+
+    def __init__(self, service=None, loop=None):
+        self.service = service or AsyncWatchlistService()
+        self.loop = loop or BackgroundEventLoop("watchlist-async")
+
+    def get_watchlist(self, username):
+        return self.loop.run(self.service.get_watchlist(username))
+
+    def add_to_watchlist(self, username, show_id):
+        return self.loop.run(self.service.add_to_watchlist(username, show_id))
+
+    def remove_from_watchlist(self, username, show_id):
+        return self.loop.run(
+            self.service.remove_from_watchlist(username, show_id)
+        )
+
+    def update_watched_status(self, username, show_id, watched):
+        return self.loop.run(
+            self.service.update_watched_status(username, show_id, watched)
+        )
+
+    def check_watchlist_status(self, username, show_id):
+        return self.loop.run(
+            self.service.check_watchlist_status(username, show_id)
+        )
+
+    def batch_check_watchlist_status(self, username, show_ids):
+        return self.loop.run(
+            self.service.batch_check_watchlist_status(username, show_ids)
+        )
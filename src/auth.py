@@ -3,6 +3,7 @@
 import re
 from flask import (
     Blueprint,
+    jsonify,
     render_template,
     request,
     redirect,
@@ -10,8 +11,15 @@ from flask import (
     session,
     current_app,
 )
-import bcrypt
+from .admin_stats import track_signup
 from .database import supabase
+from .passwords import PasswordHashingBusy, password_hasher
+from .sessions import start_session
+from .usernames import (
+    is_unique_violation,
+    track_username_added,
+    username_exists,
+)
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -29,6 +37,49 @@ def is_valid_password(password):
     return None
 
 
+def validate_registration(username, password):
+    """Return an error message for an invalid registration, or None."""
+    if not username or not password:
+        return "Username and password are required"
+
+    # Check if username already exists
+    if username_exists(username):
+        return "Username already exists"
+
+    # Validate password
+    return is_valid_password(password)
+
+
+def hashing_busy_response(template, busy):
+    """Render ``template`` with a 503 telling the client when to retry."""
+    error = (
+        "The server is busy right now. "
+        f"Please try again in {busy.retry_after} seconds."
+    )
+    return (
+        render_template(template, show_navbar=False, error=error),
+        503,
+        {"Retry-After": str(busy.retry_after)},
+    )
+
+
+def upgrade_password_hash(user_data, password):
+    """
+    Re-hash a just-verified password whose stored hash uses a different
+    work factor. Failures are only logged; the next login tries again.
+    """
+    if not password_hasher.needs_rehash(user_data["password"]):
+        return
+    try:
+        supabase.table("profiles").update(
+            {"password": password_hasher.hash(password)}
+        ).eq("id", user_data["id"]).execute()
+    except Exception as e:
+        current_app.logger.warning(
+            f"Could not upgrade password hash for {user_data['username']}: {e}"
+        )
+
+
 @auth_bp.route("/login", methods=["GET", "POST"])
 def login():
     """Handle user login."""
@@ -47,23 +98,16 @@ def login():
                 .execute()
             )
 
-            if not user_response.data:
-                return render_template(
-                    "login.html",
-                    show_navbar=False,
-                    error="Invalid credentials",
-                )
-
-            user_data = user_response.data[0]
+            user_data = user_response.data[0] if user_response.data else None
 
             # Verify password
-            if bcrypt.checkpw(
-                password.encode("utf-8"), user_data["password"].encode("utf-8")
+            if user_data and password_hasher.verify(
+                password, user_data["password"]
             ):
-                # Store user info in session
-                session["user_id"] = user_data["id"]
-                session["username"] = user_data["username"]
-                session["is_admin"] = user_data.get("is_admin", False)
+                upgrade_password_hash(user_data, password)
+
+                # Store user info and profile snapshot in session
+                start_session(user_data)
 
                 # Redirect based on user type
                 if user_data.get("is_admin"):
@@ -71,13 +115,15 @@ def login():
 
                 # Redirect to the same search endpoint that's working in the navbar
                 return redirect(url_for("search.index"))
-            else:
-                return render_template(
-                    "login.html",
-                    show_navbar=False,
-                    error="Invalid credentials",
-                )
 
+            return render_template(
+                "login.html",
+                show_navbar=False,
+                error="Invalid credentials",
+            )
+
+        except PasswordHashingBusy as e:
+            return hashing_busy_response("login.html", e)
         except Exception as e:
             current_app.logger.error(f"Login error: {e}")
             return render_template(
@@ -101,48 +147,34 @@ def register():
             username = request.form["username"]
             password = request.form["password"]
 
-            if not username or not password:
-                return render_template(
-                    "register.html",
-                    show_navbar=False,
-                    error="Username and password are required",
-                )
-
-            # Check if username already exists
-            existing_user = (
-                supabase.table("profiles")
-                .select("username")
-                .eq("username", username)
-                .execute()
-            )
-            if existing_user.data:
+            registration_error = validate_registration(username, password)
+            if registration_error:
                 return render_template(
                     "register.html",
                     show_navbar=False,
-                    error="Username already exists",
+                    error=registration_error,
                 )
 
-            # Validate password
-            password_error = is_valid_password(password)
-            if password_error:
-                return render_template(
-                    "register.html",
-                    show_navbar=False,
-                    error=password_error,
-                )
-
-            # Hash the password
-            salt = bcrypt.gensalt()
-            hashed_password = bcrypt.hashpw(password.encode("utf-8"), salt)
-
             # Create profile entry
             profile_data = {
                 "username": username,
-                "password": hashed_password.decode("utf-8"),
+                "password": password_hasher.hash(password),
                 "is_admin": False,
             }
 
-            supabase.table("profiles").insert(profile_data).execute()
+            try:
+                supabase.table("profiles").insert(profile_data).execute()
+            except Exception as e:
+                # Taken through another worker since the index last synced
+                if not is_unique_violation(e):
+                    raise
+                return render_template(
+                    "register.html",
+                    show_navbar=False,
+                    error="Username already exists",
+                )
+            track_signup(username)
+            track_username_added(username)
 
             return redirect(
                 url_for(
@@ -151,6 +183,8 @@ def register():
                 )
             )
 
+        except PasswordHashingBusy as e:
+            return hashing_busy_response("register.html", e)
         except Exception as e:
             print(f"Registration error: {e}")
             error_message = str(e)
@@ -162,3 +196,14 @@ def register():
         "register.html",
         show_navbar=False,
     )
+
+
+@auth_bp.route("/api/username-available")
+def username_available():
+    """Tell the registration form whether a username is free."""
+    username = request.args.get("username", "")
+    if not username:
+        return jsonify({"error": "username is required"}), 400
+    return jsonify(
+        {"username": username, "available": not username_exists(username)}
+    )
@@ -0,0 +1,232 @@
+"""In-process caching helpers shared by the data access modules."""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class RefreshingValue:  # pylint: disable=too-many-instance-attributes
+    """A value built by ``loader`` once and served from memory.
+
+    Once the value is older than ``ttl`` seconds it is still returned, but a
+    background thread rebuilds it. If the loader raises, the last good
+    snapshot keeps being served; before the first successful load the
+    ``default`` is returned and loading is retried at most every
+    ``retry_interval`` seconds.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self, loader, ttl, default=None, name=None, retry_interval=30
+    ):
+        self.loader = loader
+        self.ttl = ttl
+        self.default = default
+        self.name = name or getattr(loader, "__name__", "value")
+        self.retry_interval = retry_interval
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded_at = None
+        self._last_attempt = None
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+
+    def get(self):
+        """Return the current snapshot, loading or refreshing as needed."""
+        if self._loaded_at is None:
+            with self._lock:
+                if self._loaded_at is None and self._retry_due():
+                    self._load()
+            if self._loaded_at is None:
+                return self.default
+        elif (
+            time.monotonic() - self._loaded_at >= self.ttl
+            and self._retry_due()
+        ):
+            self._refresh_in_background()
+        return self._value
+
+    def peek(self):
+        """Return the current snapshot without ever blocking on a load.
+
+        Before the first successful load this starts one in the background
+        and returns the default.
+        """
+        if self._loaded_at is None:
+            if self._retry_due():
+                self._refresh_in_background()
+            return self.default
+        if (
+            time.monotonic() - self._loaded_at >= self.ttl
+            and self._retry_due()
+        ):
+            self._refresh_in_background()
+        return self._value
+
+    def refresh(self):
+        """Rebuild the value now. Returns True if the load succeeded."""
+        with self._lock:
+            return self._load()
+
+    def invalidate(self):
+        """Mark the snapshot stale and rebuild it in the background."""
+        if self._loaded_at is not None:
+            self._loaded_at = float("-inf")
+        self._last_attempt = None
+        self._refresh_in_background()
+
+    def age(self):
+        """Seconds since the last successful load, or None if never loaded."""
+        if self._loaded_at is None:
+            return None
+        return time.monotonic() - self._loaded_at
+
+    def _retry_due(self):
+        """Whether enough time has passed since the last failed load."""
+        return (
+            self._last_attempt is None
+            or time.monotonic() - self._last_attempt >= self.retry_interval
+        )
+
+    def _load(self):
+        """Call the loader, keeping the last good snapshot on failure."""
+        self._last_attempt = time.monotonic()
+        try:
+            value = self.loader()
+        except Exception as e:
+            logger.error(f"Error refreshing {self.name}: {e}")
+            return False
+        self._value = value
+        self._loaded_at = time.monotonic()
+        self._last_attempt = None
+        logger.info(f"Refreshed {self.name}")
+        return True
+
+    def _refresh_in_background(self):
+        """Start a refresh thread unless one is already running."""
+        with self._refresh_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(
+            target=run, name=f"refresh-{self.name}", daemon=True
+        ).start()
+
+
+class LRUCache:
+    """Thread-safe, size-bounded LRU cache with an optional TTL.
+
+    Entries older than ``ttl`` seconds are treated as missing, except that
+    ``lookup()`` keeps returning them as stale for a further ``stale_ttl``
+    seconds so callers can serve them while revalidating. When the cache
+    is full, the least recently used entry is evicted. Hit, miss, expiry
+    and eviction counts are kept for ``stats()``.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, stale_ttl=0, name="cache"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.name = name
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._counts = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+        }
+
+    def get(self, key, default=None):
+        """Return the fresh cached value for ``key``, or ``default``."""
+        value, fresh = self.lookup(key, allow_stale=False)
+        return value if fresh else default
+
+    def lookup(self, key, allow_stale=True):
+        """Return ``(value, fresh)`` for ``key``.
+
+        ``value`` is None on a miss. With ``allow_stale``, an entry past its
+        TTL but within the stale window is returned with ``fresh=False``.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counts["misses"] += 1
+                return None, False
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if self.ttl is None or age <= self.ttl:
+                self._entries.move_to_end(key)
+                self._counts["hits"] += 1
+                return value, True
+            if age > self.ttl + self.stale_ttl:
+                del self._entries[key]
+                self._counts["expired"] += 1
+            elif allow_stale:
+                self._entries.move_to_end(key)
+                self._counts["stale_hits"] += 1
+                return value, False
+            self._counts["misses"] += 1
+            return None, False
+
+    def contains(self, key):
+        """Whether a fresh entry exists, without touching counters or order."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (
+                self.ttl is None or time.monotonic() - entry[1] <= self.ttl
+            )
+
+    def pop(self, key):
+        """Remove and return the fresh value for ``key``, or None."""
+        value = self.get(key)
+        self.invalidate(key)
+        return value
+
+    def set(self, key, value):
+        """Store ``value`` under ``key``, evicting the oldest entry if full."""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._counts["evictions"] += 1
+
+    def invalidate(self, key):
+        """Drop ``key`` from the cache if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Return size, limits and hit/miss/eviction counters."""
+        with self._lock:
+            served = self._counts["hits"] + self._counts["stale_hits"]
+            lookups = served + self._counts["misses"]
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "stale_ttl": self.stale_ttl,
+                **self._counts,
+                "hit_ratio": round(served / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,139 @@
+"""In-memory replica of the movie catalog with secondary indexes.
+
+A ``CatalogSnapshot`` is an immutable copy of every title in the catalog,
+indexed by type, release year, category and title trigrams, so that
+search filters can be answered without calling the movie API.
+"""
+
+# Spellings of the TV Show type, all treated as the same type
+TV_TYPE_ALIASES = {"tv", "tv show", "tv_show", "tvshow", "series"}
+
+
+def type_key(value):
+    """Normalise a type value so that its spelling variants compare equal."""
+    value = str(value or "").strip().lower()
+    return "tv show" if value in TV_TYPE_ALIASES else value
+
+
+def split_categories(listed_in):
+    """Split a ``listedIn`` value (string or list) into category names."""
+    if isinstance(listed_in, list):
+        return [category.strip() for category in listed_in if category]
+    if isinstance(listed_in, str):
+        return [c.strip() for c in listed_in.split(",") if c.strip()]
+    return []
+
+
+def trigrams(text):
+    """Return the set of character trigrams in ``text``."""
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class CatalogSnapshot:
+    """Indexed, read-only copy of the movie catalog.
+
+    Filters follow the movie API's semantics: the title matches as a
+    case-insensitive substring, type and release year match exactly
+    (ignoring case and TV Show spelling variants), and a title matches a
+    list of categories if any of them appears in its ``listedIn``. Results
+    keep the order in which the catalog was synced.
+    """
+
+    def __init__(self, movies):
+        self.movies = list(movies)
+        self.by_id = {}
+        self.by_type = {}
+        self.by_year = {}
+        self.by_category = {}
+        self.by_trigram = {}
+        self._titles = []
+        for position, movie in enumerate(self.movies):
+            title = str(movie.get("title") or "").lower()
+            self._titles.append(title)
+            if movie.get("showId") is not None:
+                self.by_id[str(movie["showId"])] = position
+            self.by_type.setdefault(type_key(movie.get("type")), []).append(
+                position
+            )
+            self.by_year.setdefault(
+                str(movie.get("releaseYear") or ""), []
+            ).append(position)
+            for category in split_categories(movie.get("listedIn")):
+                self.by_category.setdefault(category.lower(), []).append(
+                    position
+                )
+            for trigram in trigrams(title):
+                self.by_trigram.setdefault(trigram, set()).add(position)
+
+    def __len__(self):
+        return len(self.movies)
+
+    def get(self, show_id):
+        """Return the movie with ``show_id``, or None."""
+        position = self.by_id.get(str(show_id))
+        return self.movies[position] if position is not None else None
+
+    def filter(self, params):
+        """Return the positions of titles matching the API ``params``."""
+        postings = []
+        if params.get("type"):
+            postings.append(self.by_type.get(type_key(params["type"]), ()))
+        if params.get("release_year"):
+            year = str(params["release_year"]).strip()
+            postings.append(self.by_year.get(year, ()))
+        categories = params.get("categories") or []
+        if isinstance(categories, str):
+            categories = categories.split(",")
+        categories = [c.strip().lower() for c in categories if c.strip()]
+        if categories:
+            postings.append(self._category_positions(categories))
+        title = str(params.get("title") or "").strip().lower()
+        postings.extend(
+            self.by_trigram.get(gram, ()) for gram in trigrams(title)
+        )
+
+        # Intersect the most selective postings first
+        candidates = None
+        for positions in sorted(postings, key=len):
+            if candidates is None:
+                candidates = set(positions)
+            else:
+                candidates.intersection_update(positions)
+            if not candidates:
+                return []
+        if title:
+            pool = (
+                range(len(self.movies)) if candidates is None else candidates
+            )
+            candidates = {i for i in pool if title in self._titles[i]}
+        if candidates is None:
+            return list(range(len(self.movies)))
+        return sorted(candidates)
+
+    def _category_positions(self, categories):
+        """Positions of titles with a category containing any of ``categories``."""
+        positions = set()
+        for name, category_postings in self.by_category.items():
+            if any(category in name for category in categories):
+                positions.update(category_postings)
+        return positions
+
+    def page(self, params):
+        """Answer a paginated movie API query from the snapshot.
+
+        Returns the same page dict shape as a movie API fetch, with
+        copies of the matching movies.
+        """
+        page = max(int(params.get("page", 1)), 1)
+        per_page = max(int(params.get("per_page", 10)), 1)
+        positions = self.filter(params)
+        start = (page - 1) * per_page
+        movies = [
+            dict(self.movies[i]) for i in positions[start : start + per_page]
+        ]
+        return {
+            "movies": movies,
+            "has_next": start + per_page < len(positions),
+            "total": len(positions),
+            "next_cursor": None,
+        }
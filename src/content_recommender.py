@@ -0,0 +1,229 @@
+"""Content-based recommendations computed locally from the catalog.
+
+Every title in the catalog replica is turned into a feature vector built
+from its categories (``listedIn``), type, release decade and a TF-IDF
+vector of its description. Vectors are L2-normalised, so a dot product is
+a cosine similarity, and the nearest neighbours of every title are
+precomputed once per catalog sync. Recommending for a watchlist then only
+sums the neighbour scores of the titles on it: no network calls, and every
+result is guaranteed to be in the catalog.
+"""
+
+import math
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+from .cache import RefreshingValue
+from .catalog import split_categories, type_key
+from .database import CATALOG_SYNC_INTERVAL, get_catalog_snapshot
+
+# Neighbours kept per title, and description terms kept in the vocabulary
+CONTENT_NEIGHBOURS = int(os.environ.get("CONTENT_NEIGHBOURS", 50))
+CONTENT_VOCAB_SIZE = int(os.environ.get("CONTENT_VOCAB_SIZE", 1000))
+
+# Share of the similarity contributed by each feature group
+FEATURE_WEIGHTS = {
+    "categories": 0.45,
+    "description": 0.35,
+    "type": 0.1,
+    "decade": 0.1,
+}
+
+STOP_WORDS = frozenset(
+    "and the for with from into that this his her their they them when "
+    "who what where while after before about but are was were has have "
+    "not all one two out own its than then must can will new life".split()
+)
+
+
+def tokenize(text):
+    """Lowercase words of three or more letters, minus stop words."""
+    return [
+        word
+        for word in re.findall(r"[a-z]{3,}", str(text or "").lower())
+        if word not in STOP_WORDS
+    ]
+
+
+def _one_hot(rows):
+    """Dense 0/1 matrix with a column per distinct value in ``rows``."""
+    values = sorted({value for row in rows for value in row if value})
+    vocabulary = {value: i for i, value in enumerate(values)}
+    matrix = np.zeros((len(rows), len(vocabulary)), dtype=np.float32)
+    for i, row in enumerate(rows):
+        for value in row:
+            column = vocabulary.get(value)
+            if column is not None:
+                matrix[i, column] = 1.0
+    return matrix
+
+
+def _tfidf(documents, vocab_size):
+    """Sublinear TF-IDF matrix over the ``vocab_size`` commonest terms."""
+    counts = [Counter(tokenize(doc)) for doc in documents]
+    document_frequency = Counter()
+    for doc_counts in counts:
+        document_frequency.update(doc_counts.keys())
+    # Terms in only one description say nothing about similarity
+    common = [
+        term
+        for term, df in document_frequency.most_common(vocab_size)
+        if df > 1
+    ]
+    vocabulary = {term: i for i, term in enumerate(common)}
+    n_docs = len(documents)
+    idf = np.array(
+        [
+            math.log((1 + n_docs) / (1 + document_frequency[term])) + 1
+            for term in common
+        ],
+        dtype=np.float32,
+    )
+    matrix = np.zeros((n_docs, len(vocabulary)), dtype=np.float32)
+    for i, doc_counts in enumerate(counts):
+        for term, count in doc_counts.items():
+            column = vocabulary.get(term)
+            if column is not None:
+                matrix[i, column] = 1 + math.log(count)
+    return matrix * idf
+
+
+def _normalise_rows(matrix):
+    """Scale each row to unit length (all-zero rows are left as they are)."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _decade(movie):
+    """Release decade of a title, e.g. "1990s", or None if unknown."""
+    try:
+        return f"{int(movie.get('releaseYear')) // 10 * 10}s"
+    except (TypeError, ValueError):
+        return None
+
+
+class ContentIndex:
+    """Feature vectors and precomputed nearest neighbours for a catalog."""
+
+    def __init__(self, snapshot, neighbours=CONTENT_NEIGHBOURS):
+        self.snapshot = snapshot
+        movies = snapshot.movies
+        groups = {
+            "categories": _one_hot(
+                [
+                    [c.lower() for c in split_categories(m.get("listedIn"))]
+                    for m in movies
+                ]
+            ),
+            "description": _tfidf(
+                [m.get("description") for m in movies], CONTENT_VOCAB_SIZE
+            ),
+            "type": _one_hot([[type_key(m.get("type"))] for m in movies]),
+            "decade": _one_hot([[_decade(m)] for m in movies]),
+        }
+        # Each group contributes its weight to the overall cosine similarity
+        self.vectors = _normalise_rows(
+            np.hstack(
+                [
+                    _normalise_rows(groups[name]) * math.sqrt(weight)
+                    for name, weight in FEATURE_WEIGHTS.items()
+                ]
+            )
+        )
+        self.neighbours, self.scores = self._nearest_neighbours(
+            min(neighbours, max(len(movies) - 1, 0))
+        )
+
+    def _nearest_neighbours(self, k, chunk_size=512):
+        """Top ``k`` most similar titles (excluding itself) for every title."""
+        n = len(self.vectors)
+        neighbours = np.zeros((n, k), dtype=np.int32)
+        scores = np.zeros((n, k), dtype=np.float32)
+        if k == 0:
+            return neighbours, scores
+        for start in range(0, n, chunk_size):
+            block = self.vectors[start : start + chunk_size] @ self.vectors.T
+            rows = np.arange(len(block))
+            block[rows, rows + start] = -np.inf  # never your own neighbour
+            top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(block, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            neighbours[start : start + len(block)] = np.take_along_axis(
+                top, order, axis=1
+            )
+            scores[start : start + len(block)] = np.take_along_axis(
+                top_scores, order, axis=1
+            )
+        return neighbours, scores
+
+    def similar(self, show_id, k=10):
+        """Return up to ``k`` ``(movie, score)`` pairs most like one title."""
+        position = self.snapshot.by_id.get(str(show_id))
+        if position is None:
+            return []
+        return [
+            (self.snapshot.movies[i], round(float(score), 3))
+            for i, score in zip(
+                self.neighbours[position][:k], self.scores[position][:k]
+            )
+        ]
+
+    def recommend(self, show_ids, k=3):
+        """
+        Return up to ``k`` ``(movie, score)`` pairs similar to ``show_ids``,
+        best first, never including the titles in ``show_ids`` themselves.
+        """
+        positions = [
+            self.snapshot.by_id[str(show_id)]
+            for show_id in show_ids
+            if str(show_id) in self.snapshot.by_id
+        ]
+        if not positions:
+            return []
+        totals = np.zeros(len(self.vectors), dtype=np.float32)
+        np.add.at(totals, self.neighbours[positions], self.scores[positions])
+        totals[positions] = 0.0
+        candidates = np.flatnonzero(totals > 0)
+        best = candidates[np.argsort(-totals[candidates], kind="stable")][:k]
+        return [
+            (
+                self.snapshot.movies[i],
+                round(float(totals[i]) / len(positions), 3),
+            )
+            for i in best
+        ]
+
+
+def _build_content_index():
+    """Build the content index from the current catalog snapshot."""
+    snapshot = get_catalog_snapshot()
+    if snapshot is None:
+        raise RuntimeError("catalog replica is not loaded yet")
+    return ContentIndex(snapshot)
+
+
+content_index = RefreshingValue(
+    _build_content_index,
+    ttl=CATALOG_SYNC_INTERVAL,
+    name="content index",
+    retry_interval=5,
+)
+
+
+def get_content_index():
+    """
+    Return the content index for the current catalog, or None while it is
+    being built. Never blocks; the index is rebuilt in the background
+    whenever the catalog replica is re-synced.
+    """
+    snapshot = get_catalog_snapshot()
+    if snapshot is None:
+        return None
+    index = content_index.peek()
+    if index is not None and index.snapshot is not snapshot:
+        content_index.invalidate()
+    return index
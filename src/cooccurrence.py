@@ -0,0 +1,158 @@
+"""Item-to-item co-occurrence model over users' watchlists.
+
+"Users who saved X also saved Y": for every pair of titles we count how
+many users have both on their watchlist. The counts are built in one bulk
+pass over the Supabase ``watchlist`` table, kept up to date as watchlist
+changes go through the app, and rebuilt periodically to pick up changes
+made by other workers.
+"""
+
+import logging
+import math
+import os
+import threading
+from collections import Counter
+
+from .cache import RefreshingValue
+from .database import scan_table
+from .watchlist import on_watchlist_change
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Seconds between full rebuilds from the watchlist table
+COOCCURRENCE_SYNC_INTERVAL = float(
+    os.environ.get("COOCCURRENCE_SYNC_INTERVAL", 3600)
+)
+
+
+class CooccurrenceModel:
+    """Sparse, symmetric co-occurrence counts between titles.
+
+    ``pairs[x][y]`` is the number of users with both ``x`` and ``y`` on
+    their watchlist and ``savers[x]`` the number of users with ``x``.
+    Similarity is the cosine ``pairs[x][y] / sqrt(savers[x] * savers[y])``.
+    """
+
+    def __init__(self, entries=()):
+        self._lock = threading.Lock()
+        self.user_items = {}
+        self.pairs = {}
+        self.savers = Counter()
+        for username, show_id in entries:
+            self.add(username, show_id)
+
+    def add(self, username, show_id):
+        """Record that ``username`` saved ``show_id``."""
+        show_id = str(show_id)
+        with self._lock:
+            items = self.user_items.setdefault(username, set())
+            if show_id in items:
+                return
+            counts = self.pairs.setdefault(show_id, Counter())
+            for other in items:
+                counts[other] += 1
+                self.pairs.setdefault(other, Counter())[show_id] += 1
+            items.add(show_id)
+            self.savers[show_id] += 1
+
+    def remove(self, username, show_id):
+        """Record that ``username`` removed ``show_id``."""
+        show_id = str(show_id)
+        with self._lock:
+            items = self.user_items.get(username)
+            if not items or show_id not in items:
+                return
+            items.discard(show_id)
+            counts = self.pairs.get(show_id, Counter())
+            for other in items:
+                counts[other] -= 1
+                self.pairs[other][show_id] -= 1
+                if counts[other] <= 0:
+                    del counts[other]
+                    del self.pairs[other][show_id]
+            self.savers[show_id] -= 1
+            if self.savers[show_id] <= 0:
+                del self.savers[show_id]
+
+    def similar(self, show_id, k=10):
+        """Return up to ``k`` ``(showId, score)`` pairs saved alongside it."""
+        show_id = str(show_id)
+        with self._lock:
+            counts = self.pairs.get(show_id)
+            if not counts:
+                return []
+            scores = {
+                other: count
+                / math.sqrt(self.savers[show_id] * self.savers[other])
+                for other, count in counts.items()
+            }
+        return Counter(scores).most_common(k)
+
+    def recommend(self, show_ids, k=3):
+        """
+        Return up to ``k`` ``(showId, score)`` pairs most often saved
+        together with ``show_ids``, excluding those titles themselves.
+        """
+        saved = {str(show_id) for show_id in show_ids}
+        totals = Counter()
+        for show_id in saved:
+            for other, score in self.similar(show_id, k=None):
+                if other not in saved:
+                    totals[other] += score
+        return [
+            (show_id, round(score / len(saved), 3))
+            for show_id, score in totals.most_common(k)
+        ]
+
+    def stats(self):
+        """Return the size of the model."""
+        with self._lock:
+            return {
+                "users": len(self.user_items),
+                "titles": len(self.savers),
+                "pairs": sum(len(c) for c in self.pairs.values()) // 2,
+            }
+
+
+def _load_watchlist_entries():
+    """Yield ``(username, showId)`` for every row of the watchlist table."""
+    for row in scan_table(
+        "watchlist", "username, showId", ("username", "showId")
+    ):
+        if row.get("username") and row.get("showId") is not None:
+            yield row["username"], row["showId"]
+
+
+def _build_cooccurrence_model():
+    """Build the co-occurrence model in one pass over the watchlist table."""
+    model = CooccurrenceModel(_load_watchlist_entries())
+    logger.info(f"Co-occurrence model built: {model.stats()}")
+    return model
+
+
+cooccurrence_model = RefreshingValue(
+    _build_cooccurrence_model,
+    ttl=COOCCURRENCE_SYNC_INTERVAL,
+    name="co-occurrence model",
+)
+
+
+def get_cooccurrence_model():
+    """
+    Return the co-occurrence model, or None while it is being built. Never
+    blocks; the first call starts the build in the background.
+    """
+    return cooccurrence_model.peek()
+
+
+@on_watchlist_change
+def _track_watchlist_change(username, show_id, action):
+    """Apply a watchlist change to the model without a full rebuild."""
+    model = cooccurrence_model.peek()
+    if model is None:
+        return
+    if action == "add":
+        model.add(username, show_id)
+    elif action == "remove":
+        model.remove(username, show_id)
@@ -2,33 +2,127 @@
 
 import logging
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 import requests
 from flask import request
 from supabase import create_client, Client
+from .cache import LRUCache, RefreshingValue
+from .catalog import CatalogSnapshot
+from .metrics import instrument_httpx_client
+from .upstream import upstream
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Constants
-TIMEOUT_SECONDS = 10  # Add a reasonable timeout constant
-
 # Get configuration from environment
 MOVIE_BACKEND_URL = os.environ.get("MOVIE_BACKEND_URL")
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
 WATCHLIST_BACKEND_URL = os.environ.get("WATCHLIST_BACKEND_URL")
 
+# Spellings of the TV Show type the backend might use, most likely first
+TV_TYPE_VARIANTS = ["TV Show", "TV", "tv show", "tv_show", "tvshow", "series"]
+
+# Type spellings learned from the backend, shared by all requests
+_learned_type_values = {}
+_learned_type_values_lock = threading.Lock()
+# Whether a probe is running, and when the last one found no spelling
+_type_probe_state = {"probing": False, "failed_at": None}
+# Seconds to use the default spelling before probing again after a miss
+TV_TYPE_RETRY_INTERVAL = float(os.environ.get("TV_TYPE_RETRY_INTERVAL", 300))
+
+# Bulk movie detail fetch settings
+DETAIL_FETCH_CONCURRENCY = int(os.environ.get("DETAIL_FETCH_CONCURRENCY", 8))
+DETAIL_FETCH_DEADLINE_SECONDS = float(
+    os.environ.get("DETAIL_FETCH_DEADLINE_SECONDS", 5)
+)
+
+# Movie detail cache settings (catalog entries rarely change)
+MOVIE_DETAIL_CACHE_SIZE = int(os.environ.get("MOVIE_DETAIL_CACHE_SIZE", 5000))
+MOVIE_DETAIL_CACHE_TTL = int(os.environ.get("MOVIE_DETAIL_CACHE_TTL", 86400))
+
+# Pagination settings
+RESULTS_PER_PAGE = int(os.environ.get("RESULTS_PER_PAGE", 10))
+MAX_RESULTS_PER_PAGE = 50
+
+# Search results cache settings
+RESULTS_CACHE_SIZE = int(os.environ.get("RESULTS_CACHE_SIZE", 512))
+RESULTS_CACHE_TTL = int(os.environ.get("RESULTS_CACHE_TTL", 300))
+RESULTS_CACHE_STALE_TTL = int(os.environ.get("RESULTS_CACHE_STALE_TTL", 900))
+
+# Next-page prefetch settings
+PREFETCH_ENABLED = os.environ.get("PREFETCH_ENABLED", "true").lower() == "true"
+PREFETCH_CONCURRENCY = int(os.environ.get("PREFETCH_CONCURRENCY", 2))
+PREFETCH_CACHE_TTL = int(os.environ.get("PREFETCH_CACHE_TTL", 60))
+# Skip prefetching while this many upstream calls are already in flight
+PREFETCH_MAX_IN_FLIGHT = int(os.environ.get("PREFETCH_MAX_IN_FLIGHT", 4))
+
+# Local catalog replica settings
+CATALOG_REPLICA_ENABLED = (
+    os.environ.get("CATALOG_REPLICA_ENABLED", "false").lower() == "true"
+)
+CATALOG_SYNC_INTERVAL = int(os.environ.get("CATALOG_SYNC_INTERVAL", 3600))
+CATALOG_API_PAGE_SIZE = 100
+
+# Category index settings
+CATEGORY_INDEX_TTL = int(os.environ.get("CATEGORY_INDEX_TTL", 3600))
+
+# Rows per request when reading whole tables (the PostgREST row limit)
+SUPABASE_PAGE_SIZE = 1000
+
 logger.debug(f"MOVIE_BACKEND_URL: {MOVIE_BACKEND_URL}")
 logger.debug(f"WATCHLIST_BACKEND_URL: {WATCHLIST_BACKEND_URL}")
 
 # Initialize Supabase client
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+instrument_httpx_client(supabase.postgrest.session, "supabase")
+
+# Process-wide cache of movie details, keyed by showId
+movie_detail_cache = LRUCache(
+    maxsize=MOVIE_DETAIL_CACHE_SIZE,
+    ttl=MOVIE_DETAIL_CACHE_TTL,
+    name="movie details",
+)
+
+# Process-wide cache of catalog result pages, keyed by API parameters.
+# Watchlist flags are applied per user after lookup and never cached.
+results_cache = LRUCache(
+    maxsize=RESULTS_CACHE_SIZE,
+    ttl=RESULTS_CACHE_TTL,
+    stale_ttl=RESULTS_CACHE_STALE_TTL,
+    name="search results",
+)
+_results_refresh_executor = ThreadPoolExecutor(
+    max_workers=2, thread_name_prefix="results-refresh"
+)
+_refreshing_results = set()
+_refreshing_results_lock = threading.Lock()
+
+# Until the backend is seen to send its own pagination metadata, the next
+# page is fetched alongside each page to tell whether "Next" is needed,
+# and kept for the prefetcher
+_lookahead_executor = ThreadPoolExecutor(
+    max_workers=4, thread_name_prefix="lookahead"
+)
+_backend_pagination = {"reported": False}
+
+# Short-lived cache of next pages fetched ahead of the user clicking "Next"
+prefetch_cache = LRUCache(
+    maxsize=128, ttl=PREFETCH_CACHE_TTL, name="prefetched pages"
+)
+_prefetch_executor = ThreadPoolExecutor(
+    max_workers=PREFETCH_CONCURRENCY, thread_name_prefix="prefetch"
+)
+_prefetching = {}  # page key -> future of the prefetch in flight
+_prefetching_lock = threading.Lock()
 
 
 def get_movies():
     """Get all movies for initial loading."""
     try:
-        response = requests.get(MOVIE_BACKEND_URL, timeout=TIMEOUT_SECONDS)
+        response = upstream.get(MOVIE_BACKEND_URL)
         response.raise_for_status()
         return response.json().get("movies", [])
     except requests.RequestException as e:
@@ -36,9 +130,9 @@ def get_movies():
         return []
 
 
-def _build_movie_params(query_params, page):
+def _build_movie_params(query_params, page, per_page=RESULTS_PER_PAGE):
     """Build query parameters for the movies API request."""
-    params = {"page": page, "per_page": 10}  # Fixed value for results per page
+    params = {"page": page, "per_page": per_page}
     if query_params:
         # Log the raw query parameters for debugging
         logger.info(f"Raw query parameters: {query_params}")
@@ -103,101 +197,358 @@ def get_filtered_movies(query_params=None, username=None):
     """
     Fetches and filters movies based on search criteria.
     Marks watchlist status if username is provided.
-    Passes pagination parameters to the API so that only 10 movies are fetched at a time.
+    Passes pagination parameters to the API so that only one page of
+    movies is fetched at a time.
+
+    Returns a tuple ``(movies, pagination, error)`` where ``pagination``
+    holds ``page``, ``per_page``, ``has_next``, ``has_prev``, ``total``,
+    ``total_pages`` and ``next_cursor`` (the last three may be None).
     """
+    # Get pagination parameters and build query
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = min(
+        max(request.args.get("per_page", RESULTS_PER_PAGE, type=int), 1),
+        MAX_RESULTS_PER_PAGE,
+    )
     try:
-        # Get pagination parameters and build query
-        page = request.args.get("page", 1, type=int)
         # Log the incoming query parameters for debugging
         logger.info(f"Incoming query parameters: {query_params}")
-        # Make a copy of query_params to avoid modifying the original
-        if query_params:
-            modified_params = query_params.copy()
-            # Check if we're filtering for TV Shows (handle different variations)
-            tv_type_values = ["tv", "tv show", "tvshow"]
-            if (
-                modified_params.get("type")
-                and modified_params.get("type").lower() in tv_type_values
-            ):
-                logger.info(
-                    f"TV Show filter detected (value: {modified_params.get('type')})"
-                )
-                # Set the type to "TV Show" for consistency
-                modified_params["type"] = "TV Show"
-                # First attempt with the standard format
-                params = _build_movie_params(modified_params, page)
-                response = requests.get(
-                    MOVIE_BACKEND_URL, params=params, timeout=TIMEOUT_SECONDS
-                )
-                response.raise_for_status()
-                data = response.json()
-                movies = data.get("movies", [])
-                logger.info(f"TV Show query returned {len(movies)} results")
-                # If no results, try alternative formats
-                if len(movies) == 0:
-                    movies = _try_alternative_tv_formats(params)
-                # Process the movies we found (if any)
-                if movies:
-                    # Get watchlist status and process movies
-                    return _process_movies_with_watchlist(
-                        movies, username, page
-                    )
-        # If we're not filtering for TV Shows or if we didn't return early above
-        params = _build_movie_params(query_params, page)
-        # Fetch filtered movies
-        logger.info(
-            f"Sending request to {MOVIE_BACKEND_URL} with params: {params}"
-        )
-        try:
-            response = requests.get(
-                MOVIE_BACKEND_URL, params=params, timeout=TIMEOUT_SECONDS
-            )
-            response.raise_for_status()
-            data = response.json()
-            movies = data.get("movies", [])
-            # Log the number of movies returned
-            logger.info(f"Received {len(movies)} movies from API")
-            # Process movies with watchlist status
-            return _process_movies_with_watchlist(movies, username, page)
-        except requests.HTTPError as e:
-            logger.error(f"HTTP error fetching movies: {e}")
-            # Return empty results with error message
-            error_message = f"Error fetching movies: {e}"
-            return [], 1, False, False, error_message
+        params = _build_movie_params(query_params, page, per_page)
+        # Continue from a keyset cursor when the backend handed us one
+        if request.args.get("cursor"):
+            params["cursor"] = request.args["cursor"]
+        # Answer from the local catalog replica when it is enabled and ready
+        page_data = _get_local_movies_page(params)
+        if page_data is None:
+            # Use the TV Show spelling the backend is known to accept
+            if params.get("type") == "TV Show":
+                params["type"] = resolve_tv_type_value()
+            # Fetch filtered movies (shared catalog data, cached across users)
+            page_data = _get_movies_page(params)
+            if page_data["has_next"]:
+                _prefetch_next_page(params, page_data)
+        # Process movies with watchlist status
+        movies = _process_movies_with_watchlist(page_data["movies"], username)
+        return movies, _pagination(page, per_page, page_data), None
     except requests.RequestException as e:
         logger.error(f"Error fetching filtered movies: {e}")
         # Return empty results with error message
         error_message = f"Error fetching movies: {e}"
-        return [], 1, False, False, error_message
+        return [], _pagination(1, per_page), error_message
+
+
+def _pagination(page, per_page, page_data=None):
+    """Build the pagination details for a results page."""
+    page_data = page_data or {}
+    total = page_data.get("total")
+    return {
+        "page": page,
+        "per_page": per_page,
+        "has_next": page_data.get("has_next", False),
+        "has_prev": page > 1,
+        "total": total,
+        "total_pages": -(-total // per_page) if total is not None else None,
+        "next_cursor": page_data.get("next_cursor"),
+    }
+
+
+def _get_local_movies_page(params):
+    """Answer a movie query from the catalog replica, or None if unavailable."""
+    if not CATALOG_REPLICA_ENABLED or "cursor" in params:
+        return None
+    catalog = catalog_replica.peek()
+    if catalog is None:
+        return None
+    return catalog.page(params)
+
+
+def _results_cache_key(params):
+    """Turn the API parameters into a hashable, order-independent key."""
+    return tuple(
+        sorted(
+            (name, tuple(value) if isinstance(value, list) else str(value))
+            for name, value in params.items()
+        )
+    )
 
 
-def _try_alternative_tv_formats(params):
-    """Try alternative formats for TV Show type."""
-    # Try common alternative formats for "TV Show"
-    alternatives = ["TV", "tv show", "tv_show", "tvshow", "series"]
-    for alt in alternatives:
-        logger.info(f"Trying alternative TV Show format: '{alt}'")
-        alt_params = params.copy()
-        alt_params["type"] = alt
+def _request_movies(params):
+    """Send one movie listing request and return the decoded response."""
+    logger.info(
+        f"Sending request to {MOVIE_BACKEND_URL} with params: {params}"
+    )
+    response = upstream.get(MOVIE_BACKEND_URL, params=params)
+    response.raise_for_status()
+    return response.json()
+
+
+def _as_count(value):
+    """Parse a row count sent by the API, or None if it isn't one."""
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _next_page_params(params, page_data=None):
+    """Return the API parameters of the page after ``params``."""
+    next_params = {**params, "page": int(params["page"]) + 1}
+    if page_data and page_data.get("next_cursor"):
+        next_params["cursor"] = page_data["next_cursor"]
+    return next_params
+
+
+def _fetch_movies_page(params, lookahead=True):
+    """
+    Fetch one page of movies from the movie API.
+
+    Returns a dict with the normalised ``movies`` plus ``has_next``,
+    ``total`` and ``next_cursor``. ``has_next`` comes from the backend's
+    own pagination metadata when it sends any. Until it does, the next
+    page is requested alongside this one (with ``lookahead``) and kept in
+    the prefetch cache, so a full last page doesn't get a dead "Next"
+    link. Without ``lookahead``, ``has_next`` of a full page is None;
+    ``_prefetch_next_page`` settles it in the background.
+    """
+    per_page = int(params["per_page"])
+    next_page = None
+    if (
+        lookahead
+        and not _backend_pagination["reported"]
+        and "cursor" not in params
+    ):
+        next_page = _lookahead_executor.submit(
+            _fetch_movies_page, _next_page_params(params), False
+        )
+    data = _request_movies(params)
+    movies = [
+        _normalize_movie_fields(movie) for movie in data.get("movies", [])
+    ]
+    # Log the number of movies returned
+    logger.info(f"Received {len(movies)} movies from API")
+
+    total = _as_count(data.get("total", data.get("total_count")))
+    next_cursor = data.get("next_cursor") or None
+    has_more = data.get("has_more", data.get("has_next"))
+    if total is not None or next_cursor or isinstance(has_more, bool):
+        _backend_pagination["reported"] = True
+
+    if next_cursor:
+        has_next = True
+    elif isinstance(has_more, bool):
+        has_next = has_more
+    elif total is not None:
+        has_next = int(params["page"]) * per_page < total
+    elif len(movies) < per_page:
+        has_next = False
+    elif "cursor" in params:
+        has_next = True
+    else:
+        has_next = None
+    if next_page is not None:
+        next_key = _results_cache_key(_next_page_params(params))
+        if has_next is None:
+            try:
+                has_next = bool(next_page.result()["movies"])
+            except requests.RequestException as e:
+                logger.warning(f"Next page request failed: {e}")
+                has_next = True
+
+        def keep_for_prefetch(future):
+            if future.exception() is None and not prefetch_cache.contains(
+                next_key
+            ):
+                prefetch_cache.set(next_key, future.result())
+
+        next_page.add_done_callback(keep_for_prefetch)
+    return {
+        "movies": movies,
+        "has_next": has_next,
+        "total": total,
+        "next_cursor": next_cursor,
+    }
+
+
+def _has_next_page(params):
+    """
+    Tell whether the page after ``params`` has any rows, fetching it into
+    the prefetch cache unless it is already cached.
+    """
+    next_params = _next_page_params(params)
+    key = _results_cache_key(next_params)
+    next_page = results_cache.get(key) or prefetch_cache.get(key)
+    if next_page is None:
         try:
-            alt_response = requests.get(
-                MOVIE_BACKEND_URL, params=alt_params, timeout=TIMEOUT_SECONDS
-            )
-            alt_response.raise_for_status()
-            alt_data = alt_response.json()
-            alt_movies = alt_data.get("movies", [])
-            logger.info(
-                f"Alternative format '{alt}' returned {len(alt_movies)} results"
-            )
-            if len(alt_movies) > 0:
-                return alt_movies
+            next_page = _fetch_movies_page(next_params, lookahead=False)
         except requests.RequestException as e:
-            logger.error(f"Error with alternative format '{alt}': {e}")
-    # If no results found with any format
-    return []
+            logger.warning(f"Next page request failed: {e}")
+            return True
+        prefetch_cache.set(key, next_page)
+    return bool(next_page["movies"])
+
 
+def _wait_for_prefetch(key):
+    """Wait for the prefetch of ``key`` if one is in flight."""
+    with _prefetching_lock:
+        pending = _prefetching.get(key)
+    if pending is not None:
+        pending.result()
 
-def _process_movies_with_watchlist(movies, username, page):
+
+def _get_movies_page(params):
+    """
+    Return one page of movies, from the results cache when possible.
+    Stale pages are served as-is and refreshed in the background.
+    """
+    key = _results_cache_key(params)
+    page_data, fresh = results_cache.lookup(key)
+    if page_data is None:
+        # A prefetch already on its way is quicker than a new request
+        _wait_for_prefetch(key)
+        page_data = prefetch_cache.pop(key)
+        if page_data is None:
+            page_data = _fetch_movies_page(params)
+        results_cache.set(key, page_data)
+    elif not fresh:
+        _refresh_results_in_background(key, params)
+    if page_data["has_next"] is None:
+        page_data = {**page_data, "has_next": _has_next_page(params)}
+        results_cache.set(key, page_data)
+    return page_data
+
+
+def _refresh_results_in_background(key, params):
+    """Re-fetch a stale results page unless a refresh is already queued."""
+    with _refreshing_results_lock:
+        if key in _refreshing_results:
+            return
+        _refreshing_results.add(key)
+
+    def refresh():
+        try:
+            results_cache.set(key, _fetch_movies_page(params))
+        except requests.RequestException as e:
+            logger.error(f"Error refreshing cached results {params}: {e}")
+        finally:
+            with _refreshing_results_lock:
+                _refreshing_results.discard(key)
+
+    _results_refresh_executor.submit(refresh)
+
+
+def _prefetch_next_page(params, page_data):
+    """
+    Fetch the page after ``params`` in the background so that "Next"
+    renders without waiting on the movie API. If that page is already
+    prefetched but whether it has a next page of its own is unknown, that
+    is settled instead. Skipped when there is nothing to do, when all
+    prefetch slots are busy, or when the upstream client is under load.
+    """
+    if not PREFETCH_ENABLED:
+        return
+    next_params = _next_page_params(params, page_data)
+    key = _results_cache_key(next_params)
+    if results_cache.contains(key):
+        return
+    cached = prefetch_cache.get(key)
+    if cached is not None and cached.get("has_next") is not None:
+        return
+    if upstream.in_flight() >= PREFETCH_MAX_IN_FLIGHT:
+        logger.info("Skipping prefetch, upstream is busy")
+        return
+
+    def prefetch():
+        try:
+            if cached is None:
+                next_page = _fetch_movies_page(next_params)
+            else:
+                next_page = dict(cached, has_next=_has_next_page(next_params))
+            prefetch_cache.set(key, next_page)
+        except requests.RequestException as e:
+            logger.warning(f"Error prefetching page {next_params}: {e}")
+        finally:
+            with _prefetching_lock:
+                _prefetching.pop(key, None)
+
+    with _prefetching_lock:
+        if key in _prefetching or len(_prefetching) >= PREFETCH_CONCURRENCY:
+            return
+        _prefetching[key] = _prefetch_executor.submit(prefetch)
+
+
+def _type_value_has_rows(type_value):
+    """Check whether the backend returns any rows for a type value."""
+    response = upstream.get(
+        MOVIE_BACKEND_URL,
+        params={"type": type_value, "page": 1, "per_page": 1},
+    )
+    response.raise_for_status()
+    return bool(response.json().get("movies"))
+
+
+def _probe_tv_type_value():
+    """
+    Probe all candidate spellings concurrently and return the first one
+    (in order of preference) that matches any rows, or None.
+    """
+    executor = ThreadPoolExecutor(max_workers=len(TV_TYPE_VARIANTS))
+    futures = [
+        executor.submit(_type_value_has_rows, variant)
+        for variant in TV_TYPE_VARIANTS
+    ]
+    try:
+        for variant, future in zip(TV_TYPE_VARIANTS, futures):
+            try:
+                if future.result():
+                    return variant
+            except requests.RequestException as e:
+                logger.error(f"Error probing type value '{variant}': {e}")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return None
+
+
+def resolve_tv_type_value():
+    """
+    Return the spelling of the TV Show type that the backend accepts.
+    The spelling is probed for once and remembered for the life of the
+    process. Only one caller probes at a time, and the others use the
+    default spelling meanwhile; if nothing matches (or the backend is
+    down), the default is used for ``TV_TYPE_RETRY_INTERVAL`` seconds
+    before probing again.
+    """
+    learned = _learned_type_values.get("TV Show")
+    if learned:
+        return learned
+    with _learned_type_values_lock:
+        failed_at = _type_probe_state["failed_at"]
+        if _type_probe_state["probing"] or (
+            failed_at is not None
+            and time.monotonic() - failed_at < TV_TYPE_RETRY_INTERVAL
+        ):
+            return TV_TYPE_VARIANTS[0]
+        _type_probe_state["probing"] = True
+    variant = None
+    try:
+        variant = _probe_tv_type_value()
+    finally:
+        with _learned_type_values_lock:
+            _type_probe_state["probing"] = False
+            if variant is None:
+                _type_probe_state["failed_at"] = time.monotonic()
+            else:
+                _learned_type_values["TV Show"] = variant
+    if variant is None:
+        logger.warning(
+            "No TV Show type spelling matched; retrying in "
+            f"{TV_TYPE_RETRY_INTERVAL:.0f}s"
+        )
+        return TV_TYPE_VARIANTS[0]
+    logger.info(f"Backend TV Show type is '{variant}'")
+    return variant
+
+
+def _process_movies_with_watchlist(movies, username):
     """Process movies and add watchlist status."""
     # Get watchlist status for all movies if username provided
     watchlist_status = {}
@@ -207,70 +558,208 @@ def _process_movies_with_watchlist(movies, username, page):
             movie.get("show_id") or movie.get("showId") for movie in movies
         ]
         try:
-            watchlist_response = requests.post(
+            watchlist_response = upstream.post(
                 f"{WATCHLIST_BACKEND_URL}/watchlist/batch",
                 json={"username": username, "showIds": show_ids},
-                timeout=TIMEOUT_SECONDS,
             )
             watchlist_response.raise_for_status()
             watchlist_status = watchlist_response.json()
         except Exception as e:
             logger.error(f"Error checking watchlist status: {e}")
-    # Process each movie
+    # Process each movie, copying so cached pages are never modified
+    movies = [_normalize_movie_fields(dict(movie)) for movie in movies]
     for movie in movies:
-        movie = _normalize_movie_fields(movie)
         show_id = movie.get("showId")
         movie["in_watchlist"] = (
             watchlist_status.get(show_id, {}).get("in_watchlist", False)
             if username
             else False
         )
-    # Determine pagination flags
-    results_per_page = 10
-    has_next = len(movies) == results_per_page
-    has_prev = page > 1
-    return movies, page, has_next, has_prev, None
+    return movies
 
 
-def get_unique_categories():
-    """Get unique categories from movies table."""
-    try:
-        response = supabase.table("movies").select("listedIn").execute()
-        # Create a set to store unique categories
-        unique_categories = set()
+def scan_table(table, columns, order):
+    """
+    Yield every row of ``table`` (only ``columns``), a page at a time in
+    ``order`` so that the pages neither overlap nor skip rows.
+    """
+    start = 0
+    while True:
+        query = supabase.table(table).select(columns)
+        for column in order:
+            query = query.order(column)
+        rows = (
+            query.range(start, start + SUPABASE_PAGE_SIZE - 1).execute().data
+        )
+        yield from rows
+        if len(rows) < SUPABASE_PAGE_SIZE:
+            break
+        start += SUPABASE_PAGE_SIZE
+
+
+def _load_unique_categories():
+    """Build the sorted category list from the movies table.
+
+    Reads only the ``listedIn`` column, a page at a time so the whole
+    catalog is covered regardless of the PostgREST row limit.
+    """
+    unique_categories = set()
+    for movie in scan_table("movies", "listedIn", ("showId",)):
         # Parse through each movie's categories
-        for movie in response.data:
-            if movie.get("listedIn"):
-                # Split categories if it's a string containing multiple categories
-                if isinstance(movie["listedIn"], str):
-                    categories = movie["listedIn"].split(",")
-                    # Strip whitespace and add each category
-                    for category in categories:
-                        unique_categories.add(category.strip())
-                # If it's already a list, add each category
-                elif isinstance(movie["listedIn"], list):
-                    for category in movie["listedIn"]:
-                        unique_categories.add(category.strip())
-        # Convert set to sorted list and return
-        return sorted(list(unique_categories))
+        if movie.get("listedIn"):
+            # Split categories if it's a string containing multiple categories
+            if isinstance(movie["listedIn"], str):
+                categories = movie["listedIn"].split(",")
+                # Strip whitespace and add each category
+                for category in categories:
+                    unique_categories.add(category.strip())
+            # If it's already a list, add each category
+            elif isinstance(movie["listedIn"], list):
+                for category in movie["listedIn"]:
+                    unique_categories.add(category.strip())
+    # Convert set to sorted list and return
+    return sorted(unique_categories)
+
+
+# In-memory category index, rebuilt in the background every TTL
+category_index = RefreshingValue(
+    _load_unique_categories,
+    ttl=CATEGORY_INDEX_TTL,
+    default=[],
+    name="category index",
+)
+
+
+def _load_catalog():
+    """
+    Copy the full movie catalog into an indexed snapshot.
+    Reads the movies table a page at a time, falling back to paging
+    through the movie API's unfiltered listing if Supabase can't be read.
+    """
+    try:
+        movies = list(scan_table("movies", "*", ("showId",)))
     except Exception as e:
-        print(f"Error fetching categories: {e}")
-        return []
+        logger.warning(f"Reading catalog from the movie API instead: {e}")
+        movies = []
+        page = 1
+        while True:
+            batch = _request_movies(
+                {"page": page, "per_page": CATALOG_API_PAGE_SIZE}
+            ).get("movies", [])
+            movies.extend(batch)
+            if len(batch) < CATALOG_API_PAGE_SIZE:
+                break
+            page += 1
+    if not movies:
+        raise ValueError("No catalog data available")
+    return CatalogSnapshot(
+        _normalize_movie_fields(dict(movie)) for movie in movies
+    )
+
+
+# In-memory copy of the whole catalog, re-synced in the background
+catalog_replica = RefreshingValue(
+    _load_catalog,
+    ttl=CATALOG_SYNC_INTERVAL,
+    name="catalog replica",
+)
+
+
+def get_catalog_snapshot():
+    """
+    Return the local catalog snapshot, or None while it is still loading.
+    Never blocks; the first call starts the initial sync in the background.
+    """
+    return catalog_replica.peek()
+
+
+def get_unique_categories():
+    """Get unique categories from the in-memory category index."""
+    return list(category_index.get())
+
+
+def invalidate_categories():
+    """Force the category index to be rebuilt in the background."""
+    category_index.invalidate()
 
 
 def get_movie_details_by_id(movie_id):
-    """Get a specific movie by its ID."""
+    """Get a specific movie by its ID, using the movie detail cache."""
+    cached = movie_detail_cache.get(str(movie_id))
+    if cached is not None:
+        # Hand out a copy so callers can annotate it freely
+        return dict(cached)
+    return _fetch_movie_details(movie_id)
+
+
+def _fetch_movie_details(movie_id):
+    """Fetch a movie from the movie API and add it to the cache."""
     try:
-        response = requests.get(
-            f"{MOVIE_BACKEND_URL}/{movie_id}", timeout=TIMEOUT_SECONDS
-        )
+        response = upstream.get(f"{MOVIE_BACKEND_URL}/{movie_id}")
         response.raise_for_status()
-        return response.json()
+        movie = response.json()
+        if movie:
+            movie_detail_cache.set(str(movie_id), dict(movie))
+        return movie
     except requests.RequestException as e:
         logger.error(f"Error fetching movie {movie_id}: {e}")
         return None
 
 
+def get_movie_details_by_ids(movie_ids, max_workers=None, deadline=None):
+    """
+    Get several movies by ID concurrently.
+
+    At most ``max_workers`` requests run at once, and the whole batch is
+    given ``deadline`` seconds. Returns a tuple ``(movies, failed_ids)``
+    where ``movies`` lines up with ``movie_ids`` (None for any movie that
+    could not be fetched in time) and ``failed_ids`` lists those IDs.
+    """
+    max_workers = max_workers or DETAIL_FETCH_CONCURRENCY
+    deadline = DETAIL_FETCH_DEADLINE_SECONDS if deadline is None else deadline
+    movie_ids = [str(movie_id) for movie_id in movie_ids]
+    unique_ids = list(dict.fromkeys(movie_ids))
+    if not unique_ids:
+        return [], []
+    # Serve what we can from the cache and only fetch the rest
+    details = {}
+    for movie_id in unique_ids:
+        cached = movie_detail_cache.get(movie_id)
+        if cached is not None:
+            details[movie_id] = cached
+    missing_ids = [mid for mid in unique_ids if mid not in details]
+    if missing_ids:
+        executor = ThreadPoolExecutor(
+            max_workers=min(max_workers, len(missing_ids))
+        )
+        try:
+            futures = {
+                movie_id: executor.submit(_fetch_movie_details, movie_id)
+                for movie_id in missing_ids
+            }
+            wait(futures.values(), timeout=deadline)
+        finally:
+            # Don't hold the page up for requests that missed the deadline
+            executor.shutdown(wait=False, cancel_futures=True)
+        for movie_id, future in futures.items():
+            if future.done() and not future.cancelled():
+                details[movie_id] = future.result()
+    movies = []
+    failed_ids = []
+    for movie_id in movie_ids:
+        movie = details.get(movie_id)
+        # Give each position its own dict, since callers modify them
+        movies.append(dict(movie) if movie else None)
+        if not movie:
+            failed_ids.append(movie_id)
+    if failed_ids:
+        logger.warning(
+            f"Could not fetch {len(failed_ids)} of {len(movie_ids)} movies: "
+            f"{failed_ids}"
+        )
+    return movies, failed_ids
+
+
 def check_movie_exists_by_title(title, username=None):
     """
     Check if a movie exists in the database by title.
@@ -280,9 +769,7 @@ def check_movie_exists_by_title(title, username=None):
         # Build query params
         params = {"title": title, "per_page": 1}  # We only need one match
         # Fetch filtered movies
-        response = requests.get(
-            MOVIE_BACKEND_URL, params=params, timeout=TIMEOUT_SECONDS
-        )
+        response = upstream.get(MOVIE_BACKEND_URL, params=params)
         response.raise_for_status()
         data = response.json()
         movies = data.get("movies", [])
@@ -299,9 +786,8 @@ def check_movie_exists_by_title(title, username=None):
         # Check watchlist status if username is provided
         if username:
             try:
-                watchlist_response = requests.get(
-                    f"{WATCHLIST_BACKEND_URL}/watchlist/status/{username}/{movie['showId']}",
-                    timeout=TIMEOUT_SECONDS,
+                watchlist_response = upstream.get(
+                    f"{WATCHLIST_BACKEND_URL}/watchlist/status/{username}/{movie['showId']}"
                 )
                 watchlist_response.raise_for_status()
                 watchlist_status = watchlist_response.json()
@@ -322,20 +808,17 @@ def get_unique_types():
     try:
         # First try to get types directly from the API
         try:
-            response = requests.get(
-                f"{MOVIE_BACKEND_URL}/types", timeout=TIMEOUT_SECONDS
-            )
+            response = upstream.get(f"{MOVIE_BACKEND_URL}/types")
             if response.status_code == 200:
                 return response.json().get("types", [])
         except requests.RequestException as e:
             logger.warning(f"Could not fetch types from API: {e}")
         # If API doesn't support types endpoint, try to infer from data
-        response = requests.get(
+        response = upstream.get(
             MOVIE_BACKEND_URL,
             params={
                 "per_page": 1000
             },  # Get a large sample to find different types
-            timeout=TIMEOUT_SECONDS,
         )
         response.raise_for_status()
         data = response.json()
@@ -0,0 +1,286 @@
+"""Background jobs with a persistent local queue.
+
+``JobQueue`` keeps jobs in a SQLite file, so queued work survives a worker
+restart and is shared by all gunicorn workers on the machine: each worker
+runs a few threads that claim due jobs atomically. At most one pending job
+exists per ``(kind, key)``, so a burst of triggers for the same user runs
+once. ``ResultStore`` keeps job results in the same file, where any worker
+can read them, and ``RateLimiter`` smooths calls to rate-limited APIs.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# SQLite file shared by the job queue and result store
+JOB_QUEUE_PATH = os.environ.get(
+    "JOB_QUEUE_PATH",
+    os.path.join(tempfile.gettempdir(), "general-app-jobs.sqlite3"),
+)
+# Seconds a running job may take before another worker may claim it again
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", 300))
+
+
+@contextmanager
+def connect_sqlite(path):
+    """
+    Open an autocommit connection that waits for other writers instead of
+    failing, and close it afterwards.
+    """
+    connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+    try:
+        connection.execute("PRAGMA journal_mode=WAL")
+        yield connection
+    finally:
+        connection.close()
+
+
+class RateLimiter:
+    """Token bucket allowing ``rate`` calls per ``per`` seconds.
+
+    Up to ``burst`` calls may go through back to back; after that callers
+    wait for tokens to refill.
+    """
+
+    def __init__(self, rate, per=60.0, burst=None):
+        self.rate = rate
+        self.per = per
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """Add the tokens earned since the last update (lock held)."""
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity,
+            self._tokens + (now - self._updated_at) * self.rate / self.per,
+        )
+        self._updated_at = now
+
+    def available(self):
+        """Number of calls that could go through right now."""
+        with self._lock:
+            self._refill()
+            return int(self._tokens)
+
+    def acquire(self, timeout=None):
+        """Take a token, waiting up to ``timeout`` seconds (None = forever).
+
+        Returns False if no token became available in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) * self.per / self.rate
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+                if wait <= 0:
+                    return False
+            time.sleep(wait)
+
+
+class ResultStore:
+    """JSON values by key in a SQLite table, with their age."""
+
+    def __init__(self, table, path=JOB_QUEUE_PATH):
+        self.table = table
+        self.path = path
+        with connect_sqlite(self.path) as connection:
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL)"
+            )
+
+    def get(self, key):
+        """Return ``(value, age_in_seconds)``, or ``(None, None)``."""
+        with connect_sqlite(self.path) as connection:
+            row = connection.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None, None
+        return json.loads(row[0]), time.time() - row[1]
+
+    def set(self, key, value):
+        """Store ``value`` under ``key``, replacing any previous value."""
+        with connect_sqlite(self.path) as connection:
+            connection.execute(
+                f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time()),
+            )
+
+    def purge(self, max_age):
+        """Delete values older than ``max_age`` seconds."""
+        with connect_sqlite(self.path) as connection:
+            connection.execute(
+                f"DELETE FROM {self.table} WHERE created_at < ?",
+                (time.time() - max_age,),
+            )
+
+
+class JobQueue:  # pylint: disable=too-many-instance-attributes
+    """Persistent queue of ``(kind, key)`` jobs run by worker threads.
+
+    Handlers are registered per kind and called as ``handler(key)``. A job
+    whose handler raises is retried with a growing delay, up to
+    ``max_attempts`` times.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        path=JOB_QUEUE_PATH,
+        workers=2,
+        name="jobs",
+        max_attempts=3,
+        retry_delay=30,
+        poll_interval=1.0,
+    ):
+        self.path = path
+        self.workers = workers
+        self.name = name
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self.handlers = {}
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._counts = {"completed": 0, "failed": 0}
+        with connect_sqlite(self.path) as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "kind TEXT NOT NULL, key TEXT NOT NULL, "
+                "status TEXT NOT NULL DEFAULT 'pending', "
+                "run_after REAL NOT NULL, claimed_at REAL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT)"
+            )
+            connection.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS jobs_one_pending "
+                "ON jobs (kind, key) WHERE status = 'pending'"
+            )
+
+    def register(self, kind, handler):
+        """Run ``handler(key)`` for jobs of ``kind``."""
+        self.handlers[kind] = handler
+
+    def enqueue(self, kind, key, delay=0):
+        """
+        Queue a job to run in ``delay`` seconds. If the same job is already
+        pending it is left as it is, so repeated triggers run it once.
+        """
+        with connect_sqlite(self.path) as connection:
+            connection.execute(
+                "INSERT OR IGNORE INTO jobs (kind, key, run_after) "
+                "VALUES (?, ?, ?)",
+                (kind, str(key), time.time() + delay),
+            )
+        self.start()
+        self._wakeup.set()
+
+    def start(self):
+        """Start this process's worker threads if they are not running."""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            for number in range(self.workers):
+                threading.Thread(
+                    target=self._run,
+                    name=f"{self.name}-worker-{number}",
+                    daemon=True,
+                ).start()
+
+    def _run(self):
+        """Claim and run due jobs until the process exits."""
+        while True:
+            job = self._claim()
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self._execute(*job)
+
+    def _claim(self):
+        """Atomically mark the next due job as running and return it."""
+        now = time.time()
+        with connect_sqlite(self.path) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT id, kind, key, attempts FROM jobs "
+                "WHERE (status = 'pending' AND run_after <= ?) "
+                "OR (status = 'running' AND claimed_at < ?) "
+                "ORDER BY run_after LIMIT 1",
+                (now, now - JOB_LEASE_SECONDS),
+            ).fetchone()
+            if row is not None:
+                connection.execute(
+                    "UPDATE jobs SET status = 'running', claimed_at = ? "
+                    "WHERE id = ?",
+                    (now, row[0]),
+                )
+            connection.execute("COMMIT")
+        return row
+
+    def _execute(self, job_id, kind, key, attempts):
+        """Run one claimed job, then delete it or schedule a retry."""
+        handler = self.handlers.get(kind)
+        try:
+            if handler is None:
+                raise LookupError(f"no handler for {kind} jobs")
+            handler(key)
+        except Exception as e:
+            logger.error(f"{self.name}: {kind} job for {key} failed: {e}")
+            with self._lock:
+                self._counts["failed"] += 1
+            self._retry(job_id, attempts + 1, str(e))
+            return
+        with self._lock:
+            self._counts["completed"] += 1
+        with connect_sqlite(self.path) as connection:
+            connection.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def _retry(self, job_id, attempts, error):
+        """Put a failed job back in the queue, or drop it for good."""
+        with connect_sqlite(self.path) as connection:
+            if attempts >= self.max_attempts:
+                connection.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+                return
+            try:
+                connection.execute(
+                    "UPDATE jobs SET status = 'pending', run_after = ?, "
+                    "attempts = ?, last_error = ? WHERE id = ?",
+                    (
+                        time.time() + self.retry_delay * attempts,
+                        attempts,
+                        error,
+                        job_id,
+                    ),
+                )
+            except sqlite3.IntegrityError:
+                # A newer job for the same key is already waiting
+                connection.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def stats(self):
+        """Return queued job counts by status plus this process's counters."""
+        with connect_sqlite(self.path) as connection:
+            rows = connection.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        return {**dict(rows), **self._counts}
@@ -0,0 +1,425 @@
+"""Request and upstream metrics in the Prometheus text format.
+
+Each worker counts into plain dicts in memory, so recording a request or
+an upstream call costs a lock and a few additions. A daemon thread writes
+the worker's totals to a row of a SQLite file every
+``METRICS_FLUSH_INTERVAL`` seconds, and ``/metrics`` adds up the rows of
+all gunicorn workers on the machine. Rows of workers that have exited are
+folded into one ``retired`` row, so counters never go backwards when a
+worker is recycled; their in-flight gauges are dropped.
+"""
+
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import Response, g, request
+
+from .jobs import connect_sqlite
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# SQLite file the workers write their totals to
+METRICS_DB_PATH = os.environ.get(
+    "METRICS_DB_PATH",
+    os.path.join(tempfile.gettempdir(), "general-app-metrics.sqlite3"),
+)
+# Seconds between writes of a worker's totals
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 15))
+# Bearer token required to read /metrics (unset = no check)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Name -> (type, help, label names) of every metric
+METRICS = {
+    "http_requests_total": (
+        "counter",
+        "HTTP requests handled.",
+        ("endpoint", "method", "status"),
+    ),
+    "http_request_duration_seconds": (
+        "histogram",
+        "Time spent handling HTTP requests.",
+        ("endpoint", "method"),
+    ),
+    "http_requests_in_flight": (
+        "gauge",
+        "HTTP requests being handled.",
+        (),
+    ),
+    "upstream_request_duration_seconds": (
+        "histogram",
+        "Time spent in calls to upstream services.",
+        ("upstream",),
+    ),
+    "upstream_errors_total": (
+        "counter",
+        "Upstream calls that raised or returned a server error.",
+        ("upstream", "error"),
+    ),
+    "upstream_requests_in_flight": (
+        "gauge",
+        "Upstream calls in progress.",
+        ("upstream",),
+    ),
+}
+
+# Process key of the row holding the totals of exited workers
+RETIRED = "retired"
+
+
+def _empty_values():
+    """Return an empty ``{name: {label values: value}}`` dict."""
+    return {name: {} for name in METRICS}
+
+
+def merge_values(total, values, gauges=True):
+    """Add ``values`` into ``total`` in place and return ``total``.
+
+    Metrics no longer defined, and histograms recorded with other buckets,
+    are skipped.
+    """
+    for name, series in values.items():
+        if name not in METRICS:
+            continue
+        kind = METRICS[name][0]
+        if kind == "gauge" and not gauges:
+            continue
+        merged = total.setdefault(name, {})
+        for labels, value in series.items():
+            if kind != "histogram":
+                merged[labels] = merged.get(labels, 0) + value
+            elif len(value) == len(LATENCY_BUCKETS) + 2:
+                current = merged.get(labels) or [0] * len(value)
+                merged[labels] = [a + b for a, b in zip(current, value)]
+    return total
+
+
+def dump_values(values):
+    """Serialize metric values to JSON."""
+    return json.dumps(
+        {
+            name: [[list(labels), value] for labels, value in series.items()]
+            for name, series in values.items()
+        }
+    )
+
+
+def load_values(data):
+    """Parse metric values serialized by ``dump_values``."""
+    return {
+        name: {tuple(labels): value for labels, value in series}
+        for name, series in json.loads(data).items()
+    }
+
+
+def _pid_alive(pid):
+    """True if a process with this pid is running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Metrics:
+    """This worker's counters, gauges and histograms.
+
+    State is reset after a fork, so a registry imported before gunicorn
+    forks its workers only ever reports the worker's own numbers.
+    """
+
+    def __init__(
+        self, path=METRICS_DB_PATH, flush_interval=METRICS_FLUSH_INTERVAL
+    ):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._values = _empty_values()
+        self._pid = None
+        self._process = None
+        atexit.register(self._flush_at_exit)
+
+    def _series(self, name):
+        """Return this process's series of ``name`` (lock held)."""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._process = f"{self._pid}-{time.time_ns()}"
+            self._values = _empty_values()
+            threading.Thread(
+                target=self._flush_forever, name="metrics-flush", daemon=True
+            ).start()
+        return self._values[name]
+
+    def inc(self, name, labels=(), amount=1):
+        """Add ``amount`` to a counter or gauge."""
+        with self._lock:
+            series = self._series(name)
+            series[labels] = series.get(labels, 0) + amount
+
+    def observe(self, name, labels, seconds):
+        """Record a duration in a histogram."""
+        with self._lock:
+            series = self._series(name)
+            value = series.get(labels)
+            if value is None:
+                value = series[labels] = [0] * (len(LATENCY_BUCKETS) + 2)
+            value[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            value[-1] += seconds
+
+    def values(self):
+        """Return a copy of this worker's values."""
+        with self._lock:
+            if self._pid != os.getpid():
+                return _empty_values()
+            return merge_values(_empty_values(), self._values)
+
+    @contextmanager
+    def _connect(self):
+        """Open the metrics file, creating its table if needed."""
+        with connect_sqlite(self.path) as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS metrics ("
+                "process TEXT PRIMARY KEY, pid INTEGER, "
+                "updated_at REAL NOT NULL, data TEXT NOT NULL)"
+            )
+            yield connection
+
+    def flush(self):
+        """Write this worker's totals to the metrics file."""
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            process, pid = self._process, self._pid
+            data = dump_values(self._values)
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT INTO metrics (process, pid, updated_at, data) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(process) DO UPDATE SET "
+                "updated_at = excluded.updated_at, data = excluded.data",
+                (process, pid, time.time(), data),
+            )
+
+    def _flush_forever(self):
+        """Flush every ``flush_interval`` seconds (daemon thread)."""
+        pid = os.getpid()
+        while self._pid == pid:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not write metrics: {e}")
+
+    def _flush_at_exit(self):
+        """Write the final totals of a worker that is shutting down."""
+        try:
+            self.flush()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not write final metrics: {e}")
+
+    def collect(self):
+        """Return the values of all workers, added up.
+
+        Rows of exited workers are folded into the retired row first.
+        """
+        self.flush()
+        total = _empty_values()
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                rows = connection.execute(
+                    "SELECT process, pid, data FROM metrics"
+                ).fetchall()
+                retired = _empty_values()
+                exited = []
+                for process, pid, data in rows:
+                    values = load_values(data)
+                    if pid is None or not _pid_alive(pid):
+                        merge_values(retired, values, gauges=False)
+                        if process != RETIRED:
+                            exited.append(process)
+                    else:
+                        merge_values(total, values)
+                if exited:
+                    connection.executemany(
+                        "DELETE FROM metrics WHERE process = ?",
+                        [(process,) for process in exited],
+                    )
+                    connection.execute(
+                        "INSERT OR REPLACE INTO metrics "
+                        "(process, pid, updated_at, data) "
+                        "VALUES (?, NULL, ?, ?)",
+                        (RETIRED, time.time(), dump_values(retired)),
+                    )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return merge_values(total, retired)
+
+
+def _escape(value):
+    """Escape a label value for the text format."""
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def _labels(names, values, extra=()):
+    """Format ``{name="value",...}``, or nothing without labels."""
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return (
+        "{"
+        + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+        + "}"
+    )
+
+
+def _number(value):
+    """Format a sample value."""
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def render(values):
+    """Render metric values in the Prometheus text exposition format."""
+    lines = []
+    for name, (kind, help_text, label_names) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(values.get(name, {}).items()):
+            if kind != "histogram":
+                lines.append(
+                    f"{name}{_labels(label_names, labels)} {_number(value)}"
+                )
+                continue
+            cumulative = 0
+            bounds = [_number(bound) for bound in LATENCY_BUCKETS] + ["+Inf"]
+            for bound, count in zip(bounds, value):
+                cumulative += count
+                le = _labels(label_names, labels, [("le", bound)])
+                lines.append(f"{name}_bucket{le} {cumulative}")
+            suffix = _labels(label_names, labels)
+            lines.append(f"{name}_sum{suffix} {_number(value[-1])}")
+            lines.append(f"{name}_count{suffix} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+# Shared registry for this process
+metrics = Metrics()
+
+
+@contextmanager
+def upstream_call(upstream):
+    """
+    Time a call to ``upstream`` and count it as in flight while it runs.
+    An exception counts as an error; for failures that do not raise, call
+    the yielded function with an error name.
+    """
+    labels = (upstream,)
+    errors = []
+    metrics.inc("upstream_requests_in_flight", labels)
+    started = time.perf_counter()
+    try:
+        yield errors.append
+    except Exception as e:
+        errors.append(type(e).__name__)
+        raise
+    finally:
+        metrics.observe(
+            "upstream_request_duration_seconds",
+            labels,
+            time.perf_counter() - started,
+        )
+        metrics.inc("upstream_requests_in_flight", labels, -1)
+        if errors:
+            metrics.inc("upstream_errors_total", (upstream, errors[0]))
+
+
+def server_error(status_code):
+    """Return an error name for a 5xx status code, otherwise None."""
+    return f"http_{status_code}" if status_code >= 500 else None
+
+
+def instrument_httpx_client(client, upstream):
+    """Time every request ``client`` sends as a call to ``upstream``."""
+    send = client.send
+
+    def timed_send(*args, **kwargs):
+        with upstream_call(upstream) as fail:
+            response = send(*args, **kwargs)
+            error = server_error(response.status_code)
+            if error:
+                fail(error)
+            return response
+
+    client.send = timed_send
+    return client
+
+
+def _start_request():
+    """Count the request as in flight and note when it started."""
+    metrics.inc("http_requests_in_flight")
+    g.metrics_started = time.perf_counter()
+
+
+def _note_status(response):
+    """Remember the response status for ``_finish_request``."""
+    g.metrics_status = response.status_code
+    return response
+
+
+def _finish_request(_error):
+    """Record the request; one that never got a response counts as a 500."""
+    started = g.pop("metrics_started", None)
+    if started is None:
+        return
+    endpoint = request.endpoint or "unmatched"
+    status = g.pop("metrics_status", 500)
+    metrics.observe(
+        "http_request_duration_seconds",
+        (endpoint, request.method),
+        time.perf_counter() - started,
+    )
+    metrics.inc("http_requests_total", (endpoint, request.method, str(status)))
+    metrics.inc("http_requests_in_flight", amount=-1)
+
+
+def metrics_endpoint():
+    """Serve the metrics of all workers on this machine."""
+    if METRICS_TOKEN and request.headers.get("Authorization") != (
+        f"Bearer {METRICS_TOKEN}"
+    ):
+        return Response("Unauthorized\n", status=401, mimetype="text/plain")
+    try:
+        values = metrics.collect()
+    except sqlite3.Error as e:
+        logger.error(f"Could not read other workers' metrics: {e}")
+        values = metrics.values()
+    return Response(
+        render(values), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def init_metrics(app):
+    """Record every request to ``app`` and serve ``/metrics``."""
+    app.before_request(_start_request)
+    app.after_request(_note_status)
+    app.teardown_request(_finish_request)
+    app.add_url_rule("/metrics", "metrics", metrics_endpoint)
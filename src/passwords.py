@@ -0,0 +1,202 @@
+"""Password hashing off the request thread.
+
+bcrypt is deliberately slow, so hashing and verifying passwords inline
+would pin a gunicorn worker's CPU for every login. ``PasswordHasher`` runs
+them in a small per-process pool of helper processes instead, and refuses
+new work with ``PasswordHashingBusy`` once too many calls are waiting, so a
+login storm turns into quick 503 responses rather than a growing backlog.
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# bcrypt work factor for new hashes; older hashes are upgraded on login
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+# Helper processes per worker, and extra calls allowed to wait for them
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 1))
+PASSWORD_HASH_QUEUE = int(os.environ.get("PASSWORD_HASH_QUEUE", 4))
+# Seconds to wait for a single hash before giving up
+PASSWORD_HASH_TIMEOUT = float(os.environ.get("PASSWORD_HASH_TIMEOUT", 10))
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing queue is full; retry after a few seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"password hashing busy, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _hash_password(password, rounds):
+    """Hash ``password`` with a new salt (runs in a helper process)."""
+    salt = bcrypt.gensalt(rounds)
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+
+def _check_password(password, hashed):
+    """Check ``password`` against ``hashed`` (runs in a helper process)."""
+    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+
+def hash_rounds(hashed):
+    """Return the work factor of a bcrypt hash such as ``$2b$12$...``."""
+    try:
+        return int(hashed.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:  # pylint: disable=too-many-instance-attributes
+    """bcrypt hashing and verification in a bounded process pool.
+
+    At most ``workers + queue_size`` calls are in flight per worker
+    process. The pool is started lazily and re-created after a fork, like
+    the shared ``upstream`` session.
+    """
+
+    def __init__(
+        self,
+        rounds=BCRYPT_ROUNDS,
+        workers=PASSWORD_HASH_WORKERS,
+        queue_size=PASSWORD_HASH_QUEUE,
+        timeout=PASSWORD_HASH_TIMEOUT,
+    ):
+        self.rounds = rounds
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._in_flight = 0
+        self._average = 0.25
+        self._counts = {"hashed": 0, "verified": 0, "rejected": 0}
+
+    def _get_executor(self):
+        """Return the process pool for this process, creating it if needed."""
+        pid = os.getpid()
+        if self._executor is None or self._pid != pid:
+            # Spawn rather than fork: the app has threads of its own
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            self._pid = pid
+            # Calls on the old pool no longer hold slots; their callbacks
+            # see that the pool was replaced and leave the count alone
+            self._in_flight = 0
+        return self._executor
+
+    def _submit(self, fn, *args):
+        """
+        Start ``fn`` in the pool and return ``(executor, future)``, or
+        raise ``PasswordHashingBusy``.
+        """
+        with self._lock:
+            executor = self._get_executor()
+            if self._in_flight >= self.capacity:
+                self._counts["rejected"] += 1
+                raise PasswordHashingBusy(self.retry_after())
+            self._in_flight += 1
+        start = time.monotonic()
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            self._finished(executor, start)
+            raise
+        # Free the slot when the helper is done, not when the caller stops
+        # waiting, so a timed-out call still counts against the capacity
+        # until its helper is free again
+        future.add_done_callback(lambda _: self._finished(executor, start))
+        return executor, future
+
+    def _result(self, executor, future):
+        """Wait for a submitted call, restarting the pool if it broke."""
+        try:
+            return future.result(timeout=self.timeout)
+        except BrokenProcessPool:
+            # A helper died; start a fresh pool on the next call
+            logger.error("Password hashing pool broke, restarting it")
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            raise
+
+    def _call(self, fn, *args):
+        """Run ``fn`` in the pool, or raise ``PasswordHashingBusy``."""
+        return self._result(*self._submit(fn, *args))
+
+    def _finished(self, executor, start):
+        """
+        Release the in-flight slot taken on ``executor`` (unless that pool
+        has been replaced since) and update the average call time.
+        """
+        with self._lock:
+            if self._executor is executor:
+                self._in_flight -= 1
+            # Moving average of call time, used for Retry-After
+            elapsed = time.monotonic() - start
+            self._average = 0.8 * self._average + 0.2 * elapsed
+
+    def retry_after(self):
+        """Seconds a rejected caller should wait before trying again."""
+        return max(1, math.ceil(self._average * self.capacity / self.workers))
+
+    def hash(self, password):
+        """Return a new bcrypt hash of ``password`` as a string."""
+        hashed = self._call(_hash_password, password, self.rounds)
+        self._counts["hashed"] += 1
+        return hashed
+
+    def hash_many(self, passwords):
+        """
+        Return new hashes of ``passwords``, in order. Up to ``workers`` of
+        them are hashed at once, which keeps the pool busy while leaving
+        the queue to other callers.
+        """
+        pending = deque()
+        hashes = []
+        for password in passwords:
+            if len(pending) >= self.workers:
+                hashes.append(self._result(*pending.popleft()))
+            pending.append(self._submit(_hash_password, password, self.rounds))
+        hashes.extend(self._result(*call) for call in pending)
+        self._counts["hashed"] += len(hashes)
+        return hashes
+
+    def verify(self, password, hashed):
+        """Return True if ``password`` matches the stored ``hashed``."""
+        matches = self._call(_check_password, password, hashed)
+        self._counts["verified"] += 1
+        return matches
+
+    def needs_rehash(self, hashed):
+        """True if ``hashed`` was made with a different work factor."""
+        return hash_rounds(hashed) != self.rounds
+
+    def stats(self):
+        """Return pool size, in-flight calls and counters."""
+        with self._lock:
+            return {
+                "rounds": self.rounds,
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "in_flight": self._in_flight,
+                "average_seconds": round(self._average, 3),
+                **self._counts,
+            }
+
+
+password_hasher = PasswordHasher()
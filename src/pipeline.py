@@ -0,0 +1,98 @@
+"""Deadline-bounded request pipelines.
+
+A ``DeadlinePipeline`` runs the stages of one request against a single
+time budget. Each stage is given whatever budget is left; a stage that
+fails or runs out of time returns a fallback value (or the results that
+did arrive, for fan-out stages) instead of holding up the response, and
+the pipeline remembers that the result is partial. Per-stage timings are
+logged when the pipeline finishes.
+"""
+
+import logging
+import time
+from concurrent.futures import wait
+from contextlib import contextmanager
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class DeadlinePipeline:
+    """Run request stages on ``executor`` within ``budget`` seconds."""
+
+    def __init__(self, name, budget, executor):
+        self.name = name
+        self.executor = executor
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + budget
+        self.timings = {}
+        self.degraded = []
+
+    def remaining(self):
+        """Seconds left before the deadline (never negative)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @contextmanager
+    def stage(self, stage):
+        """Time a stage that runs inline and enforces the deadline itself."""
+        start = time.monotonic()
+        try:
+            yield self.remaining()
+        finally:
+            self.timings[stage] = time.monotonic() - start
+
+    def run(self, stage, fn, *args, default=None, **kwargs):
+        """Run ``fn`` in the executor; return ``default`` if it fails or
+        does not finish before the deadline."""
+        with self.stage(stage) as remaining:
+            if remaining <= 0:
+                self.degraded.append(stage)
+                return default
+            future = self.executor.submit(fn, *args, **kwargs)
+            try:
+                return future.result(timeout=remaining)
+            except Exception as e:
+                future.cancel()
+                self.degraded.append(stage)
+                logger.warning(
+                    f"{self.name}: stage {stage} gave up "
+                    f"({type(e).__name__}: {e})"
+                )
+                return default
+
+    def map(self, stage, fn, items, default=None):
+        """Run ``fn`` on each item concurrently, returning results in order.
+
+        Items that fail or are not finished by the deadline get
+        ``default``; calls that have not started yet are cancelled.
+        """
+        with self.stage(stage) as remaining:
+            futures = [self.executor.submit(fn, item) for item in items]
+            wait(futures, timeout=remaining)
+            results = []
+            for future in futures:
+                if future.done() and not future.cancelled():
+                    try:
+                        results.append(future.result())
+                        continue
+                    except Exception as e:
+                        logger.warning(f"{self.name}: {stage} failed: {e}")
+                else:
+                    future.cancel()
+                results.append(default)
+                if stage not in self.degraded:
+                    self.degraded.append(stage)
+            return results
+
+    def finish(self):
+        """Log the per-stage timings and return them in milliseconds."""
+        timings = {
+            stage: round(seconds * 1000, 1)
+            for stage, seconds in self.timings.items()
+        }
+        total = round((time.monotonic() - self.started_at) * 1000, 1)
+        summary = " ".join(f"{k}={v}ms" for k, v in timings.items())
+        if self.degraded:
+            summary += f" degraded={','.join(self.degraded)}"
+        logger.info(f"{self.name}: {summary} total={total}ms")
+        return timings
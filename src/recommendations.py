@@ -1,22 +1,99 @@
 """Blueprint for handling movie recommendations using the Generative AI API."""
 
+import copy
+import hashlib
 import json
+import logging
 import os
+import time
 from concurrent.futures import ThreadPoolExecutor
 
 from dotenv import load_dotenv
-from flask import Blueprint, render_template, session
+from flask import Blueprint, Response, session, stream_template
 from google import genai
 from google.genai import types
 
-from .database import check_movie_exists_by_title, get_movie_details_by_id
-from .watchlist import watchlist_service
+from .cache import LRUCache
+from .content_recommender import get_content_index
+from .cooccurrence import get_cooccurrence_model
+from .database import (
+    check_movie_exists_by_title,
+    get_catalog_snapshot,
+    get_movie_details_by_ids,
+)
+from .jobs import JobQueue, RateLimiter, ResultStore
+from .metrics import upstream_call
+from .pipeline import DeadlinePipeline
+from .title_index import get_title_index
+from .watchlist import current_watchlist, on_watchlist_change
 from .decorators import login_required
 
+# Set up logging
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+# "gemini" (default) or "local": where recommendations come from first
+RECOMMENDATION_MODE = os.environ.get("RECOMMENDATION_MODE", "gemini").lower()
+
+# Resolved recommendations per watchlist fingerprint
+RECOMMENDATION_CACHE_SIZE = int(
+    os.environ.get("RECOMMENDATION_CACHE_SIZE", 1024)
+)
+RECOMMENDATION_CACHE_TTL = float(
+    os.environ.get("RECOMMENDATION_CACHE_TTL", 3600)
+)
+recommendation_cache = LRUCache(
+    maxsize=RECOMMENDATION_CACHE_SIZE,
+    ttl=RECOMMENDATION_CACHE_TTL,
+    name="recommendations",
+)
+
+# Time budget (seconds) for building one user's recommendations, and the
+# threads its stages run on
+RECOMMENDATION_DEADLINE_SECONDS = float(
+    os.environ.get("RECOMMENDATION_DEADLINE_SECONDS", 15)
+)
+RECOMMENDATION_WORKERS = int(os.environ.get("RECOMMENDATION_WORKERS", 16))
+_pipeline_executor = ThreadPoolExecutor(
+    max_workers=RECOMMENDATION_WORKERS, thread_name_prefix="recommendations"
+)
+
+# Gemini calls allowed per minute from this worker process
+GEMINI_REQUESTS_PER_MINUTE = float(
+    os.environ.get("GEMINI_REQUESTS_PER_MINUTE", 60)
+)
+gemini_rate_limiter = RateLimiter(GEMINI_REQUESTS_PER_MINUTE)
+
+# Regenerate recommendations in background jobs and persist the results
+RECOMMENDATION_PRECOMPUTE = (
+    os.environ.get("RECOMMENDATION_PRECOMPUTE", "false").lower() == "true"
+)
+# Seconds to wait after a watchlist change before regenerating, so a burst
+# of changes triggers a single job
+RECOMMENDATION_JOB_DELAY = float(os.environ.get("RECOMMENDATION_JOB_DELAY", 5))
+RECOMMENDATION_JOB_WORKERS = int(
+    os.environ.get("RECOMMENDATION_JOB_WORKERS", 2)
+)
+RECOMMENDATION_JOB_DEADLINE_SECONDS = float(
+    os.environ.get("RECOMMENDATION_JOB_DEADLINE_SECONDS", 60)
+)
+# Stored recommendations older than this are deleted
+RECOMMENDATION_STORE_MAX_AGE = float(
+    os.environ.get("RECOMMENDATION_STORE_MAX_AGE", 7 * 24 * 3600)
+)
+recommendation_jobs = (
+    JobQueue(workers=RECOMMENDATION_JOB_WORKERS, name="recommendation-jobs")
+    if RECOMMENDATION_PRECOMPUTE
+    else None
+)
+# Each user's latest recommendations, with the fingerprint they were
+# generated for
+recommendation_store = (
+    ResultStore("user_recommendations") if RECOMMENDATION_PRECOMPUTE else None
+)
+
 
 recommendations_bp = Blueprint(
     "recommendations", __name__, url_prefix="/recommendations"
@@ -49,131 +126,400 @@ def check_movie_exists(title, username):
     return matching_movie
 
 
-@recommendations_bp.route("", methods=["GET"])
-@login_required
-def recommendations():
-    """Generate a JSON array of 3 movie recommendations using a Generative AI model."""
-    username = session.get("username")
-
-    try:
-        # Get watchlist movies in parallel with Gemini API call
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            watchlist_future = executor.submit(
-                watchlist_service.get_watchlist, username
+def annotate_recommendations(
+    recommendations_json, username, pipeline, watchlist_data=()
+):
+    """
+    Mark which recommendations exist in the catalog and are already on the
+    user's watchlist. Titles are resolved against the local title index in
+    one pass, with membership read from ``watchlist_data``; while the
+    catalog is still loading each title is checked against the movie API
+    instead. Titles not resolved before the pipeline's deadline are shown
+    as not available.
+    """
+    for rec in recommendations_json:
+        rec.pop("showId", None)
+        rec["exists_in_database"] = False
+        rec["in_watchlist"] = False
+
+    index = get_title_index()
+    if index is None:
+        _annotate_via_api(recommendations_json, username, pipeline)
+    else:
+        _annotate_via_index(
+            index, recommendations_json, pipeline, watchlist_data
+        )
+
+
+def _annotate_via_index(index, recommendations_json, pipeline, watchlist_data):
+    """Resolve all recommendations locally, with no upstream calls."""
+    with pipeline.stage("resolve"):
+        matches = index.resolve(
+            [rec.get("title") for rec in recommendations_json]
+        )
+    saved = {str(entry.get("showId")) for entry in watchlist_data}
+    for rec, (movie, score) in zip(recommendations_json, matches):
+        if not movie:
+            logger.info(
+                f"No match found for {rec.get('title')} (score {score})"
+            )
+            continue
+        logger.info(
+            f"Matched {rec.get('title')} to {movie['title']} ({score})"
+        )
+        rec["exists_in_database"] = True
+        rec["title"] = movie["title"]
+        rec["showId"] = movie["showId"]
+        rec["releaseYear"] = movie.get("releaseYear", rec.get("releaseYear"))
+        rec["match_score"] = score
+        rec["in_watchlist"] = str(movie["showId"]) in saved
+
+
+def _annotate_via_api(recommendations_json, username, pipeline):
+    """Check each recommendation against the movie API in parallel."""
+    matching_movies = pipeline.map(
+        "resolve",
+        lambda rec: check_movie_exists(rec["title"], username),
+        recommendations_json,
+    )
+    for recommendation, matching_movie in zip(
+        recommendations_json, matching_movies
+    ):
+        if matching_movie:
+            recommendation["exists_in_database"] = True
+            recommendation["showId"] = matching_movie["showId"]
+            recommendation["releaseYear"] = matching_movie["releaseYear"]
+            recommendation["in_watchlist"] = matching_movie.get(
+                "in_watchlist", False
             )
 
-            # Build prompt for Gemini
-            watchlist_data = watchlist_future.result()
-
-            movies_list = []
 
-            for entry in watchlist_data:
-                show_id = entry.get("showId")
+def watchlist_fingerprint(watchlist_data):
+    """Hash of the sorted showIds in a watchlist."""
+    show_ids = sorted({str(entry.get("showId")) for entry in watchlist_data})
+    return hashlib.sha256(",".join(show_ids).encode()).hexdigest()
+
+
+@on_watchlist_change
+def _invalidate_recommendations(username, _show_id, action):
+    """
+    Queue a job to regenerate the user's recommendations when their
+    watchlist changes, if precomputation is enabled. Cached results are
+    left alone: they are keyed by watchlist, so the changed watchlist
+    misses by itself and the old entry stays right for anyone else who
+    has that watchlist.
+    """
+    if action in ("add", "remove"):
+        if recommendation_jobs is not None:
+            recommendation_jobs.enqueue(
+                "recommendations", username, delay=RECOMMENDATION_JOB_DELAY
+            )
 
-                # Fetch movie details using movie API
-                movies_list.append(get_movie_details_by_id(str(show_id)))
 
-            if movies_list:
+def _generate_content(prompt, timeout):
+    """
+    Call the Generative AI model, giving up after ``timeout`` seconds. The
+    time spent waiting for the Gemini rate limiter counts towards it.
+    """
+    started = time.monotonic()
+    if not gemini_rate_limiter.acquire(timeout=timeout):
+        raise TimeoutError("Gemini rate limit reached")
+    timeout -= time.monotonic() - started
+    with upstream_call("gemini"):
+        return client.models.generate_content(
+            model="gemini-2.0-flash",
+            contents=[prompt],
+            config=types.GenerateContentConfig(
+                max_output_tokens=500,
+                temperature=0.7,
+                http_options=types.HttpOptions(
+                    timeout=max(int(timeout * 1000), 1)
+                ),
+            ),
+        )
+
+
+def generate_recommendations(watchlist_data, username, pipeline):
+    """Ask Gemini for recommendations based on the watchlist entries."""
+    # Fetch movie details for the whole watchlist concurrently; titles that
+    # miss the deadline are simply left out of the prompt
+    with pipeline.stage("details") as remaining:
+        movies_list, failed_ids = get_movie_details_by_ids(
+            [entry.get("showId") for entry in watchlist_data],
+            deadline=remaining,
+        )
+    movies_data = []
+
+    if movies_list:
+
+        movies_data = [
+            movie
+            for movie in movies_list
+            if movie is not None and "title" in movie
+        ]
+        movies_list = [movie["title"] for movie in movies_data]
+
+        print(f"Movies list: {movies_list}")
+
+        prompt = (
+            f"Based on the movies in my watchlist: {movies_list}. "
+            "Provide a JSON array of 3 movie recommendations that are "
+            "similar in genre or style to these movies. "
+            "Each recommendation should include the following fields: "
+            "title, listedIn, releaseYear, type ('Movie' or 'TV Show'), "
+            "description, showId, and in_watchlist=False. "
+            "Return only the JSON array without any additional text "
+            "or markdown formatting. Ensure the response is valid JSON."
+        )
+    else:
+        prompt = (
+            "Provide a JSON array of 3 movie recommendations. "
+            "Each recommendation should include the following fields: "
+            "title, listedIn, releaseYear, type ('Movie' or 'TV Show'), "
+            "description, showId, and in_watchlist=False. "
+            "Return only the JSON array without any additional text "
+            "or markdown formatting. Ensure the response is valid JSON."
+        )
+
+    response = pipeline.run(
+        "gemini", _generate_content, prompt, pipeline.remaining()
+    )
+    if response is None:
+        raise ValueError("No response from the Generative AI model.")
 
-                movies_data = [
-                    movie
-                    for movie in movies_list
-                    if movie is not None and "title" in movie
-                ]
-                movies_list = [movie["title"] for movie in movies_data]
+    raw_text = response.text.strip()
+    raw_text = strip_markdown(raw_text)
 
-                print(f"Movies list: {movies_list}")
+    if not raw_text:
+        raise ValueError("Empty response from the Generative AI model.")
 
-                prompt = (
-                    f"Based on the movies in my watchlist: {movies_list}. "
-                    "Provide a JSON array of 3 movie recommendations that are "
-                    "similar in genre or style to these movies. "
-                    "Each recommendation should include the following fields: "
-                    "title, listedIn, releaseYear, type ('Movie' or 'TV Show'), "
-                    "description, showId, and in_watchlist=False. "
-                    "Return only the JSON array without any additional text "
-                    "or markdown formatting. Ensure the response is valid JSON."
-                )
-            else:
-                prompt = (
-                    "Provide a JSON array of 3 movie recommendations. "
-                    "Each recommendation should include the following fields: "
-                    "title, listedIn, releaseYear, type ('Movie' or 'TV Show'), "
-                    "description, showId, and in_watchlist=False. "
-                    "Return only the JSON array without any additional text "
-                    "or markdown formatting. Ensure the response is valid JSON."
-                )
+    recommendations_json = json.loads(raw_text)
 
-            # Generate recommendations in parallel with watchlist fetch
-            response = client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=[prompt],
-                config=types.GenerateContentConfig(
-                    max_output_tokens=500,
-                    temperature=0.7,
-                ),
+    annotate_recommendations(
+        recommendations_json, username, pipeline, watchlist_data
+    )
+    return recommendations_json
+
+
+def local_recommendations(watchlist_data, pipeline, k=3):
+    """
+    Recommend catalog titles for the watchlist without calling Gemini:
+    titles other users saved alongside it come first, topped up with
+    titles similar in content. Returns an empty list if neither model is
+    ready or nothing on the watchlist is in the catalog.
+    """
+    show_ids = [entry.get("showId") for entry in watchlist_data]
+    matches = []
+    with pipeline.stage("local"):
+        catalog = get_catalog_snapshot()
+        model = get_cooccurrence_model()
+        if catalog is not None and model is not None:
+            for show_id, score in model.recommend(show_ids, k=k):
+                movie = catalog.get(show_id)
+                if movie:
+                    matches.append((movie, score))
+        index = get_content_index()
+        if index is not None and len(matches) < k:
+            seen = {movie["showId"] for movie, _ in matches}
+            matches.extend(
+                (movie, score)
+                for movie, score in index.recommend(show_ids, k=k + len(seen))
+                if movie["showId"] not in seen
             )
+        matches = matches[:k]
+    return [
+        {
+            "title": movie.get("title"),
+            "listedIn": movie.get("listedIn"),
+            "releaseYear": movie.get("releaseYear"),
+            "type": movie.get("type"),
+            "description": movie.get("description"),
+            "showId": movie.get("showId"),
+            "exists_in_database": True,
+            "in_watchlist": False,
+            "match_score": score,
+        }
+        for movie, score in matches
+    ]
+
+
+def build_recommendations(watchlist_data, username, pipeline):
+    """
+    Build recommendations according to ``RECOMMENDATION_MODE``. In "local"
+    mode the local recommenders are used, with Gemini only when they have
+    nothing to offer; in "gemini" mode Gemini is used, with the local
+    recommenders as the fallback when Gemini fails or runs out of time.
+    """
+    if RECOMMENDATION_MODE == "local":
+        recommendations_json = local_recommendations(watchlist_data, pipeline)
+        if recommendations_json:
+            return recommendations_json
+        return generate_recommendations(watchlist_data, username, pipeline)
+    try:
+        return generate_recommendations(watchlist_data, username, pipeline)
+    except Exception as e:
+        recommendations_json = local_recommendations(watchlist_data, pipeline)
+        if not recommendations_json:
+            raise
+        logger.warning(f"Serving local recommendations instead: {e}")
+        return recommendations_json
+
+
+def _remember_recommendations(fingerprint, recommendations_json, username):
+    """Cache recommendations in memory and, if enabled, in the store."""
+    recommendation_cache.set(fingerprint, recommendations_json)
+    if recommendation_store is not None:
+        recommendation_store.set(
+            username,
+            {
+                "fingerprint": fingerprint,
+                "recommendations": recommendations_json,
+            },
+        )
+
+
+def _stored_recommendations(fingerprint, username):
+    """
+    Return the user's last stored recommendations, or None. Results made
+    for another version of the watchlist, or aged out, are still returned
+    while a job regenerates them.
+    """
+    if recommendation_store is None:
+        return None
+    stored, age = recommendation_store.get(username)
+    if stored is None:
+        return None
+    if stored["fingerprint"] != fingerprint or age >= RECOMMENDATION_CACHE_TTL:
+        recommendation_jobs.enqueue("recommendations", username)
+    else:
+        recommendation_cache.set(fingerprint, stored["recommendations"])
+    return stored["recommendations"]
+
+
+def precompute_recommendations(username):
+    """
+    Background job: regenerate and store the user's recommendations unless
+    fresh ones for their current watchlist already exist. Raises if the
+    result would be partial, so the job is retried later.
+    """
+    pipeline = DeadlinePipeline(
+        "recommendation job",
+        RECOMMENDATION_JOB_DEADLINE_SECONDS,
+        _pipeline_executor,
+    )
+    try:
+        watchlist_data = pipeline.run("watchlist", current_watchlist, username)
+        if watchlist_data is None:
+            raise RuntimeError("could not fetch the watchlist")
+        fingerprint = watchlist_fingerprint(watchlist_data)
+        stored, age = recommendation_store.get(username)
+        if (
+            stored is not None
+            and stored["fingerprint"] == fingerprint
+            and age < RECOMMENDATION_CACHE_TTL
+        ):
+            return
+        recommendations_json = build_recommendations(
+            watchlist_data, username, pipeline
+        )
+        if pipeline.degraded:
+            raise RuntimeError(
+                f"partial result ({', '.join(pipeline.degraded)})"
+            )
+        _remember_recommendations(fingerprint, recommendations_json, username)
+        recommendation_store.purge(RECOMMENDATION_STORE_MAX_AGE)
+    finally:
+        pipeline.finish()
+
+
+if recommendation_jobs is not None:
+    recommendation_jobs.register("recommendations", precompute_recommendations)
+    # Pick up jobs left in the queue by a previous run
+    recommendation_jobs.start()
+
+
+def mark_watchlist_membership(recommendations_json, watchlist_data):
+    """
+    Set ``in_watchlist`` from the watchlist just read, including queued
+    changes. Done on every read, since the same cached recommendations
+    outlive changes that are not part of the fingerprint yet.
+    """
+    saved = {str(entry.get("showId")) for entry in watchlist_data}
+    for rec in recommendations_json:
+        rec["in_watchlist"] = (
+            rec.get("showId") is not None and str(rec["showId"]) in saved
+        )
+    return recommendations_json
+
+
+def get_recommendations(username):
+    """
+    Return the user's resolved recommendations, from the cache or the
+    precomputed results if possible.
+
+    The whole pipeline shares one ``RECOMMENDATION_DEADLINE_SECONDS``
+    budget; results that are partial because a stage ran out of time are
+    returned but not cached.
+    """
+    pipeline = DeadlinePipeline(
+        "recommendations",
+        RECOMMENDATION_DEADLINE_SECONDS,
+        _pipeline_executor,
+    )
+    try:
+        watchlist_data = pipeline.run(
+            "watchlist", current_watchlist, username, default=[]
+        )
+
+        # Identical watchlists get identical recommendations
+        fingerprint = watchlist_fingerprint(watchlist_data)
+        recommendations_json = recommendation_cache.get(fingerprint)
+        if recommendations_json is None:
+            recommendations_json = _stored_recommendations(
+                fingerprint, username
+            )
+        if recommendations_json is None:
+            recommendations_json = build_recommendations(
+                watchlist_data, username, pipeline
+            )
+            if not pipeline.degraded:
+                _remember_recommendations(
+                    fingerprint, recommendations_json, username
+                )
+    finally:
+        pipeline.finish()
 
-        raw_text = response.text.strip()
-        raw_text = strip_markdown(raw_text)
-
-        if not raw_text:
-            raise ValueError("Empty response from the Generative AI model.")
-
-        recommendations_json = json.loads(raw_text)
+    # Copy so cached recommendations are never modified
+    recommendations_json = copy.deepcopy(recommendations_json)
+    return mark_watchlist_membership(recommendations_json, watchlist_data)
 
-        # Create a set of watchlist titles for O(1) lookup
-        watchlist_titles = {movie["title"].lower() for movie in movies_data}
 
-        # Check all recommendations in parallel
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            # Submit all tasks first
-            futures = []
-            for rec in recommendations_json:
-                if "showId" in rec:
-                    del rec["showId"]
-                future = executor.submit(
-                    check_movie_exists, rec["title"], username
-                )
-                futures.append((future, rec))
-
-            # Process results as they complete
-            for future, recommendation in futures:
-                try:
-                    matching_movie = future.result()
-                    print(f"\nProcessing result for {recommendation['title']}")
-                    if matching_movie:
-                        print(
-                            f"Found matching movie: {matching_movie['title']}"
-                        )
-                        recommendation["exists_in_database"] = True
-                        recommendation["showId"] = matching_movie["showId"]
-                        recommendation["releaseYear"] = matching_movie[
-                            "releaseYear"
-                        ]
-                        recommendation["in_watchlist"] = matching_movie.get(
-                            "in_watchlist", False
-                        )
-                        print(
-                            f"Set exists_in_database=True for {recommendation['title']}"
-                        )
-                    else:
-                        print(f"No match found for {recommendation['title']}")
-                        recommendation["exists_in_database"] = False
-                        recommendation["in_watchlist"] = False
-                except Exception as e:
-                    print(
-                        f"Error checking movie {recommendation['title']}: {e}"
-                    )
-                    recommendation["exists_in_database"] = False
-                    recommendation["in_watchlist"] = False
+def _stream_recommendations(username):
+    """Yield recommendations for the template as they become available."""
+    try:
+        recommendations_json = get_recommendations(username)
+    except Exception:
+        logger.exception("Error generating recommendations")
+        return
+    yield from recommendations_json
 
-    except Exception as e:
-        recommendations_json = []
-        print("Error generating recommendations:", e)
 
-    return render_template(
-        "recommendations.html",
-        username=username,
-        recommendations=recommendations_json,
+@recommendations_bp.route("", methods=["GET"])
+@login_required
+def recommendations():
+    """
+    Stream the recommendations page: the page shell is sent straight away
+    and the recommendations follow once the Generative AI model has
+    answered.
+    """
+    username = session.get("username")
+    response = Response(
+        stream_template(
+            "recommendations.html",
+            username=username,
+            recommendations=_stream_recommendations(username),
+        )
     )
+    # Ask proxies not to buffer the streamed body
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
@@ -4,6 +4,7 @@ import logging
 from flask import Blueprint, render_template, request, session
 from .database import get_unique_categories, get_filtered_movies
 from .decorators import login_required
+from .watchlist import apply_pending_changes
 
 logger = logging.getLogger(__name__)
 
@@ -48,20 +49,21 @@ def results():
         username = session.get("username")
 
         # Get filtered movies with watchlist status
-        movies, page, has_next, has_prev, total = get_filtered_movies(
-            query_params, username
-        )
-
-        print(movies)
+        movies, pagination, error = get_filtered_movies(query_params, username)
+        apply_pending_changes(username, movies)
 
         return render_template(
             "results.html",
             username=username,
             movies=movies,
-            page=page,
-            has_next=has_next,
-            has_prev=has_prev,
-            total=total,
+            page=pagination["page"],
+            per_page=pagination["per_page"],
+            has_next=pagination["has_next"],
+            has_prev=pagination["has_prev"],
+            total=pagination["total"],
+            total_pages=pagination["total_pages"],
+            next_cursor=pagination["next_cursor"],
+            error=error,
         )
     except Exception as e:
         logger.error(f"Error fetching results: {e}")
@@ -0,0 +1,213 @@
+"""Session storage.
+
+With a server-side store, session data lives on the server and the cookie
+only carries an opaque session ID, so requests no longer ship and
+re-verify the whole session and sessions can be revoked. The session
+holds the user's profile snapshot either way. ``SESSION_BACKEND`` picks
+the store:
+
+- ``cookie`` (default): Flask's signed cookie sessions, which work across
+  any number of instances and restarts
+- ``sqlite``: a SQLite file shared by the workers on one machine, for
+  local or single-machine runs
+- ``filesystem``: one file per session in ``SESSION_FILE_DIR``
+- any other Flask-Session type (``redis``, ``memcached``, ...), configured
+  through the usual ``SESSION_*`` settings; use one of these for
+  server-side sessions across several instances
+
+Other stores can be added by subclassing Flask-Session's
+``ServerSideSessionInterface``, as ``SQLiteSessionInterface`` does.
+
+The SQLite store revokes a user's sessions by deleting them. The other
+stores can't find sessions by user, so each session records when it was
+issued and ``SessionRevocations`` keeps the time of each user's latest
+revocation; older sessions are dropped on their next request. The times
+are kept in ``SESSION_DB_PATH``, shared by the workers on one machine. A
+revocation reaches other machines only if they share that file.
+"""
+
+import logging
+import os
+import tempfile
+import time
+
+from cachelib.file import FileSystemCache
+from flask import current_app
+from flask import session as current_session
+from flask_session import Session
+from flask_session.base import ServerSideSessionInterface
+
+from .jobs import connect_sqlite
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "cookie").lower()
+SESSION_DB_PATH = os.environ.get(
+    "SESSION_DB_PATH",
+    os.path.join(tempfile.gettempdir(), "general-app-sessions.sqlite3"),
+)
+SESSION_FILE_DIR = os.environ.get(
+    "SESSION_FILE_DIR",
+    os.path.join(tempfile.gettempdir(), "general-app-sessions"),
+)
+# Expired SQLite sessions are purged on average once per this many requests
+SESSION_CLEANUP_N_REQUESTS = int(
+    os.environ.get("SESSION_CLEANUP_N_REQUESTS", 1000)
+)
+
+
+class SQLiteSessionInterface(ServerSideSessionInterface):
+    """Store sessions in a SQLite table, indexed by user for revocation."""
+
+    ttl = False
+
+    def __init__(self, app, path=SESSION_DB_PATH, **kwargs):
+        self.path = path
+        with connect_sqlite(self.path) as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, user_id TEXT, data BLOB NOT NULL, "
+                "expires_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS sessions_user "
+                "ON sessions (user_id)"
+            )
+        super().__init__(app, **kwargs)
+
+    def _retrieve_session_data(self, store_id):
+        with connect_sqlite(self.path) as connection:
+            row = connection.execute(
+                "SELECT data FROM sessions WHERE id = ? AND expires_at > ?",
+                (store_id, time.time()),
+            ).fetchone()
+        return self.serializer.decode(row[0]) if row else None
+
+    def _delete_session(self, store_id):
+        with connect_sqlite(self.path) as connection:
+            connection.execute(
+                "DELETE FROM sessions WHERE id = ?", (store_id,)
+            )
+
+    def _upsert_session(self, session_lifetime, session, store_id):
+        user_id = session.get("user_id")
+        with connect_sqlite(self.path) as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?)",
+                (
+                    store_id,
+                    None if user_id is None else str(user_id),
+                    self.serializer.encode(session),
+                    time.time() + session_lifetime.total_seconds(),
+                ),
+            )
+
+    def _delete_expired_sessions(self):
+        with connect_sqlite(self.path) as connection:
+            connection.execute(
+                "DELETE FROM sessions WHERE expires_at <= ?", (time.time(),)
+            )
+
+    def delete_user_sessions(self, user_id):
+        """Delete every session of ``user_id``; returns how many there were."""
+        with connect_sqlite(self.path) as connection:
+            return connection.execute(
+                "DELETE FROM sessions WHERE user_id = ?", (str(user_id),)
+            ).rowcount
+
+
+class SessionRevocations:
+    """When each user's sessions were last revoked, in a SQLite table."""
+
+    def __init__(self, path=SESSION_DB_PATH):
+        self.path = path
+        with connect_sqlite(self.path) as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS session_revocations ("
+                "user_id TEXT PRIMARY KEY, revoked_at REAL NOT NULL)"
+            )
+
+    def revoke(self, user_id):
+        """Revoke every session of ``user_id`` issued until now."""
+        with connect_sqlite(self.path) as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO session_revocations VALUES (?, ?)",
+                (str(user_id), time.time()),
+            )
+
+    def is_revoked(self, user_id, issued_at):
+        """True if a session of ``user_id`` issued at ``issued_at`` is void."""
+        with connect_sqlite(self.path) as connection:
+            row = connection.execute(
+                "SELECT revoked_at FROM session_revocations "
+                "WHERE user_id = ?",
+                (str(user_id),),
+            ).fetchone()
+        return row is not None and (issued_at or 0) <= row[0]
+
+
+def _drop_revoked_session():
+    """Log the current request out if its session has been revoked."""
+    user_id = current_session.get("user_id")
+    if user_id is None:
+        return
+    revocations = current_app.extensions["session_revocations"]
+    if revocations.is_revoked(user_id, current_session.get("issued_at")):
+        current_session.clear()
+
+
+def init_sessions(app, backend=SESSION_BACKEND):
+    """Install the session store selected by ``backend`` on ``app``."""
+    path = app.config.get("SESSION_DB_PATH", SESSION_DB_PATH)
+    if backend == "sqlite":
+        # Sessions are stored when they change, not re-written every request
+        app.config["SESSION_REFRESH_EACH_REQUEST"] = False
+        app.session_interface = SQLiteSessionInterface(
+            app, path=path, cleanup_n_requests=SESSION_CLEANUP_N_REQUESTS
+        )
+        return
+    app.extensions["session_revocations"] = SessionRevocations(path)
+    app.before_request(_drop_revoked_session)
+    if backend == "cookie":
+        return
+    app.config["SESSION_REFRESH_EACH_REQUEST"] = False
+    if backend == "filesystem":
+        app.config.setdefault("SESSION_TYPE", "cachelib")
+        app.config.setdefault(
+            "SESSION_CACHELIB",
+            FileSystemCache(SESSION_FILE_DIR, threshold=0),
+        )
+    else:
+        app.config.setdefault("SESSION_TYPE", backend)
+    Session(app)
+
+
+def start_session(user_data):
+    """
+    Log ``user_data`` in: issue a fresh session ID and store the profile
+    snapshot (everything but the password hash) in the session.
+    """
+    regenerate = getattr(current_app.session_interface, "regenerate", None)
+    if regenerate is not None:
+        regenerate(current_session)
+    current_session.clear()
+    profile = {k: v for k, v in user_data.items() if k != "password"}
+    current_session["user_id"] = user_data["id"]
+    current_session["username"] = user_data["username"]
+    current_session["is_admin"] = user_data.get("is_admin", False)
+    current_session["profile"] = profile
+    current_session["issued_at"] = time.time()
+
+
+def revoke_user_sessions(user_id):
+    """Log ``user_id`` out everywhere."""
+    delete = getattr(
+        current_app.session_interface, "delete_user_sessions", None
+    )
+    if delete is None:
+        current_app.extensions["session_revocations"].revoke(user_id)
+        logger.info(f"Revoked the sessions of user {user_id}")
+        return
+    revoked = delete(user_id)
+    logger.info(f"Revoked {revoked} session(s) of user {user_id}")
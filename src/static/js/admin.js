@@ -113,6 +113,152 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    // Build one table row for a user
+    function renderUserRow(user, currentUser) {
+        const row = document.createElement('tr');
+        row.className = 'border-b border-golden hover:bg-dark-forest';
+
+        const nameCell = document.createElement('td');
+        nameCell.className = 'p-3';
+        nameCell.textContent = user.username;
+
+        const roleCell = document.createElement('td');
+        roleCell.className = 'p-3';
+        roleCell.textContent = user.is_admin ? 'Admin' : 'User';
+
+        const actionsCell = document.createElement('td');
+        actionsCell.className = 'p-3 text-right';
+
+        const passwordBtn = document.createElement('button');
+        passwordBtn.className = 'change-password-btn bg-golden text-cream px-3 py-1 rounded hover:opacity-90 mr-2';
+        passwordBtn.setAttribute('data-user-id', user.id);
+        passwordBtn.textContent = 'Change Password';
+        actionsCell.appendChild(passwordBtn);
+
+        if (!user.is_admin && user.username !== currentUser) {
+            const deleteBtn = document.createElement('button');
+            deleteBtn.className = 'delete-user-btn bg-sage text-cream px-3 py-1 rounded hover:opacity-90';
+            deleteBtn.setAttribute('data-user-id', user.id);
+            deleteBtn.textContent = 'Delete';
+            actionsCell.appendChild(deleteBtn);
+        }
+
+        row.append(nameCell, roleCell, actionsCell);
+        return row;
+    }
+
+    // Load users page by page: the next page is fetched when the
+    // "Load more" button scrolls into view or is clicked
+    function setupUserList() {
+        const userTable = document.getElementById('userTableBody');
+        const searchInput = document.getElementById('userSearch');
+        const sortSelect = document.getElementById('userSort');
+        const loadMoreBtn = document.getElementById('loadMoreUsersBtn');
+        const status = document.getElementById('userListStatus');
+        if (!userTable || !loadMoreBtn) return;
+
+        const currentUser = userTable.getAttribute('data-current-user');
+        const pageSize = userTable.getAttribute('data-page-size') || 50;
+        let nextCursor = null;
+        let loading = false;
+        let generation = 0;  // ignore responses for an outdated search
+
+        function loadPage(reset) {
+            if (loading && !reset) return;
+            if (reset) {
+                generation += 1;
+                nextCursor = null;
+                userTable.replaceChildren();
+            }
+            const requestGeneration = generation;
+            const params = new URLSearchParams({
+                q: searchInput ? searchInput.value.trim() : '',
+                sort: sortSelect ? sortSelect.value : 'username',
+                limit: pageSize
+            });
+            if (nextCursor) params.set('after', nextCursor);
+
+            loading = true;
+            status.textContent = 'Loading users...';
+            fetch(`/api/users?${params}`)
+                .then(response => response.json().then(data => {
+                    if (!response.ok) throw new Error(data.error || 'Failed to load users');
+                    return data;
+                }))
+                .then(data => {
+                    if (requestGeneration !== generation) return;
+                    data.users.forEach(user => userTable.appendChild(renderUserRow(user, currentUser)));
+                    nextCursor = data.next;
+                    loadMoreBtn.classList.toggle('hidden', !nextCursor);
+                    status.textContent = userTable.children.length ? '' : 'No users found';
+                })
+                .catch(error => {
+                    console.error('Error:', error);
+                    if (requestGeneration === generation) status.textContent = error.message;
+                })
+                .finally(() => {
+                    if (requestGeneration === generation) loading = false;
+                });
+        }
+
+        loadMoreBtn.addEventListener('click', () => loadPage(false));
+        if ('IntersectionObserver' in window) {
+            new IntersectionObserver(entries => {
+                if (entries.some(entry => entry.isIntersecting) && nextCursor) loadPage(false);
+            }).observe(loadMoreBtn);
+        }
+
+        let searchTimer = null;
+        if (searchInput) {
+            searchInput.addEventListener('input', () => {
+                clearTimeout(searchTimer);
+                searchTimer = setTimeout(() => loadPage(true), 300);
+            });
+        }
+        if (sortSelect) sortSelect.addEventListener('change', () => loadPage(true));
+
+        loadPage(true);
+    }
+
+    // Fill a list element with one "label: value" item per entry
+    function fillList(listId, entries) {
+        const list = document.getElementById(listId);
+        if (!list) return;
+        list.replaceChildren(...entries.map(([label, value]) => {
+            const item = document.createElement('li');
+            item.textContent = `${label}: ${value}`;
+            return item;
+        }));
+    }
+
+    // Load the statistics panel
+    function setupStats() {
+        const status = document.getElementById('statsStatus');
+        if (!status) return;
+
+        fetch('/api/stats')
+            .then(response => response.json().then(data => {
+                if (!response.ok) throw new Error(data.error || 'Failed to load statistics');
+                return data;
+            }))
+            .then(stats => {
+                document.getElementById('statUsers').textContent = stats.users.total;
+                document.getElementById('statAdmins').textContent = stats.users.admins;
+                document.getElementById('statEntries').textContent = stats.watchlists.entries;
+                document.getElementById('statWatched').textContent = `${Math.round(stats.watched_ratio * 100)}%`;
+                fillList('statSignups', Object.entries(stats.signups_per_day || {}).filter(([, count]) => count > 0).reverse());
+                fillList('statSizes', Object.entries(stats.watchlists.size_distribution));
+                fillList('statMostSaved', stats.most_saved.map(title => [title.title || title.showId, title.saves]));
+                status.textContent = `Average watchlist: ${stats.watchlists.average_size} titles`;
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                status.textContent = error.message;
+            });
+    }
+
     // Initialize user management
     setupUserManagement();
+    setupUserList();
+    setupStats();
 });
\ No newline at end of file
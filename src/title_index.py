@@ -0,0 +1,115 @@
+"""Fuzzy title index for matching free-text titles against the catalog.
+
+Titles are reduced to a normalised key (case, punctuation, a leading
+article and trailing parentheticals such as "(U.S.)" are ignored) and
+compared by trigram similarity, so "The Office" resolves to
+"The Office (U.S.)" without a round trip to the movie API. Titles whose
+numbers differ never match, so "Toy Story 2" does not resolve to
+"Toy Story 3" however similar the rest of the title is.
+"""
+
+import re
+
+from .catalog import trigrams
+from .database import get_catalog_snapshot
+
+# Minimum similarity (0-1) for a fuzzy match to count
+TITLE_MATCH_MIN_SCORE = 0.8
+
+# Roman numerals that number sequels, compared like digits
+SEQUEL_NUMERALS = {"ii", "iii", "iv", "v", "vi", "vii", "viii", "ix", "x"}
+
+
+def normalise_title(title):
+    """Reduce a title to a comparison key."""
+    key = str(title or "").lower()
+    key = re.sub(r"\s*\([^)]*\)\s*$", "", key)  # trailing "(U.S.)", "(2019)"
+    key = key.replace("&", " and ")
+    key = re.sub(r"[^a-z0-9]+", " ", key).strip()
+    key = re.sub(r"^(the|a|an) ", "", key)
+    return key
+
+
+def title_numbers(key):
+    """The numbers in a normalised title, e.g. ``{"2"}`` for "toy story 2"."""
+    return frozenset(
+        word
+        for word in key.split()
+        if word.isdigit() or word in SEQUEL_NUMERALS
+    )
+
+
+def _title_grams(key):
+    """Trigrams of a key, padded so short words and word edges count."""
+    return trigrams(f"  {key} ")
+
+
+class TitleIndex:
+    """Exact-key and trigram index over catalog titles."""
+
+    def __init__(self, movies):
+        self.movies = list(movies)
+        self.by_key = {}
+        self.by_gram = {}
+        self._gram_counts = []
+        self._numbers = []
+        for position, movie in enumerate(self.movies):
+            key = normalise_title(movie.get("title"))
+            self.by_key.setdefault(key, []).append(position)
+            self._numbers.append(title_numbers(key))
+            grams = _title_grams(key)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self.by_gram.setdefault(gram, []).append(position)
+
+    def match(self, title, min_score=TITLE_MATCH_MIN_SCORE):
+        """Return ``(movie, score)`` for the best match, or ``(None, 0.0)``.
+
+        An identical normalised title scores 1.0; otherwise the score is
+        the Dice coefficient of the two titles' trigram sets, among titles
+        with the same numbers in them.
+        """
+        key = normalise_title(title)
+        if not key:
+            return None, 0.0
+        exact = self.by_key.get(key)
+        if exact:
+            return self.movies[exact[0]], 1.0
+        grams = _title_grams(key)
+        numbers = title_numbers(key)
+        shared = {}
+        for gram in grams:
+            for position in self.by_gram.get(gram, ()):
+                shared[position] = shared.get(position, 0) + 1
+        best_position, best_score = None, 0.0
+        for position, count in shared.items():
+            if self._numbers[position] != numbers:
+                continue
+            score = 2 * count / (len(grams) + self._gram_counts[position])
+            if score > best_score:
+                best_position, best_score = position, score
+        if best_position is None or best_score < min_score:
+            return None, round(best_score, 3)
+        return self.movies[best_position], round(best_score, 3)
+
+    def resolve(self, titles, min_score=TITLE_MATCH_MIN_SCORE):
+        """Match a batch of titles; returns ``(movie, score)`` per title."""
+        return [self.match(title, min_score) for title in titles]
+
+
+_index_cache = {"snapshot": None, "index": None}
+
+
+def get_title_index():
+    """
+    Return the title index for the current catalog snapshot, or None while
+    the catalog is still loading. The index is rebuilt whenever the
+    catalog replica is re-synced.
+    """
+    snapshot = get_catalog_snapshot()
+    if snapshot is None:
+        return None
+    if _index_cache["snapshot"] is not snapshot:
+        _index_cache["index"] = TitleIndex(snapshot.movies)
+        _index_cache["snapshot"] = snapshot
+    return _index_cache["index"]
@@ -0,0 +1,180 @@
+"""Shared HTTP client for the movie and watchlist backends.
+
+All upstream calls go through a single ``requests.Session`` per process so
+that TCP/TLS connections to the Azure backends are kept alive and reused
+instead of being re-established on every call.
+"""
+
+import logging
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .metrics import server_error, upstream_call
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Worker concurrency, used to size the per-host connection pools
+GUNICORN_THREADS = int(os.environ.get("GUNICORN_THREADS", 1))
+
+# Connect and read timeouts (seconds) for upstream calls
+UPSTREAM_CONNECT_TIMEOUT = float(
+    os.environ.get("UPSTREAM_CONNECT_TIMEOUT", 3.05)
+)
+UPSTREAM_READ_TIMEOUT = float(os.environ.get("UPSTREAM_READ_TIMEOUT", 10))
+
+# Number of distinct hosts to keep pools for, and connections per host.
+# Each request thread may fan out a few calls of its own (watchlist batch
+# checks, detail lookups), so leave headroom above the thread count.
+UPSTREAM_POOL_HOSTS = int(os.environ.get("UPSTREAM_POOL_HOSTS", 4))
+UPSTREAM_POOL_MAXSIZE = int(
+    os.environ.get("UPSTREAM_POOL_MAXSIZE", max(10, GUNICORN_THREADS * 4))
+)
+
+# Metric names of the backends, by base URL
+UPSTREAM_NAMES = {
+    url: name
+    for url, name in (
+        (os.environ.get("MOVIE_BACKEND_URL"), "movie_api"),
+        (os.environ.get("WATCHLIST_BACKEND_URL"), "watchlist_api"),
+    )
+    if url
+}
+
+
+def upstream_name(url, names=None):
+    """Name the backend ``url`` belongs to, falling back to its host."""
+    names = UPSTREAM_NAMES if names is None else names
+    matches = [base for base in names if url.startswith(base)]
+    if matches:
+        return names[max(matches, key=len)]
+    return urlsplit(url).netloc
+
+
+class UpstreamClient:
+    """Keep-alive HTTP client with per-host connection pools and usage stats.
+
+    The session is created lazily and re-created after a fork, so a client
+    imported before gunicorn forks its workers never shares sockets between
+    processes.
+    """
+
+    def __init__(
+        self,
+        pool_hosts=UPSTREAM_POOL_HOSTS,
+        pool_maxsize=UPSTREAM_POOL_MAXSIZE,
+        timeout=(UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_READ_TIMEOUT),
+    ):
+        self.timeout = timeout
+        self._adapter_kwargs = {
+            "pool_connections": pool_hosts,
+            "pool_maxsize": pool_maxsize,
+        }
+        self._lock = threading.Lock()
+        self._session = None
+        self._pid = None
+        self._in_flight = 0
+        self._counts = {"requests": {}, "errors": {}}
+
+    def _get_session(self):
+        """Return the session for this process, creating it if needed."""
+        pid = os.getpid()
+        if self._session is None or self._pid != pid:
+            with self._lock:
+                if self._session is None or self._pid != pid:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(**self._adapter_kwargs)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+                    self._pid = pid
+                    self._in_flight = 0
+                    self._counts = {"requests": {}, "errors": {}}
+        return self._session
+
+    def request(self, method, url, **kwargs):
+        """Send a request over the pooled session.
+
+        Uses the configured ``(connect, read)`` timeout unless the caller
+        passes one explicitly. Raises ``requests.RequestException`` exactly
+        like the module-level ``requests`` functions.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        session = self._get_session()
+        host = urlsplit(url).netloc
+        with self._lock:
+            self._in_flight += 1
+            requests_by_host = self._counts["requests"]
+            requests_by_host[host] = requests_by_host.get(host, 0) + 1
+        try:
+            with upstream_call(upstream_name(url)) as fail:
+                response = session.request(method, url, **kwargs)
+                error = server_error(response.status_code)
+                if error:
+                    fail(error)
+                return response
+        except requests.RequestException:
+            with self._lock:
+                errors_by_host = self._counts["errors"]
+                errors_by_host[host] = errors_by_host.get(host, 0) + 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def in_flight(self):
+        """Number of upstream requests currently in progress."""
+        return self._in_flight
+
+    def stats(self):
+        """Report request counts and connection pool usage per host."""
+        session = self._get_session()
+        adapter = session.get_adapter("https://")
+        pools = {}
+        for key in list(adapter.poolmanager.pools.keys()):
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            pools[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = {
+                "connections_opened": pool.num_connections,
+                "requests_sent": pool.num_requests,
+                "idle_connections": (
+                    sum(1 for conn in pool.pool.queue if conn is not None)
+                    if pool.pool
+                    else 0
+                ),
+                "maxsize": pool.pool.maxsize if pool.pool else 0,
+            }
+        with self._lock:
+            return {
+                "pid": self._pid,
+                "in_flight": self._in_flight,
+                "requests": dict(self._counts["requests"]),
+                "errors": dict(self._counts["errors"]),
+                "pool_maxsize": self._adapter_kwargs["pool_maxsize"],
+                "timeout": {
+                    "connect": self.timeout[0],
+                    "read": self.timeout[1],
+                },
+                "pools": pools,
+            }
+
+
+# Shared client used by the database and watchlist modules
+upstream = UpstreamClient()
@@ -0,0 +1,133 @@
+"""In-memory set of taken usernames.
+
+Loaded in one pass over ``profiles`` and kept current by registration and
+admin renames and deletions, so checking whether a name is free usually
+costs no query. The set is only a hint between syncs. A name it lacks is
+reported free straight away; if it was claimed through another worker
+since the last sync, the unique constraint on ``profiles.username``
+catches that when the row is written. A name it holds may have been freed
+through another worker, so that is confirmed against the table first.
+"""
+
+import logging
+import os
+import threading
+
+from postgrest.exceptions import APIError
+
+from .cache import RefreshingValue
+from .database import scan_table, supabase
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Seconds between full reloads, to pick up other workers' changes
+USERNAME_INDEX_SYNC_INTERVAL = float(
+    os.environ.get("USERNAME_INDEX_SYNC_INTERVAL", 300)
+)
+
+# PostgreSQL's error code for a unique constraint violation
+UNIQUE_VIOLATION = "23505"
+
+
+class UsernameIndex:
+    """A thread-safe set of usernames."""
+
+    def __init__(self, usernames=()):
+        self._lock = threading.Lock()
+        self._usernames = set(usernames)
+
+    def __contains__(self, username):
+        return username in self._usernames
+
+    def __len__(self):
+        return len(self._usernames)
+
+    def add(self, username):
+        """Mark ``username`` as taken."""
+        with self._lock:
+            self._usernames.add(username)
+
+    def discard(self, username):
+        """Mark ``username`` as free."""
+        with self._lock:
+            self._usernames.discard(username)
+
+    def rename(self, old_username, new_username):
+        """Free ``old_username`` and take ``new_username``."""
+        with self._lock:
+            self._usernames.discard(old_username)
+            self._usernames.add(new_username)
+
+
+def _load_usernames():
+    """Read every username from the profiles table."""
+    index = UsernameIndex(
+        row["username"]
+        for row in scan_table("profiles", "username", ("username",))
+    )
+    logger.info(f"Username index loaded: {len(index)} usernames")
+    return index
+
+
+username_index = RefreshingValue(
+    _load_usernames,
+    ttl=USERNAME_INDEX_SYNC_INTERVAL,
+    name="username index",
+)
+
+
+def _username_in_profiles(username):
+    """Query the profiles table for ``username``."""
+    existing = (
+        supabase.table("profiles")
+        .select("id")
+        .eq("username", username)
+        .limit(1)
+        .execute()
+    )
+    return bool(existing.data)
+
+
+def username_exists(username):
+    """
+    Return True if ``username`` is taken. Once the index is loaded, free
+    names are answered from memory and taken ones are confirmed with one
+    query; until then the profiles table is queried.
+    """
+    index = username_index.peek()
+    if index is not None and username not in index:
+        return False
+    if _username_in_profiles(username):
+        return True
+    if index is not None:
+        # Freed through another worker since the last sync
+        index.discard(username)
+    return False
+
+
+def is_unique_violation(error):
+    """True if ``error`` is the database rejecting a duplicate value."""
+    return isinstance(error, APIError) and error.code == UNIQUE_VIOLATION
+
+
+def _update(method, *args):
+    """Apply a change to the index if it has been loaded."""
+    index = username_index.peek()
+    if index is not None:
+        getattr(index, method)(*args)
+
+
+def track_username_added(username):
+    """Record a newly registered username."""
+    _update("add", username)
+
+
+def track_username_removed(username):
+    """Record that a deleted user's name is free again."""
+    _update("discard", username)
+
+
+def track_username_renamed(old_username, new_username):
+    """Record a username change."""
+    _update("rename", old_username, new_username)
@@ -2,7 +2,6 @@
 
 import os
 import logging
-import requests
 from flask import (
     Blueprint,
     render_template,
@@ -12,16 +11,25 @@ from flask import (
     session,
 )
 from .decorators import login_required
-from .database import get_movie_details_by_id
+from .database import get_movie_details_by_ids
+from .async_watchlist import SyncWatchlistService
+from .upstream import upstream
+from .write_behind import create_write_behind_queue
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Constants
-TIMEOUT_SECONDS = 10
-
 # Get configuration from environment
 WATCHLIST_BACKEND_URL = os.environ.get("WATCHLIST_BACKEND_URL")
+# Queue watchlist mutations and write them in the background (per process,
+# so only for a single worker process; see src/write_behind.py)
+WATCHLIST_WRITE_BEHIND = (
+    os.environ.get("WATCHLIST_WRITE_BEHIND", "false").lower() == "true"
+)
+# Talk to the watchlist backend through the async httpx client
+WATCHLIST_ASYNC_CLIENT = (
+    os.environ.get("WATCHLIST_ASYNC_CLIENT", "false").lower() == "true"
+)
 
 
 class WatchlistService:
@@ -32,9 +40,8 @@ class WatchlistService:
     def get_watchlist(username):
         """Get all movies in a user's watchlist with full movie details."""
         try:
-            response = requests.get(
-                f"{WATCHLIST_BACKEND_URL}/watchlist/{username}",
-                timeout=TIMEOUT_SECONDS,
+            response = upstream.get(
+                f"{WATCHLIST_BACKEND_URL}/watchlist/{username}"
             )
             response.raise_for_status()
             data = response.json()
@@ -67,10 +74,9 @@ class WatchlistService:
                 },
             )
 
-            response = requests.post(
+            response = upstream.post(
                 f"{WATCHLIST_BACKEND_URL}/watchlist",
                 json={"username": username, "showId": show_id_str},
-                timeout=TIMEOUT_SECONDS,
             )
             response.raise_for_status()
             return True
@@ -85,10 +91,9 @@ class WatchlistService:
         try:
             # Ensure show_id is a string
             show_id_str = str(show_id)
-            response = requests.delete(
+            response = upstream.delete(
                 f"{WATCHLIST_BACKEND_URL}/watchlist",
                 json={"username": username, "showId": show_id_str},
-                timeout=TIMEOUT_SECONDS,
             )
             response.raise_for_status()
             return True
@@ -103,14 +108,13 @@ class WatchlistService:
         try:
             # Ensure show_id is a string
             show_id_str = str(show_id)
-            response = requests.put(
+            response = upstream.put(
                 f"{WATCHLIST_BACKEND_URL}/watchlist/status",
                 json={
                     "username": username,
                     "showId": show_id_str,
                     "watched": watched,
                 },
-                timeout=TIMEOUT_SECONDS,
             )
             response.raise_for_status()
             return True
@@ -124,9 +128,8 @@ class WatchlistService:
         try:
             # Ensure show_id is a string
             show_id_str = str(show_id)
-            response = requests.get(
-                f"{WATCHLIST_BACKEND_URL}/watchlist/status/{username}/{show_id_str}",
-                timeout=TIMEOUT_SECONDS,
+            response = upstream.get(
+                f"{WATCHLIST_BACKEND_URL}/watchlist/status/{username}/{show_id_str}"
             )
             response.raise_for_status()
             return response.json()
@@ -148,10 +151,9 @@ class WatchlistService:
         try:
             # Ensure all show_ids are strings
             show_ids_str = [str(show_id) for show_id in show_ids]
-            response = requests.post(
+            response = upstream.post(
                 f"{WATCHLIST_BACKEND_URL}/watchlist/batch",
                 json={"username": username, "showIds": show_ids_str},
-                timeout=TIMEOUT_SECONDS,
             )
             response.raise_for_status()
             return response.json()
@@ -164,7 +166,56 @@ class WatchlistService:
 
 
 # Initialize the service
-watchlist_service = WatchlistService()
+watchlist_service = (
+    SyncWatchlistService() if WATCHLIST_ASYNC_CLIENT else WatchlistService()
+)
+
+# Mutations go through the write-behind queue when it is enabled
+write_behind = (
+    create_write_behind_queue(watchlist_service)
+    if WATCHLIST_WRITE_BEHIND
+    else None
+)
+watchlist_writer = write_behind or watchlist_service
+
+
+# Callbacks run after a user's watchlist changes: fn(username, show_id, action)
+_change_listeners = []
+
+
+def on_watchlist_change(listener):
+    """Register ``listener`` to be called after each watchlist mutation.
+
+    ``action`` is one of "add", "remove", "watched" or "unwatched". Can be
+    used as a decorator.
+    """
+    _change_listeners.append(listener)
+    return listener
+
+
+def notify_watchlist_change(username, show_id, action):
+    """Run the registered change listeners, logging any that fail."""
+    for listener in _change_listeners:
+        try:
+            listener(username, str(show_id), action)
+        except Exception as e:
+            logger.error(f"Watchlist change listener failed: {e}")
+
+
+def current_watchlist(username):
+    """Return the user's watchlist entries, including queued changes."""
+    entries = watchlist_service.get_watchlist(username)
+    if write_behind is not None:
+        entries = write_behind.apply_to_entries(username, entries)
+    return entries
+
+
+def apply_pending_changes(username, movies):
+    """Reflect queued, not yet written, changes in ``in_watchlist`` flags."""
+    if write_behind is not None and username:
+        write_behind.apply_to_movies(username, movies)
+    return movies
+
 
 # Initialize the blueprint
 watchlist_bp = Blueprint("watchlist", __name__)
@@ -179,13 +230,16 @@ def my_watchlist():
         username = session.get("username")
 
         # Retrieve the watchlist entries (each with showId and watched status)
-        watchlist_entries = watchlist_service.get_watchlist(username)
+        watchlist_entries = current_watchlist(username)
         full_movies = []
 
-        for entry in watchlist_entries:
+        # Fetch all movie details from the movie API concurrently
+        movies, failed_ids = get_movie_details_by_ids(
+            [entry.get("showId") for entry in watchlist_entries]
+        )
+
+        for entry, movie_details in zip(watchlist_entries, movies):
             show_id = entry.get("showId")
-            # Fetch movie details using movie API
-            movie_details = get_movie_details_by_id(str(show_id))
 
             if movie_details:
                 # Merge the watched status into the movie details
@@ -228,10 +282,11 @@ def add_to_watchlist_handler():
             logger.error("Missing showId or username")
             return redirect(request.referrer or url_for("search.index"))
 
-        success = watchlist_service.add_to_watchlist(username, show_id)
+        success = watchlist_writer.add_to_watchlist(username, show_id)
 
         if success:
             logger.info("Successfully added to watchlist")
+            notify_watchlist_change(username, show_id, "add")
         else:
             logger.error("Failed to add to watchlist")
 
@@ -252,10 +307,11 @@ def remove_from_watchlist_handler():
             return redirect(url_for("watchlist.my_watchlist"))
 
         username = session.get("username")
-        success = watchlist_service.remove_from_watchlist(username, show_id)
+        success = watchlist_writer.remove_from_watchlist(username, show_id)
 
         if success:
             logger.info("Successfully removed from watchlist")
+            notify_watchlist_change(username, show_id, "remove")
         else:
             logger.error("Failed remove from watchlist")
 
@@ -276,9 +332,11 @@ def mark_watched_handler():
             return redirect(url_for("watchlist.my_watchlist"))
 
         username = session.get("username")
-        success = watchlist_service.update_watched_status(
+        success = watchlist_writer.update_watched_status(
             username, show_id, True
         )
+        if success:
+            notify_watchlist_change(username, show_id, "watched")
         return redirect(url_for("watchlist.my_watchlist"))
     except Exception as e:
         logger.error(f"Error marking as watched: {e}")
@@ -296,9 +354,11 @@ def mark_unwatched_handler():
             return redirect(url_for("watchlist.my_watchlist"))
 
         username = session.get("username")
-        success = watchlist_service.update_watched_status(
+        success = watchlist_writer.update_watched_status(
             username, show_id, False
         )
+        if success:
+            notify_watchlist_change(username, show_id, "unwatched")
         return redirect(url_for("watchlist.my_watchlist"))
     except Exception as e:
         logger.error(f"Error marking as unwatched: {e}")
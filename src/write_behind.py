@@ -0,0 +1,315 @@
+"""Write-behind queue for watchlist mutations.
+
+Instead of blocking the request on the watchlist backend, mutations are
+recorded per user and flushed by a background worker. Opposite mutations
+of the same title that have not been sent yet cancel out (add then remove,
+watched then unwatched), so rapid toggling costs no backend writes, and
+pending changes are overlaid on watchlist reads so the next page render
+already reflects them.
+
+The queue and the overlay live in the memory of the worker process that
+took the request, so the overlay is only seen by requests that process
+serves, and changes made through different processes are not ordered or
+coalesced against each other. Write-behind is opt-in and meant for a
+single worker process (``gunicorn -w 1`` with threads for concurrency).
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Seconds a mutation waits in the queue before being flushed, giving
+# follow-up toggles a chance to cancel it out
+WRITE_BEHIND_FLUSH_DELAY = float(
+    os.environ.get("WRITE_BEHIND_FLUSH_DELAY", 0.5)
+)
+# Attempts per mutation before it is dropped. Retries back off
+# exponentially from the flush delay, so 8 attempts span about two minutes
+WRITE_BEHIND_MAX_ATTEMPTS = int(os.environ.get("WRITE_BEHIND_MAX_ATTEMPTS", 8))
+
+
+def _combine(earlier, later):
+    """Coalesce two values of the same field; opposite values cancel."""
+    if earlier is None:
+        return later
+    if later is None or later == earlier:
+        return earlier
+    return None
+
+
+def _merge(entry, member, watched):
+    """
+    Fold a later mutation into a pending entry. A removal also discards any
+    pending watched change, since the title ends up off the watchlist. A
+    removal followed by an add cancels out, except that the re-added title
+    starts unwatched, so that is kept as a watched change.
+    """
+    readded = entry["member"] is False and member is True
+    entry["member"] = _combine(entry["member"], member)
+    if member is False:
+        entry["watched"] = None
+    elif readded:
+        entry["watched"] = False if watched is None else watched
+    else:
+        entry["watched"] = _combine(entry["watched"], watched)
+
+
+class WriteBehindQueue:  # pylint: disable=too-many-instance-attributes
+    """Per-user ordered queue of pending watchlist mutations.
+
+    Each pending entry holds the net ``member`` change (True for add, False
+    for remove) and ``watched`` change for one title. The queue exposes the
+    same mutation methods as ``WatchlistService`` so handlers can use
+    either interchangeably.
+    """
+
+    def __init__(
+        self,
+        service,
+        flush_delay=WRITE_BEHIND_FLUSH_DELAY,
+        max_attempts=WRITE_BEHIND_MAX_ATTEMPTS,
+    ):
+        self.service = service
+        self.flush_delay = flush_delay
+        self.max_attempts = max_attempts
+        self._cond = threading.Condition()
+        self._pending = OrderedDict()  # username -> {showId: entry}
+        self._in_flight = {}  # username -> {showId: entry}
+        self._worker = None
+        self._pid = None
+        self._counts = {
+            "queued": 0,
+            "coalesced": 0,
+            "flushed": 0,
+            "failed": 0,
+            "dropped": 0,
+        }
+
+    # Mutations (same signatures as WatchlistService)
+
+    def add_to_watchlist(self, username, show_id):
+        """Queue adding a title to the user's watchlist."""
+        return self._record(username, show_id, member=True)
+
+    def remove_from_watchlist(self, username, show_id):
+        """Queue removing a title from the user's watchlist."""
+        return self._record(username, show_id, member=False)
+
+    def update_watched_status(self, username, show_id, watched):
+        """Queue a change to a title's watched status."""
+        return self._record(username, show_id, watched=bool(watched))
+
+    def _record(self, username, show_id, member=None, watched=None):
+        """Merge a mutation into the user's pending entry for the title."""
+        show_id = str(show_id)
+        with self._cond:
+            self._ensure_worker()
+            user_queue = self._pending.setdefault(username, OrderedDict())
+            entry = user_queue.get(show_id)
+            if entry is None:
+                user_queue[show_id] = {
+                    "member": member,
+                    "watched": watched,
+                    "attempts": 0,
+                    "due_at": time.monotonic() + self.flush_delay,
+                }
+                self._counts["queued"] += 1
+            else:
+                _merge(entry, member, watched)
+                self._counts["coalesced"] += 1
+                if entry["member"] is None and entry["watched"] is None:
+                    del user_queue[show_id]
+                    if not user_queue:
+                        del self._pending[username]
+            self._cond.notify()
+        return True
+
+    # Read-your-writes overlay
+
+    def pending_changes(self, username):
+        """Return ``{showId: {"member": ..., "watched": ...}}`` not yet stored.
+
+        Values are True/False for a pending change and None for no change.
+        """
+        with self._cond:
+            layers = (
+                self._in_flight.get(username, {}),
+                self._pending.get(username, {}),
+            )
+            changes = {}
+            for layer in layers:
+                for show_id, entry in layer.items():
+                    change = changes.setdefault(
+                        show_id, {"member": None, "watched": None}
+                    )
+                    for field in ("member", "watched"):
+                        if entry[field] is not None:
+                            change[field] = entry[field]
+            return changes
+
+    def apply_to_entries(self, username, entries):
+        """Overlay pending changes on watchlist entries from the backend."""
+        changes = self.pending_changes(username)
+        if not changes:
+            return entries
+        result = []
+        for entry in entries:
+            change = changes.pop(str(entry.get("showId")), None)
+            if change is None:
+                result.append(entry)
+                continue
+            if change["member"] is False:
+                continue
+            entry = dict(entry)
+            if change["watched"] is not None:
+                entry["watched"] = change["watched"]
+            result.append(entry)
+        for show_id, change in changes.items():
+            if change["member"]:
+                result.append(
+                    {"showId": show_id, "watched": bool(change["watched"])}
+                )
+        return result
+
+    def apply_to_movies(self, username, movies):
+        """Overlay pending membership changes on ``in_watchlist`` flags."""
+        changes = self.pending_changes(username)
+        for movie in movies:
+            change = changes.get(str(movie.get("showId")))
+            if change and change["member"] is not None:
+                movie["in_watchlist"] = change["member"]
+        return movies
+
+    # Background flushing
+
+    def _ensure_worker(self):
+        """Start the flush worker for this process if it is not running."""
+        if self._worker is not None and self._pid == os.getpid():
+            return
+        self._worker = threading.Thread(
+            target=self._run, name="watchlist-write-behind", daemon=True
+        )
+        self._pid = os.getpid()
+        self._worker.start()
+
+    def _run(self):
+        """Flush pending entries once they have waited ``flush_delay``."""
+        while True:
+            with self._cond:
+                batch = self._take_due()
+                while batch is None:
+                    # Sleep until something is queued, then until it is due
+                    self._cond.wait(
+                        timeout=self.flush_delay if self._pending else None
+                    )
+                    batch = self._take_due()
+            self._send(*batch)
+
+    def _take_due(self, force=False):
+        """Move the oldest user's due entries in flight, or return None.
+
+        A user's entries are only taken once their previous batch has been
+        written, so each user's changes reach the backend in order.
+        """
+        now = time.monotonic()
+        for username, user_queue in self._pending.items():
+            if username in self._in_flight:
+                continue
+            oldest = next(iter(user_queue.values()))
+            if force or now >= oldest["due_at"]:
+                del self._pending[username]
+                self._in_flight[username] = user_queue
+                return username, user_queue
+        return None
+
+    def _send(self, username, user_queue):
+        """Write one user's entries to the backend, in the order queued."""
+        failed = OrderedDict()
+        for show_id, entry in user_queue.items():
+            if not self._write(username, show_id, entry):
+                failed[show_id] = entry
+        with self._cond:
+            del self._in_flight[username]
+            self._counts["flushed"] += len(user_queue) - len(failed)
+            self._counts["failed"] += len(failed)
+            for show_id, entry in failed.items():
+                self._requeue(username, show_id, entry)
+            self._cond.notify_all()
+
+    def _write(self, username, show_id, entry):
+        """Apply a single entry through the watchlist service."""
+        if entry["member"] is True:
+            if not self.service.add_to_watchlist(username, show_id):
+                return False
+            entry["member"] = None  # don't repeat it if "watched" fails
+        elif entry["member"] is False:
+            return self.service.remove_from_watchlist(username, show_id)
+        if entry["watched"] is not None:
+            return self.service.update_watched_status(
+                username, show_id, entry["watched"]
+            )
+        return True
+
+    def _requeue(self, username, show_id, entry):
+        """
+        Put a failed entry back ahead of any newer changes to the title,
+        due again after a delay that doubles with each failed attempt.
+        """
+        entry["attempts"] += 1
+        if entry["attempts"] >= self.max_attempts:
+            self._counts["dropped"] += 1
+            logger.error(
+                f"Dropping watchlist change for {username}/{show_id} "
+                f"after {entry['attempts']} attempts"
+            )
+            return
+        user_queue = self._pending.setdefault(username, OrderedDict())
+        newer = user_queue.pop(show_id, None)
+        if newer is not None:
+            _merge(entry, newer["member"], newer["watched"])
+        entry["due_at"] = (
+            time.monotonic() + self.flush_delay * 2 ** entry["attempts"]
+        )
+        user_queue[show_id] = entry
+        user_queue.move_to_end(show_id, last=False)
+
+    def flush(self, timeout=5):
+        """Send everything pending now; returns True if the queue drained."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._cond:
+                batch = self._take_due(force=True)
+                if batch is None:
+                    while self._in_flight:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return False
+                        self._cond.wait(timeout=remaining)
+                    if not self._pending:
+                        return True
+                    continue
+            self._send(*batch)
+            if time.monotonic() >= deadline:
+                return not self._pending and not self._in_flight
+
+    def stats(self):
+        """Return queue depth and mutation counters."""
+        with self._cond:
+            return {
+                "pending": sum(len(q) for q in self._pending.values()),
+                "in_flight": sum(len(q) for q in self._in_flight.values()),
+                **self._counts,
+            }
+
+
+def create_write_behind_queue(service):
+    """Create a queue for ``service`` that is flushed at interpreter exit."""
+    queue = WriteBehindQueue(service)
+    atexit.register(queue.flush)
+    return queue
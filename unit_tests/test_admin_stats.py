@@ -0,0 +1,90 @@
+import datetime
+
+from postgrest.exceptions import APIError
+
+import src.admin_stats as admin_stats_module
+from src.admin_stats import AdminStats
+
+TODAY = datetime.date.today().isoformat()
+PROFILES = [
+    {"username": "root", "is_admin": True, "created_at": TODAY + "T09:00"},
+    {"username": "alice", "is_admin": False, "created_at": TODAY},
+    {"username": "bob", "is_admin": False, "created_at": "2020-01-01"},
+]
+
+
+def entry(username, show_id, watched=False):
+    return {"username": username, "showId": show_id, "watched": watched}
+
+
+def test_summary_counts(monkeypatch):
+    """Ensure the summary reports users, sizes, top titles and ratio."""
+    monkeypatch.setattr(
+        admin_stats_module, "get_catalog_snapshot", lambda: None
+    )
+    stats = AdminStats(
+        PROFILES,
+        [entry("alice", f"s{i}", i < 3) for i in range(6)]
+        + [entry("bob", "s1", True), entry("bob", "s1")],
+    )
+    summary = stats.summary(days=2)
+
+    assert summary["users"] == {"total": 3, "admins": 1, "with_watchlist": 2}
+    assert summary["signups_per_day"][TODAY] == 2
+    assert summary["watchlists"]["entries"] == 7
+    assert summary["watchlists"]["size_distribution"] == {
+        "0": 1,
+        "1-5": 1,
+        "6-20": 1,
+    }
+    assert summary["most_saved"][0] == {
+        "showId": "s1",
+        "title": None,
+        "saves": 2,
+    }
+    assert summary["watched_ratio"] == round(4 / 7, 3)
+
+
+def test_incremental_updates_match_a_rebuild(monkeypatch):
+    """Ensure tracked changes leave the same counts as a fresh build."""
+    monkeypatch.setattr(
+        admin_stats_module, "get_catalog_snapshot", lambda: None
+    )
+    stats = AdminStats(PROFILES, [entry("alice", "s1"), entry("bob", "s2")])
+    stats.add_user("carol")
+    stats.add_entry("carol", "s1")
+    stats.add_entry("carol", "s3")
+    stats.set_watched("carol", "s3", True)
+    stats.remove_entry("alice", "s1")
+    stats.rename_user("carol", "caz")
+    stats.remove_user("bob")
+
+    rebuilt = AdminStats(
+        PROFILES[:2] + [{"username": "caz", "created_at": TODAY}],
+        [entry("caz", "s1"), entry("caz", "s3", True)],
+    )
+    summary, expected = stats.summary(), rebuilt.summary()
+    summary.pop("built_at")
+    expected.pop("built_at")
+    assert summary == expected
+
+
+def test_build_without_created_at_skips_signups(monkeypatch):
+    """Ensure a missing created_at column only drops the sign-up chart."""
+    monkeypatch.setattr(
+        admin_stats_module, "get_catalog_snapshot", lambda: None
+    )
+
+    def scan_table(table, columns, order):
+        if "created_at" in columns:
+            raise APIError({"code": "42703"})
+        if table == "profiles":
+            return iter([{"username": "alice", "is_admin": False}])
+        return iter([entry("alice", "s1")])
+
+    monkeypatch.setattr(admin_stats_module, "scan_table", scan_table)
+    summary = admin_stats_module._build_admin_stats().summary()
+
+    assert summary["signups_per_day"] is None
+    assert summary["users"]["total"] == 1
+    assert summary["watchlists"]["entries"] == 1
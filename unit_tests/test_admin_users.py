@@ -0,0 +1,375 @@
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+import src.admin as admin
+
+
+class FakeQuery:
+    """Records the PostgREST calls made on it and returns ``rows``."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+
+        return record
+
+    def execute(self):
+        return SimpleNamespace(data=self.rows)
+
+
+def test_keyset_filter_and_cursor_round_trip():
+    """Ensure cursors survive encoding and filters resume after the row."""
+    cursor = admin.encode_cursor([True, 'a "quoted", name'])
+    assert admin.decode_cursor(cursor) == [True, 'a "quoted", name']
+    with pytest.raises(ValueError):
+        admin.decode_cursor("not-a-cursor")
+
+    assert admin.keyset_filter(admin.USER_SORTS["-username"], ["bob"]) == (
+        'username.lt."bob"'
+    )
+    assert admin.keyset_filter(admin.USER_SORTS["role"], [True, "bob"]) == (
+        'is_admin.lt.true,and(is_admin.eq.true,username.gt."bob")'
+    )
+
+
+def test_list_users_pages_by_keyset(monkeypatch):
+    """Ensure a page projects columns, filters, and returns a next cursor."""
+    rows = [
+        {"id": i, "username": f"user{i}", "is_admin": False} for i in range(3)
+    ]
+    query = FakeQuery(rows)
+    monkeypatch.setattr(
+        admin, "supabase", SimpleNamespace(table=lambda name: query)
+    )
+
+    after = admin.encode_cursor(["user"])
+    users, next_cursor = admin.list_users("us_", "username", after, limit=2)
+
+    assert users == rows[:2]
+    assert admin.decode_cursor(next_cursor) == ["user1"]
+    assert query.calls == [
+        ("select", ("id, username, is_admin",), {}),
+        ("ilike", ("username", "us\\_%"), {}),
+        ("or_", ('username.gt."user"',), {}),
+        ("order", ("username",), {"desc": False}),
+        ("limit", (3,), {}),
+    ]
+
+    query.rows = rows[:1]
+    assert admin.list_users(limit=2) == (rows[:1], None)
+
+
+class FakeProfiles:
+    """In-memory ``profiles`` table applying the filters role paging uses."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def table(self, name):
+        rows = self.rows
+
+        class Query(FakeQuery):
+            def __init__(self):
+                super().__init__(rows)
+
+            def filter(self, column, operator, value):
+                assert (column, value) == ("is_admin", "true")
+                wanted = operator == "is"
+                self.rows = [
+                    r for r in self.rows if (r["is_admin"] is True) == wanted
+                ]
+                return self
+
+            def gt(self, column, value):
+                self.rows = [r for r in self.rows if r[column] > value]
+                return self
+
+            def order(self, column):
+                self.rows = sorted(self.rows, key=lambda r: r[column])
+                return self
+
+            def limit(self, count):
+                self.rows = self.rows[:count]
+                return self
+
+        return Query()
+
+
+def make_profiles():
+    """Two admins and three users, one with a NULL ``is_admin``."""
+    return FakeProfiles(
+        [
+            {"id": 1, "username": "zoe", "is_admin": True},
+            {"id": 2, "username": "amy", "is_admin": True},
+            {"id": 3, "username": "bob", "is_admin": None},
+            {"id": 4, "username": "cat", "is_admin": False},
+            {"id": 5, "username": "abe", "is_admin": False},
+        ]
+    )
+
+
+def test_role_sort_pages_through_users_with_a_null_role(monkeypatch):
+    """Ensure no user is skipped when paging by role."""
+    monkeypatch.setattr(admin, "supabase", make_profiles())
+    seen, after = [], None
+    while True:
+        users, after = admin.list_users(sort="role", after=after, limit=2)
+        seen.extend(user["username"] for user in users)
+        if after is None:
+            break
+    assert seen == ["amy", "zoe", "abe", "bob", "cat"]
+
+
+def test_users_endpoint_returns_a_page_and_a_cursor(monkeypatch):
+    """Ensure /api/users answers with ``users`` and a usable ``next``."""
+    monkeypatch.setattr(admin, "supabase", make_profiles())
+    app = Flask(__name__)
+    app.secret_key = "test_secret_key"
+    app.register_blueprint(admin.admin_bp)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session.update(user_id=1, username="zoe", is_admin=True)
+
+    first = client.get("/api/users?sort=role&limit=3").get_json()
+    assert set(first) == {"users", "next"}
+    assert [user["username"] for user in first["users"]] == [
+        "amy",
+        "zoe",
+        "abe",
+    ]
+    assert set(first["users"][0]) == {"id", "username", "is_admin"}
+
+    second = client.get(
+        f"/api/users?sort=role&limit=3&after={first['next']}"
+    ).get_json()
+    assert second == {
+        "users": [
+            {"id": 3, "username": "bob", "is_admin": None},
+            {"id": 4, "username": "cat", "is_admin": False},
+        ],
+        "next": None,
+    }
+    assert client.get("/api/users?sort=age").status_code == 400
+    assert client.get("/api/users?after=bad").status_code == 400
+
+
+class FakeTables:
+    """In-memory tables that apply ``in_`` and ``eq`` filters."""
+
+    def __init__(self, profiles, fail_on=(), watchlist=()):
+        self.rows = {"profiles": profiles, "watchlist": list(watchlist)}
+        self.fail_on = fail_on
+        self.writes = []
+
+    def table(self, name):
+        tables = self
+
+        class Query(FakeQuery):
+            def __init__(self):
+                super().__init__(tables.rows[name])
+                self.filters = {}
+
+            def in_(self, column, values):
+                self.filters[column] = set(values)
+                return self
+
+            def eq(self, column, value):
+                self.filters[column] = {value}
+                return self
+
+            def execute(self):
+                if self.calls and self.calls[0][0] != "select":
+                    tables.writes.append((name, self.calls, self.filters))
+                    if (name, self.filters) in tables.fail_on:
+                        raise RuntimeError("write failed")
+                    return SimpleNamespace(data=[])
+                return SimpleNamespace(
+                    data=[
+                        row
+                        for row in self.rows
+                        if all(
+                            str(row[column]) in values
+                            for column, values in self.filters.items()
+                        )
+                    ]
+                )
+
+        return Query()
+
+
+def test_parse_bulk_operations_rejects_bad_batches():
+    """Ensure malformed batches are refused before touching the database."""
+    for payload in (
+        None,
+        {"operations": []},
+        {"operations": [{"action": "delete"}]},
+        {"operations": [{"action": "ban", "id": 1}]},
+        {"operations": [{"action": "delete", "id": 1}] * 2},
+    ):
+        with pytest.raises(ValueError):
+            admin.parse_bulk_operations(payload)
+
+
+def test_bulk_operations_validate_once_and_group_writes(monkeypatch):
+    """Ensure a mixed batch reports per-user results and salts each hash."""
+    tables = FakeTables(
+        [
+            {"id": 1, "username": "root", "is_admin": True},
+            {"id": 2, "username": "spam1", "is_admin": False},
+            {"id": 3, "username": "spam2", "is_admin": False},
+            {"id": 4, "username": "carol", "is_admin": False},
+            {"id": 5, "username": "dave", "is_admin": False},
+            {"id": 6, "username": "erin", "is_admin": False},
+            {"id": 7, "username": "frank", "is_admin": False},
+        ],
+        watchlist=[
+            {"username": "spam1", "showId": "s1"},
+            {"username": "carol", "showId": "s2"},
+        ],
+    )
+    changes = []
+    monkeypatch.setattr(admin, "supabase", tables)
+    monkeypatch.setattr(
+        admin.password_hasher,
+        "hash_many",
+        lambda passwords: [f"hash:{p}" for p in passwords],
+    )
+    monkeypatch.setattr(admin, "revoke_user_sessions", lambda user_id: None)
+    monkeypatch.setattr(
+        admin,
+        "notify_watchlist_change",
+        lambda *change: changes.append(change),
+    )
+
+    operations = admin.parse_bulk_operations(
+        {
+            "operations": [
+                {"action": "delete", "id": 1},
+                {"action": "delete", "id": 2},
+                {"action": "delete", "id": 3},
+                {"action": "delete", "id": 99},
+                {"action": "reset_password", "id": 4, "newPassword": "x"},
+                {"action": "rename", "id": 5, "newUsername": "carol"},
+                {
+                    "action": "reset_password",
+                    "id": 6,
+                    "newPassword": "Pass123!",
+                },
+                {
+                    "action": "reset_password",
+                    "id": 7,
+                    "newPassword": "Pass123!",
+                },
+            ]
+        }
+    )
+    results = admin.run_bulk_operations(operations, "root")
+
+    assert results == {
+        "1": {"ok": False, "error": "You cannot delete yourself!"},
+        "2": {"ok": True},
+        "3": {"ok": True},
+        "99": {"ok": False, "error": "User not found"},
+        "4": {
+            "ok": False,
+            "error": "Password must be at least 8 characters long",
+        },
+        "5": {"ok": False, "error": "Username already exists"},
+        "6": {"ok": True},
+        "7": {"ok": True},
+    }
+    assert [(name, filters) for name, _, filters in tables.writes] == [
+        ("watchlist", {"username": {"spam1", "spam2"}}),
+        ("profiles", {"id": {2, 3}}),
+        ("profiles", {"id": {6}}),
+        ("profiles", {"id": {7}}),
+    ]
+    assert tables.writes[2][1][0] == (
+        "update",
+        ({"password": "hash:Pass123!"},),
+        {"returning": admin.ReturnMethod.minimal},
+    )
+    assert changes == [("spam1", "s1", "remove")]
+
+
+def test_bulk_rename_reports_and_undoes_failures_per_user(monkeypatch):
+    """Ensure one failed rename is rolled back without failing the rest."""
+    tables = FakeTables(
+        [
+            {"id": 1, "username": "amy", "is_admin": False},
+            {"id": 2, "username": "ben", "is_admin": False},
+        ],
+        fail_on=[("watchlist", {"username": {"amy"}})],
+    )
+    revoked = []
+    renamed = []
+    monkeypatch.setattr(admin, "supabase", tables)
+    monkeypatch.setattr(admin, "revoke_user_sessions", revoked.append)
+    monkeypatch.setattr(
+        admin, "track_user_renamed", lambda old, new: renamed.append(old)
+    )
+    monkeypatch.setattr(admin, "track_username_renamed", lambda old, new: None)
+
+    operations = admin.parse_bulk_operations(
+        {
+            "operations": [
+                {"action": "rename", "id": 1, "newUsername": "amelia"},
+                {"action": "rename", "id": 2, "newUsername": "benjamin"},
+            ]
+        }
+    )
+    results = admin.run_bulk_operations(operations, "root")
+
+    assert results == {
+        "1": {"ok": False, "error": "Failed to update username"},
+        "2": {"ok": True},
+    }
+    assert [
+        (name, calls[0][1][0], filters)
+        for name, calls, filters in tables.writes
+    ] == [
+        ("profiles", {"username": "amelia"}, {"id": {1}}),
+        ("watchlist", {"username": "amelia"}, {"username": {"amy"}}),
+        ("profiles", {"username": "amy"}, {"id": {1}}),
+        ("profiles", {"username": "benjamin"}, {"id": {2}}),
+        ("watchlist", {"username": "benjamin"}, {"username": {"ben"}}),
+    ]
+    assert revoked == [2]
+    assert renamed == ["ben"]
+
+
+def test_bulk_reset_answers_503_when_hashing_is_busy(monkeypatch):
+    """Ensure a saturated hasher rejects the batch before any write."""
+    tables = FakeTables([{"id": 1, "username": "amy", "is_admin": False}])
+    monkeypatch.setattr(admin, "supabase", tables)
+
+    def busy(passwords):
+        list(passwords)
+        raise admin.PasswordHashingBusy(7)
+
+    monkeypatch.setattr(admin.password_hasher, "hash_many", busy)
+    app = Flask(__name__)
+    app.secret_key = "test_secret_key"
+    app.register_blueprint(admin.admin_bp)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session.update(user_id=9, username="zoe", is_admin=True)
+
+    response = client.post(
+        "/api/users/bulk",
+        json={
+            "operations": [
+                {"action": "reset_password", "id": 1, "newPassword": "x" * 8}
+            ]
+        },
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+    assert tables.writes == []
@@ -0,0 +1,49 @@
+import json
+
+import httpx
+
+from src.async_watchlist import AsyncWatchlistService, SyncWatchlistService
+
+
+def make_service(handler):
+    """Build a sync facade whose requests are answered by ``handler``."""
+    return SyncWatchlistService(
+        AsyncWatchlistService(
+            "http://watchlist.test", transport=httpx.MockTransport(handler)
+        )
+    )
+
+
+def test_async_watchlist_service_matches_sync_surface():
+    """Ensure the facade returns the same shapes as WatchlistService."""
+
+    def handler(request):
+        if request.url.path == "/watchlist/testuser":
+            return httpx.Response(
+                200, json={"entries": [{"showId": "s1", "watched": False}]}
+            )
+        if request.url.path == "/watchlist/batch":
+            show_ids = json.loads(request.content)["showIds"]
+            return httpx.Response(
+                200, json={sid: {"in_watchlist": True} for sid in show_ids}
+            )
+        return httpx.Response(200, json={"ok": True})
+
+    service = make_service(handler)
+    assert service.get_watchlist("testuser") == [
+        {"showId": "s1", "watched": False}
+    ]
+    assert service.add_to_watchlist("testuser", "s2") is True
+    assert service.batch_check_watchlist_status("testuser", ["s1"]) == {
+        "s1": {"in_watchlist": True}
+    }
+
+
+def test_async_watchlist_service_falls_back_on_errors():
+    """Ensure backend failures return the same fallbacks as the sync client."""
+    service = make_service(lambda request: httpx.Response(500))
+    assert service.get_watchlist("testuser") == []
+    assert service.remove_from_watchlist("testuser", "s1") is False
+    assert service.batch_check_watchlist_status("testuser", ["s1"]) == {
+        "s1": {"in_watchlist": False, "watched": False}
+    }
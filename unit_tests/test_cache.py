@@ -0,0 +1,85 @@
+import time
+from src.cache import LRUCache, RefreshingValue
+
+
+def test_lru_cache_hit_and_miss():
+    """Ensure cached values are returned and lookups are counted."""
+    cache = LRUCache(maxsize=2)
+    cache.set("s1", {"title": "Test Movie"})
+
+    assert cache.get("s1") == {"title": "Test Movie"}
+    assert cache.get("s2") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Ensure the least recently used entry is evicted when full."""
+    cache = LRUCache(maxsize=2)
+    cache.set("s1", 1)
+    cache.set("s2", 2)
+    cache.get("s1")  # s2 is now the least recently used
+    cache.set("s3", 3)
+
+    assert cache.get("s2") is None
+    assert cache.get("s1") == 1
+    assert cache.get("s3") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_cache_ttl_expiry():
+    """Ensure entries older than the TTL are treated as missing."""
+    cache = LRUCache(maxsize=10, ttl=0.05)
+    cache.set("s1", 1)
+    assert cache.get("s1") == 1
+
+    time.sleep(0.1)
+    assert cache.get("s1") is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_refreshing_value_keeps_last_good_snapshot():
+    """Ensure a failed refresh keeps serving the previous value."""
+    state = {"fail": False, "calls": 0}
+
+    def loader():
+        state["calls"] += 1
+        if state["fail"]:
+            raise RuntimeError("backend down")
+        return ["Dramas", "Comedies"]
+
+    value = RefreshingValue(loader, ttl=3600, default=[])
+    assert value.get() == ["Dramas", "Comedies"]
+
+    state["fail"] = True
+    assert value.refresh() is False
+    assert value.get() == ["Dramas", "Comedies"]
+    assert state["calls"] == 2
+
+
+def test_refreshing_value_default_before_first_load():
+    """Ensure the default is returned if the first load fails."""
+
+    def loader():
+        raise RuntimeError("backend down")
+
+    value = RefreshingValue(loader, ttl=3600, default=[])
+    assert value.get() == []
+
+
+def test_lru_cache_serves_stale_entries_within_grace_period():
+    """Ensure lookup() returns stale entries until the stale window ends."""
+    cache = LRUCache(maxsize=10, ttl=0.05, stale_ttl=0.2)
+    cache.set("page1", ["Test Movie"])
+    assert cache.lookup("page1") == (["Test Movie"], True)
+
+    time.sleep(0.1)
+    assert cache.lookup("page1") == (["Test Movie"], False)
+    assert cache.get("page1") is None  # get() only returns fresh values
+
+    time.sleep(0.2)
+    assert cache.lookup("page1") == (None, False)
+    assert cache.stats()["stale_hits"] == 1
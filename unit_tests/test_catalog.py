@@ -0,0 +1,68 @@
+from src.catalog import CatalogSnapshot
+
+
+def make_catalog():
+    """Build a small catalog snapshot for filter tests."""
+    return CatalogSnapshot(
+        [
+            {
+                "showId": "s1",
+                "title": "The Office (U.S.)",
+                "type": "TV Show",
+                "listedIn": "TV Comedies",
+                "releaseYear": 2005,
+            },
+            {
+                "showId": "s2",
+                "title": "Test Movie",
+                "type": "Movie",
+                "listedIn": "Action & Adventure, Dramas",
+                "releaseYear": 2024,
+            },
+            {
+                "showId": "s3",
+                "title": "Another Test",
+                "type": "Movie",
+                "listedIn": "Comedies",
+                "releaseYear": 2024,
+            },
+        ]
+    )
+
+
+def test_catalog_filters_by_title_substring():
+    """Ensure titles match as case-insensitive substrings."""
+    catalog = make_catalog()
+    page = catalog.page({"title": "TEST", "page": 1, "per_page": 10})
+    assert [movie["showId"] for movie in page["movies"]] == ["s2", "s3"]
+
+
+def test_catalog_filters_by_type_spelling_variants():
+    """Ensure TV Show type variants all match the same titles."""
+    catalog = make_catalog()
+    for type_value in ("TV Show", "tv", "tvshow"):
+        positions = catalog.filter({"type": type_value})
+        assert [catalog.movies[i]["showId"] for i in positions] == ["s1"]
+
+
+def test_catalog_filters_by_categories_and_year():
+    """Ensure categories match any requested category, combined with year."""
+    catalog = make_catalog()
+    page = catalog.page(
+        {
+            "categories": "Action & Adventure,Comedies",
+            "release_year": "2024",
+            "page": 1,
+            "per_page": 10,
+        }
+    )
+    assert [movie["showId"] for movie in page["movies"]] == ["s2", "s3"]
+
+
+def test_catalog_pagination_metadata():
+    """Ensure pages report totals and whether another page exists."""
+    catalog = make_catalog()
+    first = catalog.page({"page": 1, "per_page": 2})
+    last = catalog.page({"page": 2, "per_page": 2})
+    assert first["total"] == 3 and first["has_next"] is True
+    assert len(last["movies"]) == 1 and last["has_next"] is False
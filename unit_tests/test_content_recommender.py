@@ -0,0 +1,64 @@
+from src.catalog import CatalogSnapshot
+from src.content_recommender import ContentIndex, tokenize
+
+
+def make_index():
+    """Build a content index over a few clearly related titles."""
+    return ContentIndex(
+        CatalogSnapshot(
+            [
+                {
+                    "showId": "s1",
+                    "title": "Space Station",
+                    "type": "Movie",
+                    "listedIn": "Sci-Fi & Fantasy",
+                    "releaseYear": 2019,
+                    "description": "Astronauts repair a failing space station.",
+                },
+                {
+                    "showId": "s2",
+                    "title": "Mars Crew",
+                    "type": "Movie",
+                    "listedIn": "Sci-Fi & Fantasy, Dramas",
+                    "releaseYear": 2017,
+                    "description": "Astronauts stranded on a space mission.",
+                },
+                {
+                    "showId": "s3",
+                    "title": "Bake Off",
+                    "type": "TV Show",
+                    "listedIn": "Reality TV",
+                    "releaseYear": 2010,
+                    "description": "Amateur bakers compete in a kitchen.",
+                },
+                {
+                    "showId": "s4",
+                    "title": "Kitchen Wars",
+                    "type": "TV Show",
+                    "listedIn": "Reality TV",
+                    "releaseYear": 2012,
+                    "description": "Chefs compete in a busy kitchen.",
+                },
+            ]
+        ),
+        neighbours=2,
+    )
+
+
+def test_tokenize_drops_short_words_and_stop_words():
+    """Ensure descriptions are reduced to meaningful lowercase terms."""
+    assert tokenize("The crew of a Space station") == [
+        "crew",
+        "space",
+        "station",
+    ]
+
+
+def test_content_index_recommends_similar_catalog_titles():
+    """Ensure the closest titles are recommended, excluding the watchlist."""
+    index = make_index()
+    assert [m["showId"] for m, _ in index.recommend(["s1"], k=1)] == ["s2"]
+    assert [m["showId"] for m, _ in index.recommend(["s3"], k=1)] == ["s4"]
+    recommended = index.recommend(["s1", "s2"], k=3)
+    assert {m["showId"] for m, _ in recommended}.isdisjoint({"s1", "s2"})
+    assert index.recommend(["unknown"]) == []
@@ -0,0 +1,47 @@
+from src.cooccurrence import CooccurrenceModel
+
+
+def make_model():
+    """Build a model from a few users' watchlists."""
+    return CooccurrenceModel(
+        [
+            ("alice", "s1"),
+            ("alice", "s2"),
+            ("bob", "s1"),
+            ("bob", "s2"),
+            ("bob", "s3"),
+            ("carol", "s3"),
+            ("carol", "s4"),
+        ]
+    )
+
+
+def test_cooccurrence_recommends_titles_saved_together():
+    """Ensure titles saved by the same users are recommended first."""
+    model = make_model()
+    assert model.recommend(["s1"], k=2) == [("s2", 1.0), ("s3", 0.5)]
+    assert [show_id for show_id, _ in model.recommend(["s1", "s2"])] == ["s3"]
+    assert model.recommend(["unknown"]) == []
+
+
+def test_cooccurrence_updates_incrementally():
+    """Ensure adds and removes give the same counts as a full rebuild."""
+    model = make_model()
+    model.add("carol", "s1")
+    model.remove("bob", "s3")
+    model.add("alice", "s1")  # already saved, ignored
+
+    rebuilt = CooccurrenceModel(
+        [
+            ("alice", "s1"),
+            ("alice", "s2"),
+            ("bob", "s1"),
+            ("bob", "s2"),
+            ("carol", "s3"),
+            ("carol", "s4"),
+            ("carol", "s1"),
+        ]
+    )
+    assert model.pairs == rebuilt.pairs
+    assert model.savers == rebuilt.savers
+    assert model.stats() == {"users": 3, "titles": 4, "pairs": 4}
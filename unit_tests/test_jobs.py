@@ -0,0 +1,48 @@
+import threading
+import time
+
+from src.jobs import JobQueue, RateLimiter, ResultStore
+
+
+def test_rate_limiter_allows_burst_then_waits():
+    """Ensure calls beyond the burst have to wait for tokens to refill."""
+    limiter = RateLimiter(rate=2, per=1.0)
+    assert limiter.acquire(timeout=0) is True
+    assert limiter.acquire(timeout=0) is True
+    assert limiter.acquire(timeout=0) is False
+    assert limiter.acquire(timeout=1) is True
+
+
+def test_result_store_round_trip(tmp_path):
+    """Ensure stored values come back with their age and can be purged."""
+    store = ResultStore("results", path=str(tmp_path / "jobs.sqlite3"))
+    store.set("fingerprint", [{"title": "Test Movie"}])
+    value, age = store.get("fingerprint")
+    assert value == [{"title": "Test Movie"}]
+    assert 0 <= age < 5
+
+    store.purge(max_age=-1)
+    assert store.get("fingerprint") == (None, None)
+
+
+def test_job_queue_runs_duplicate_triggers_once(tmp_path):
+    """Ensure repeated triggers for a pending job run it a single time."""
+    queue = JobQueue(
+        path=str(tmp_path / "jobs.sqlite3"), workers=1, poll_interval=0.05
+    )
+    done = threading.Event()
+    runs = []
+
+    def handler(key):
+        runs.append(key)
+        done.set()
+
+    queue.register("recommendations", handler)
+    for _ in range(3):
+        queue.enqueue("recommendations", "testuser", delay=0.2)
+    assert queue.stats()["pending"] == 1
+
+    assert done.wait(timeout=5)
+    time.sleep(0.2)
+    assert runs == ["testuser"]
+    assert queue.stats() == {"completed": 1, "failed": 0}
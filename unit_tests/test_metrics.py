@@ -0,0 +1,122 @@
+import subprocess
+import sys
+
+from flask import Flask
+
+import src.metrics as metrics_module
+from src.metrics import Metrics, dump_values, init_metrics, render
+from src.upstream import upstream_name
+
+
+def test_render_histograms_counters_and_gauges(tmp_path):
+    """Ensure values render in the Prometheus text format."""
+    registry = Metrics(path=str(tmp_path / "metrics.sqlite3"))
+    registry.observe("upstream_request_duration_seconds", ("gemini",), 0.3)
+    registry.observe("upstream_request_duration_seconds", ("gemini",), 40)
+    registry.inc("upstream_errors_total", ("gemini", 'Time"out'))
+    registry.inc("http_requests_in_flight", amount=2)
+
+    text = render(registry.values())
+
+    assert "# TYPE upstream_request_duration_seconds histogram" in text
+    assert (
+        'upstream_request_duration_seconds_bucket{upstream="gemini",le="0.25"}'
+        " 0"
+    ) in text
+    assert (
+        'upstream_request_duration_seconds_bucket{upstream="gemini",le="0.5"}'
+        " 1"
+    ) in text
+    assert (
+        'upstream_request_duration_seconds_bucket{upstream="gemini",le="+Inf"}'
+        " 2"
+    ) in text
+    assert (
+        'upstream_request_duration_seconds_count{upstream="gemini"} 2'
+    ) in text
+    assert (
+        'upstream_errors_total{upstream="gemini",error="Time\\"out"} 1'
+    ) in text
+    assert "http_requests_in_flight 2" in text
+
+
+def test_collect_adds_up_workers_and_retires_exited_ones(tmp_path):
+    """Ensure exited workers keep their counters but lose their gauges."""
+    path = str(tmp_path / "metrics.sqlite3")
+    registry = Metrics(path=path)
+    registry.inc("upstream_errors_total", ("supabase", "http_503"))
+    registry.inc("upstream_requests_in_flight", ("supabase",))
+
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    with registry._connect() as connection:
+        connection.execute(
+            "INSERT INTO metrics VALUES (?, ?, 0, ?)",
+            (
+                "old-worker",
+                exited.pid,
+                dump_values(
+                    {
+                        "upstream_errors_total": {("supabase", "http_503"): 2},
+                        "upstream_requests_in_flight": {("supabase",): 5},
+                    }
+                ),
+            ),
+        )
+
+    for _ in range(2):
+        values = registry.collect()
+        assert values["upstream_errors_total"] == {("supabase", "http_503"): 3}
+        assert values["upstream_requests_in_flight"] == {("supabase",): 1}
+
+    with registry._connect() as connection:
+        processes = connection.execute(
+            "SELECT process FROM metrics"
+        ).fetchall()
+    assert "old-worker" not in {process for (process,) in processes}
+
+
+def test_requests_are_recorded_per_endpoint(tmp_path, monkeypatch):
+    """Ensure the Flask hooks label requests and protect /metrics."""
+    registry = Metrics(path=str(tmp_path / "metrics.sqlite3"))
+    monkeypatch.setattr(metrics_module, "metrics", registry)
+    monkeypatch.setattr(metrics_module, "METRICS_TOKEN", "secret")
+    app = Flask(__name__)
+    init_metrics(app)
+
+    @app.route("/ok")
+    def ok():
+        return "ok"
+
+    @app.route("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    client = app.test_client()
+    client.get("/ok")
+    client.get("/boom")
+    client.get("/missing")
+
+    assert client.get("/metrics").status_code == 401
+    response = client.get(
+        "/metrics", headers={"Authorization": "Bearer secret"}
+    )
+    text = response.get_data(as_text=True)
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    assert 'endpoint="ok",method="GET",status="200"} 1' in text
+    assert 'endpoint="boom",method="GET",status="500"} 1' in text
+    assert 'endpoint="unmatched",method="GET",status="404"} 1' in text
+    assert "http_requests_in_flight 1" in text
+
+
+def test_upstream_name_prefers_the_longest_base_url():
+    """Ensure backends sharing a host are told apart by path."""
+    names = {
+        "http://api.local": "watchlist_api",
+        "http://api.local/movies": "movie_api",
+    }
+    assert upstream_name("http://api.local/movies/42", names) == "movie_api"
+    assert upstream_name("http://api.local/watchlist", names) == (
+        "watchlist_api"
+    )
+    assert upstream_name("https://other.host/x", names) == "other.host"
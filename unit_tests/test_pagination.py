@@ -0,0 +1,49 @@
+import threading
+
+import src.database as database
+
+MOVIES = [{"showId": str(i), "title": f"Title {i}"} for i in range(5)]
+
+
+def serve_without_metadata(monkeypatch):
+    """Answer movie requests with bare pages and record the pages asked."""
+    requested = []
+    lock = threading.Lock()
+
+    def request_movies(params):
+        page, per_page = int(params["page"]), int(params["per_page"])
+        with lock:
+            requested.append(page)
+        start = (page - 1) * per_page
+        return {"movies": [dict(m) for m in MOVIES[start : start + per_page]]}
+
+    monkeypatch.setattr(database, "_request_movies", request_movies)
+    monkeypatch.setattr(database, "_backend_pagination", {"reported": False})
+    monkeypatch.setattr(database, "PREFETCH_ENABLED", True)
+    database.results_cache.clear()
+    database.prefetch_cache.clear()
+    return requested
+
+
+def test_next_page_is_ready_without_blocking_on_upstream(monkeypatch):
+    """Ensure "Next" is served from memory with has_next already known."""
+    requested = serve_without_metadata(monkeypatch)
+    first = {"page": 1, "per_page": 2}
+
+    page = database._get_movies_page(first)
+    assert page["has_next"] is True
+    assert sorted(requested) == [1, 2]
+
+    for number, has_next in ((2, True), (3, False)):
+        previous = {"page": number - 1, "per_page": 2}
+        database._prefetch_next_page(previous, page)
+        params = {"page": number, "per_page": 2}
+        database._wait_for_prefetch(database._results_cache_key(params))
+        asked = len(requested)
+
+        page = database._get_movies_page(params)
+        assert page["has_next"] is has_next
+        assert len(requested) == asked
+
+    # Each page was requested once, and never the empty page after them
+    assert sorted(requested) == [1, 2, 3]
@@ -0,0 +1,79 @@
+import threading
+import time
+
+import bcrypt
+import pytest
+
+from src.passwords import PasswordHasher, PasswordHashingBusy, hash_rounds
+
+
+def test_hash_verify_and_rehash_check():
+    """Ensure hashes use the configured cost and old costs need rehashing."""
+    hasher = PasswordHasher(rounds=4, workers=1, queue_size=1)
+    hashed = hasher.hash("TestPass123!")
+    assert hash_rounds(hashed) == 4
+    assert hasher.verify("TestPass123!", hashed)
+    assert not hasher.verify("wrong", hashed)
+    assert not hasher.needs_rehash(hashed)
+
+    legacy = bcrypt.hashpw(b"TestPass123!", bcrypt.gensalt(5)).decode()
+    assert hasher.verify("TestPass123!", legacy)
+    assert hasher.needs_rehash(legacy)
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    """Ensure calls beyond the queue capacity fail fast instead of waiting."""
+    hasher = PasswordHasher(rounds=4, workers=1, queue_size=0)
+    waiting = threading.Thread(target=hasher._call, args=(time.sleep, 1))
+    waiting.start()
+    while hasher.stats()["in_flight"] == 0:
+        time.sleep(0.01)
+
+    with pytest.raises(PasswordHashingBusy) as busy:
+        hasher.hash("TestPass123!")
+    assert busy.value.retry_after >= 1
+    assert hasher.stats()["rejected"] == 1
+
+    waiting.join()
+    assert hasher.stats()["in_flight"] == 0
+
+
+def test_timed_out_call_keeps_its_slot_until_the_helper_finishes():
+    """Ensure giving up on a call does not free capacity early."""
+    hasher = PasswordHasher(rounds=4, workers=1, queue_size=0, timeout=0.1)
+    with pytest.raises(TimeoutError):
+        hasher._call(time.sleep, 1)
+    assert hasher.stats()["in_flight"] == 1
+    with pytest.raises(PasswordHashingBusy):
+        hasher.hash("TestPass123!")
+
+    while hasher.stats()["in_flight"]:
+        time.sleep(0.05)
+    hasher.timeout = 5
+    assert hash_rounds(hasher.hash("TestPass123!")) == 4
+
+
+def test_hash_many_salts_each_password_and_keeps_the_order():
+    """Ensure batch hashing returns one distinct, matching hash per input."""
+    hasher = PasswordHasher(rounds=4, workers=2, queue_size=0)
+    passwords = ["Same1234!", "Same1234!", "Other123!"]
+    hashes = hasher.hash_many(passwords)
+
+    assert len(set(hashes)) == 3
+    assert all(map(hasher.verify, passwords, hashes))
+    assert hasher.stats()["hashed"] == 3
+
+
+def test_replaced_pool_does_not_release_new_slots():
+    """Ensure calls on a replaced pool can't push the count below zero."""
+    hasher = PasswordHasher(rounds=4, workers=1, queue_size=1)
+    old_call = threading.Thread(target=hasher._call, args=(time.sleep, 1))
+    old_call.start()
+    while hasher.stats()["in_flight"] == 0:
+        time.sleep(0.01)
+
+    hasher._pid = None  # as after a fork or a broken pool
+    assert hash_rounds(hasher.hash("TestPass123!")) == 4
+    old_call.join()
+    time.sleep(0.2)  # let the old call's done-callback run
+    assert hasher.stats()["in_flight"] == 0
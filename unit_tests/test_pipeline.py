@@ -0,0 +1,37 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.pipeline import DeadlinePipeline
+
+executor = ThreadPoolExecutor(max_workers=4)
+
+
+def test_pipeline_stage_falls_back_after_deadline():
+    """Ensure a stage that overruns the budget returns its default."""
+    pipeline = DeadlinePipeline("test", 0.1, executor)
+    assert pipeline.run("fast", lambda: "done") == "done"
+    assert pipeline.run("slow", time.sleep, 1, default="late") == "late"
+    assert pipeline.run("after", lambda: "done", default="skipped") == (
+        "skipped"
+    )
+    assert pipeline.degraded == ["slow", "after"]
+    assert set(pipeline.finish()) == {"fast", "slow", "after"}
+
+
+def test_pipeline_map_returns_partial_results():
+    """Ensure fan-out stages keep the results that arrived in time."""
+    pipeline = DeadlinePipeline("test", 0.2, executor)
+
+    def lookup(delay):
+        if delay < 0:
+            raise ValueError("bad item")
+        time.sleep(delay)
+        return delay
+
+    assert pipeline.map("lookup", lookup, [0, 1, 0.01, -1]) == [
+        0,
+        None,
+        0.01,
+        None,
+    ]
+    assert pipeline.degraded == ["lookup"]
@@ -0,0 +1,107 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import src.recommendations as recommendations
+from src.jobs import ResultStore
+from src.pipeline import DeadlinePipeline
+from src.recommendations import (
+    _annotate_via_index,
+    mark_watchlist_membership,
+    recommendation_cache,
+    watchlist_fingerprint,
+)
+from src.title_index import TitleIndex
+from src.watchlist import notify_watchlist_change
+
+
+def test_watchlist_fingerprint_ignores_order_and_watched_status():
+    """Ensure the same set of titles always gives the same fingerprint."""
+    first = watchlist_fingerprint(
+        [{"showId": "s1", "watched": True}, {"showId": "s2"}]
+    )
+    second = watchlist_fingerprint(
+        [{"showId": "s2", "watched": False}, {"showId": "s1"}]
+    )
+    assert first == second
+    assert first != watchlist_fingerprint([{"showId": "s1"}])
+
+
+def test_watchlist_change_keeps_results_shared_by_other_users():
+    """Ensure one user's change doesn't evict a watchlist's cached result."""
+    fingerprint = watchlist_fingerprint([{"showId": "s1"}])
+    recommendation_cache.set(fingerprint, [{"title": "Test Movie"}])
+
+    notify_watchlist_change("testuser", "s2", "add")
+    assert recommendation_cache.get(fingerprint) == [{"title": "Test Movie"}]
+    assert (
+        recommendation_cache.get(
+            watchlist_fingerprint([{"showId": "s1"}, {"showId": "s2"}])
+        )
+        is None
+    )
+
+
+def test_annotate_via_index_reads_membership_from_the_watchlist():
+    """Ensure matched titles are flagged from the watchlist in hand."""
+    index = TitleIndex(
+        [
+            {"showId": "s1", "title": "Breaking Bad"},
+            {"showId": "s2", "title": "The Office (U.S.)"},
+        ]
+    )
+    recommendations_json = [
+        {"title": "Breaking Bad"},
+        {"title": "The Office"},
+        {"title": "Inception"},
+    ]
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pipeline = DeadlinePipeline("test", 5, executor)
+        _annotate_via_index(
+            index, recommendations_json, pipeline, [{"showId": "s2"}]
+        )
+    assert [rec.get("showId") for rec in recommendations_json] == [
+        "s1",
+        "s2",
+        None,
+    ]
+    assert recommendations_json[0]["in_watchlist"] is False
+    assert recommendations_json[1]["in_watchlist"] is True
+
+
+def test_membership_is_read_from_the_current_watchlist():
+    """Ensure cached flags are replaced by the watchlist just read."""
+    cached = [
+        {"showId": "s1", "in_watchlist": False},
+        {"showId": "s2", "in_watchlist": True},
+        {"title": "Not in catalog", "in_watchlist": True},
+    ]
+    marked = mark_watchlist_membership(cached, [{"showId": "s1"}])
+    assert [rec["in_watchlist"] for rec in marked] == [True, False, False]
+
+
+def test_stored_recommendations_survive_watchlist_changes(
+    tmp_path, monkeypatch
+):
+    """Ensure a changed watchlist serves the last result and queues a job."""
+    enqueued = []
+    monkeypatch.setattr(
+        recommendations,
+        "recommendation_store",
+        ResultStore("user_recommendations", str(tmp_path / "jobs.sqlite3")),
+    )
+    monkeypatch.setattr(
+        recommendations,
+        "recommendation_jobs",
+        SimpleNamespace(enqueue=lambda kind, key: enqueued.append(key)),
+    )
+    old = watchlist_fingerprint([{"showId": "s1"}])
+    new = watchlist_fingerprint([{"showId": "s1"}, {"showId": "s2"}])
+    recommendations._remember_recommendations(
+        old, [{"title": "Old pick"}], "testuser"
+    )
+
+    assert recommendations._stored_recommendations(new, "testuser") == [
+        {"title": "Old pick"}
+    ]
+    assert enqueued == ["testuser"]
+    assert recommendations._stored_recommendations(new, "nobody") is None
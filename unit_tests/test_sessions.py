@@ -0,0 +1,74 @@
+from flask import Flask, jsonify, session
+
+from src.sessions import init_sessions, revoke_user_sessions, start_session
+
+USER = {"id": 7, "username": "alice", "password": "hash", "is_admin": False}
+
+
+def make_app(backend, tmp_path):
+    """Build a minimal app with login and revoke routes."""
+    app = Flask(__name__)
+    app.config["SECRET_KEY"] = "test_secret_key"
+    app.config["SESSION_DB_PATH"] = str(tmp_path / "sessions.sqlite3")
+    init_sessions(app, backend)
+
+    @app.route("/login")
+    def login():
+        start_session(USER)
+        return "ok"
+
+    @app.route("/me")
+    def me():
+        return jsonify(dict(session))
+
+    @app.route("/revoke")
+    def revoke():
+        revoke_user_sessions(USER["id"])
+        return "ok"
+
+    return app
+
+
+def test_sqlite_sessions_keep_only_an_id_in_the_cookie(tmp_path):
+    """Ensure the profile snapshot is stored server-side and revocable."""
+    client = make_app("sqlite", tmp_path).test_client()
+    client.get("/login")
+    cookie = client.get_cookie("session").value
+    assert "alice" not in cookie and len(cookie) < 64
+
+    data = client.get("/me").get_json()
+    assert data["username"] == "alice"
+    assert data["profile"] == {"id": 7, "username": "alice", "is_admin": False}
+
+    other = make_app("sqlite", tmp_path).test_client()
+    other.get("/login")
+    assert other.get_cookie("session").value != cookie
+
+    client.get("/revoke")
+    assert "username" not in client.get("/me").get_json()
+    assert "username" not in other.get("/me").get_json()
+
+
+def test_filesystem_sessions(tmp_path, monkeypatch):
+    """Ensure the filesystem backend round-trips the session."""
+    monkeypatch.setattr("src.sessions.SESSION_FILE_DIR", str(tmp_path))
+    client = make_app("filesystem", tmp_path).test_client()
+    client.get("/login")
+    assert "alice" not in client.get_cookie("session").value
+    assert client.get("/me").get_json()["user_id"] == 7
+
+
+def test_cookie_sessions_can_be_revoked(tmp_path):
+    """Ensure a revocation logs out cookie sessions issued before it."""
+    app = make_app("cookie", tmp_path)
+    client, other = app.test_client(), app.test_client()
+    client.get("/login")
+    other.get("/login")
+    assert other.get("/me").get_json()["username"] == "alice"
+
+    client.get("/revoke")
+    assert "username" not in client.get("/me").get_json()
+    assert "username" not in other.get("/me").get_json()
+
+    client.get("/login")
+    assert client.get("/me").get_json()["username"] == "alice"
@@ -0,0 +1,39 @@
+from src.title_index import TitleIndex, normalise_title
+
+
+def make_index():
+    """Build a small title index for matching tests."""
+    return TitleIndex(
+        [
+            {"showId": "s1", "title": "The Office (U.S.)"},
+            {"showId": "s2", "title": "Breaking Bad"},
+            {"showId": "s3", "title": "Pride & Prejudice"},
+            {"showId": "s4", "title": "Toy Story 3"},
+        ]
+    )
+
+
+def test_normalise_title_ignores_case_articles_and_parentheticals():
+    """Ensure cosmetic differences do not change the title key."""
+    assert normalise_title("The Office (U.S.)") == "office"
+    assert normalise_title("office") == "office"
+    assert normalise_title("Pride & Prejudice") == "pride and prejudice"
+
+
+def test_title_index_resolves_batch_with_scores():
+    """Ensure exact, near and missing titles resolve in one call."""
+    matches = make_index().resolve(
+        ["The Office", "Braking Bad", "Pride and Prejudice", "Inception"]
+    )
+    assert matches[0] == ({"showId": "s1", "title": "The Office (U.S.)"}, 1.0)
+    assert matches[1][0]["showId"] == "s2" and 0.8 <= matches[1][1] < 1
+    assert matches[2][0]["showId"] == "s3"
+    assert matches[3][0] is None
+
+
+def test_title_index_never_matches_a_different_sequel():
+    """Ensure titles that differ only in their number do not match."""
+    index = make_index()
+    assert index.match("Toy Story 2")[0] is None
+    assert index.match("Toy Story III")[0] is None
+    assert index.match("Toy Story 3")[0]["showId"] == "s4"
@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+from postgrest.exceptions import APIError
+
+import src.usernames as usernames
+from src.cache import RefreshingValue
+
+
+def fake_profiles(monkeypatch, taken):
+    """Answer username queries from ``taken`` and record the names asked."""
+    asked = []
+
+    class Query:
+        def __getattr__(self, name):
+            return lambda *args: self
+
+        def eq(self, column, value):
+            asked.append(value)
+            self.value = value
+            return self
+
+        def execute(self):
+            return SimpleNamespace(
+                data=[{"id": 1}] if self.value in taken else []
+            )
+
+    monkeypatch.setattr(
+        usernames, "supabase", SimpleNamespace(table=lambda name: Query())
+    )
+    return asked
+
+
+def test_index_answers_free_names_from_memory(monkeypatch):
+    """Ensure free names cost no query and taken ones are confirmed."""
+    index = usernames.UsernameIndex(["alice", "bob"])
+    monkeypatch.setattr(
+        usernames, "username_index", RefreshingValue(lambda: index, ttl=60)
+    )
+    usernames.username_index.refresh()
+    asked = fake_profiles(monkeypatch, {"alice", "bobby", "carol"})
+
+    assert usernames.username_exists("alice")
+    assert not usernames.username_exists("Alice")
+    usernames.track_username_added("carol")
+    usernames.track_username_renamed("bob", "bobby")
+    usernames.track_username_removed("alice")
+    assert [
+        usernames.username_exists(n) for n in ("carol", "bob", "bobby")
+    ] == [
+        True,
+        False,
+        True,
+    ]
+    assert not usernames.username_exists("alice")
+    assert asked == ["alice", "carol", "bobby"]
+
+
+def test_names_freed_elsewhere_are_not_reported_taken(monkeypatch):
+    """Ensure a stale entry is checked against the table and dropped."""
+    index = usernames.UsernameIndex(["dave"])
+    monkeypatch.setattr(
+        usernames, "username_index", RefreshingValue(lambda: index, ttl=60)
+    )
+    usernames.username_index.refresh()
+    asked = fake_profiles(monkeypatch, set())
+
+    assert not usernames.username_exists("dave")
+    assert "dave" not in index
+    assert not usernames.username_exists("dave")
+    assert asked == ["dave"]
+
+
+def test_falls_back_to_the_database_until_loaded(monkeypatch):
+    """Ensure lookups still work while the index is loading."""
+    monkeypatch.setattr(
+        usernames, "username_index", SimpleNamespace(peek=lambda: None)
+    )
+
+    class Query:
+        def __getattr__(self, name):
+            return lambda *args: self
+
+        def execute(self):
+            return SimpleNamespace(data=[{"id": 1}])
+
+    monkeypatch.setattr(
+        usernames, "supabase", SimpleNamespace(table=lambda name: Query())
+    )
+    assert usernames.username_exists("alice")
+    usernames.track_username_added("alice")  # ignored, nothing to update
+
+    assert usernames.is_unique_violation(APIError({"code": "23505"}))
+    assert not usernames.is_unique_violation(APIError({"code": "42P01"}))
+    assert not usernames.is_unique_violation(ValueError("23505"))
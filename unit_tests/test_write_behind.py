@@ -0,0 +1,121 @@
+import time
+
+from src.write_behind import WriteBehindQueue
+
+
+class RecordingService:
+    """Watchlist service stand-in that records the writes it receives."""
+
+    def __init__(self, fail_times=0):
+        self.calls = []
+        self.fail_times = fail_times
+
+    def _call(self, *call):
+        self.calls.append(call)
+        if self.fail_times:
+            self.fail_times -= 1
+            return False
+        return True
+
+    def add_to_watchlist(self, username, show_id):
+        return self._call("add", username, show_id)
+
+    def remove_from_watchlist(self, username, show_id):
+        return self._call("remove", username, show_id)
+
+    def update_watched_status(self, username, show_id, watched):
+        return self._call("watched", username, show_id, watched)
+
+
+def test_write_behind_coalesces_opposite_mutations():
+    """Ensure add/remove and watched/unwatched pairs cancel before a flush."""
+    service = RecordingService()
+    queue = WriteBehindQueue(service, flush_delay=60)
+    queue.add_to_watchlist("testuser", "s1")
+    queue.remove_from_watchlist("testuser", "s1")
+    queue.update_watched_status("testuser", "s2", True)
+    queue.update_watched_status("testuser", "s2", False)
+    queue.add_to_watchlist("testuser", "s3")
+
+    assert queue.flush() is True
+    assert service.calls == [("add", "testuser", "s3")]
+    assert queue.stats()["coalesced"] == 2
+
+
+def test_write_behind_removal_discards_pending_watched_change():
+    """Ensure add, watched, remove sends nothing for the title."""
+    service = RecordingService()
+    queue = WriteBehindQueue(service, flush_delay=60)
+    queue.add_to_watchlist("testuser", "s1")
+    queue.update_watched_status("testuser", "s1", True)
+    queue.remove_from_watchlist("testuser", "s1")
+    queue.update_watched_status("testuser", "s2", True)
+    queue.remove_from_watchlist("testuser", "s2")
+
+    assert queue.pending_changes("testuser") == {
+        "s2": {"member": False, "watched": None}
+    }
+    assert queue.flush() is True
+    assert service.calls == [("remove", "testuser", "s2")]
+
+
+def test_write_behind_readd_resets_watched():
+    """Ensure remove then add leaves the title unwatched, as the API would."""
+    service = RecordingService()
+    queue = WriteBehindQueue(service, flush_delay=60)
+    queue.remove_from_watchlist("testuser", "s1")
+    queue.add_to_watchlist("testuser", "s1")
+
+    entries = [{"showId": "s1", "watched": True}]
+    assert queue.apply_to_entries("testuser", entries) == [
+        {"showId": "s1", "watched": False}
+    ]
+    assert queue.flush() is True
+    assert service.calls == [("watched", "testuser", "s1", False)]
+
+
+def test_write_behind_overlays_pending_changes():
+    """Ensure reads reflect changes that have not been written yet."""
+    queue = WriteBehindQueue(RecordingService(), flush_delay=60)
+    queue.remove_from_watchlist("testuser", "s1")
+    queue.add_to_watchlist("testuser", "s3")
+    queue.update_watched_status("testuser", "s2", True)
+
+    entries = [
+        {"showId": "s1", "watched": False},
+        {"showId": "s2", "watched": False},
+    ]
+    assert queue.apply_to_entries("testuser", entries) == [
+        {"showId": "s2", "watched": True},
+        {"showId": "s3", "watched": False},
+    ]
+    movies = [{"showId": "s1", "in_watchlist": True}]
+    assert (
+        queue.apply_to_movies("testuser", movies)[0]["in_watchlist"] is False
+    )
+    assert queue.apply_to_entries("otheruser", entries) == entries
+
+
+def test_write_behind_retries_failed_writes():
+    """Ensure a failed write is retried rather than lost."""
+    service = RecordingService(fail_times=1)
+    queue = WriteBehindQueue(service, flush_delay=60)
+    queue.add_to_watchlist("testuser", "s1")
+
+    assert queue.flush() is True
+    assert service.calls == [("add", "testuser", "s1")] * 2
+    assert queue.stats()["failed"] == 1
+
+
+def test_write_behind_backs_off_between_retries():
+    """Ensure each failed attempt waits twice as long as the one before."""
+    queue = WriteBehindQueue(RecordingService(fail_times=2), flush_delay=1)
+    queue.add_to_watchlist("testuser", "s1")
+
+    for attempts in (1, 2):
+        with queue._cond:
+            entry = queue._pending.pop("testuser")["s1"]
+            queue._requeue("testuser", "s1", entry)
+            delay = entry["due_at"] - time.monotonic()
+        assert entry["attempts"] == attempts
+        assert 2**attempts - 0.5 < delay <= 2**attempts